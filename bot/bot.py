@@ -2,42 +2,71 @@ from sc2.bot_ai import BotAI, UnitTypeId
 from game_state import GameState
 from scouting.manager import ScoutManager
 from macro.build_order.manager import BuildOrderManager
+from macro.placement import PlacementPlanner
+from profiler import StepProfiler, DEFAULT_STEP_BUDGET_MS
+from snapshot import GameSnapshot
 
 class AndrewBot(BotAI):
-    def __init__(self):
-        pass  # Init is clean
+    def __init__(self, step_budget_ms: float = DEFAULT_STEP_BUDGET_MS, profile_path: str = "step_profile.json"):
+        self.profiler = StepProfiler(step_budget_ms)
+        self.profile_path = profile_path
         
     async def on_start(self):
         """Initialize bot state"""
-        self.game_state = GameState()
+        self.game_state = GameState(self.game_info.map_size)
         self.scout_manager = ScoutManager(self, self.game_state)
-        self.build_manager = BuildOrderManager(self)
+        self.placement = PlacementPlanner(self)
+        self.placement.plan()
+        self.build_manager = BuildOrderManager(self, self.placement)
         
         print(f"Game started on {self.game_info.map_name}")
         print(f"Playing against {self.enemy_race}")
 
     async def emergency_supply_depot(self):
         """Build a supply depot if we're low on supply"""
-        if self.supply_left < 3 and not self.already_pending(UnitTypeId.SUPPLYDEPOT):
+        if self.supply_left < 3 and not self.snapshot.pending(UnitTypeId.SUPPLYDEPOT):
             if self.can_afford(UnitTypeId.SUPPLYDEPOT) and self.workers:
-                await self.build(UnitTypeId.SUPPLYDEPOT, near=self.townhalls.first)
+                location = self.placement.take(UnitTypeId.SUPPLYDEPOT)
+                if location:
+                    self.workers.closest_to(location).build(UnitTypeId.SUPPLYDEPOT, location)
+                else:
+                    await self.build(UnitTypeId.SUPPLYDEPOT, near=self.townhalls.first)
+                self.snapshot.ordered(UnitTypeId.SUPPLYDEPOT)
         
     async def on_step(self, iteration: int):
-        await self.emergency_supply_depot()
+        profiler = self.profiler
+        profiler.begin_step(iteration, self.time)
+
+        # One grouped view of our units for every manager this step
+        self.snapshot = await profiler.call("snapshot", GameSnapshot, self)
+
+        await profiler.call("emergency_supply_depot", self.emergency_supply_depot)
 
         # Core economy (always runs)
-        await self.distribute_workers()
-        await self._train_workers()
+        await profiler.call("distribute_workers", self.distribute_workers)
+        await profiler.call("train_workers", self._train_workers)
         
         # Execute our build order
-        await self.build_manager.execute()
+        await profiler.call("build_order", self.build_manager.execute)
         
         # Scout and gather intel
-        self.scout_manager.execute()
+        await profiler.call("scouting", self.scout_manager.execute)
+
+        profiler.end_step()
+        
+    async def on_unit_destroyed(self, unit_tag: int):
+        self.scout_manager.on_unit_destroyed(unit_tag)
+
+    async def on_building_construction_started(self, unit):
+        self.placement.on_construction_started(unit)
+
+    async def on_end(self, game_result):
+        print(f"Game ended: {game_result}")
+        self.profiler.report(self.profile_path)
         
     async def _train_workers(self):
         """Keep making SCVs"""
-        if self.supply_workers < 50 and self.townhalls:
-            for th in self.townhalls.ready.idle:
+        if self.supply_workers < 50:
+            for th in self.snapshot.idle_townhalls:
                 if self.can_afford(UnitTypeId.SCV):
                     th.train(UnitTypeId.SCV)
@@ -1,14 +1,126 @@
 
-from typing import Set, Dict, TYPE_CHECKING
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Set, Tuple
 from sc2.ids.unit_typeid import UnitTypeId
 from sc2.position import Point2
 
+# Positions kept per enemy unit type (oldest are dropped first)
+POSITION_HISTORY_SIZE = 64
+# Minimum game seconds between two history samples of the same unit
+POSITION_SAMPLE_INTERVAL = 2.0
+# Side length, in map tiles, of a cell in the last-seen grid
+GRID_CELL_SIZE = 8
+# Time constant (game seconds) of the grid's exponential decay
+GRID_DECAY_SECONDS = 60.0
+# Sightings not refreshed for this long are forgotten (the unit may be long dead in the fog)
+SIGHTING_TTL_SECONDS = 180.0
+# Hard cap on tracked enemy tags; the stalest sightings are evicted beyond it
+MAX_SIGHTINGS = 400
+
+
+@dataclass
+class EnemySighting:
+    tag: int
+    type_id: UnitTypeId
+    position: Point2
+    first_seen: float
+    last_seen: float
+    last_sampled: float
+
+
 class GameState:
-    def __init__(self) -> None:
+    def __init__(self, map_size: Tuple[int, int] = (256, 256)) -> None:
         # Enemy tracking
         self.enemy_expansion_count: int = 1
         self.enemy_expansions_scouted = set() # track which of them we have seen
 
         self.enemy_units_seen: Set[UnitTypeId] = set()
+        # Distinct enemy units (by tag) currently believed alive, per type
         self.enemy_unit_counts: Dict[UnitTypeId, int] = {}
-        self.enemy_positions: Dict[UnitTypeId, list[Point2]] = {}
+        # Recent sampled positions per type, bounded ring buffers
+        self.enemy_positions: Dict[UnitTypeId, Deque[Point2]] = {}
+        # Last sighting per enemy tag
+        self.enemy_sightings: Dict[int, EnemySighting] = {}
+
+        # Coarse grid of the last game time any enemy was seen in each cell
+        self.grid_width = max(1, math.ceil(map_size[0] / GRID_CELL_SIZE))
+        self.grid_height = max(1, math.ceil(map_size[1] / GRID_CELL_SIZE))
+        self.last_seen_grid: List[float] = [-math.inf] * (self.grid_width * self.grid_height)
+
+        self._next_prune_time: float = 0.0
+
+    def _cell(self, position: Point2) -> int:
+        x = min(self.grid_width - 1, max(0, int(position.x) // GRID_CELL_SIZE))
+        y = min(self.grid_height - 1, max(0, int(position.y) // GRID_CELL_SIZE))
+        return y * self.grid_width + x
+
+    def record_enemy(self, tag: int, type_id: UnitTypeId, position: Point2, time: float) -> None:
+        """Update the sighting for one visible enemy unit; O(1)"""
+        self.enemy_units_seen.add(type_id)
+        self.last_seen_grid[self._cell(position)] = time
+
+        sighting = self.enemy_sightings.get(tag)
+        if sighting is None:
+            sighting = EnemySighting(tag, type_id, position, time, time, -math.inf)
+            self.enemy_sightings[tag] = sighting
+            self.enemy_unit_counts[type_id] = self.enemy_unit_counts.get(type_id, 0) + 1
+        elif sighting.type_id != type_id:
+            # Morphs (e.g. Zergling -> Baneling) keep their tag
+            self._decrement(sighting.type_id)
+            self.enemy_unit_counts[type_id] = self.enemy_unit_counts.get(type_id, 0) + 1
+            sighting.type_id = type_id
+
+        sighting.position = position
+        sighting.last_seen = time
+
+        if time - sighting.last_sampled >= POSITION_SAMPLE_INTERVAL:
+            sighting.last_sampled = time
+            history = self.enemy_positions.get(type_id)
+            if history is None:
+                history = self.enemy_positions[type_id] = deque(maxlen=POSITION_HISTORY_SIZE)
+            history.append(position)
+
+    def forget_enemy(self, tag: int) -> None:
+        """Drop a sighting, e.g. when the unit is destroyed"""
+        sighting = self.enemy_sightings.pop(tag, None)
+        if sighting is not None:
+            self._decrement(sighting.type_id)
+
+    def _decrement(self, type_id: UnitTypeId) -> None:
+        count = self.enemy_unit_counts.get(type_id, 0) - 1
+        if count > 0:
+            self.enemy_unit_counts[type_id] = count
+        else:
+            self.enemy_unit_counts.pop(type_id, None)
+
+    def prune(self, time: float) -> None:
+        """
+        Forget stale sightings and enforce MAX_SIGHTINGS. Runs a full pass at
+        most every few seconds, so its cost is amortized across steps.
+        """
+        if time < self._next_prune_time and len(self.enemy_sightings) <= MAX_SIGHTINGS:
+            return
+        self._next_prune_time = time + 5.0
+
+        stale = [tag for tag, s in self.enemy_sightings.items() if time - s.last_seen > SIGHTING_TTL_SECONDS]
+        for tag in stale:
+            self.forget_enemy(tag)
+
+        overflow = len(self.enemy_sightings) - MAX_SIGHTINGS
+        if overflow > 0:
+            oldest = sorted(self.enemy_sightings.values(), key=lambda s: s.last_seen)[:overflow]
+            for sighting in oldest:
+                self.forget_enemy(sighting.tag)
+
+    def enemy_presence(self, position: Point2, time: float) -> float:
+        """Decayed likelihood (1 = seen just now, -> 0 over time) that enemies are near position"""
+        last_seen = self.last_seen_grid[self._cell(position)]
+        if last_seen == -math.inf:
+            return 0.0
+        return math.exp(-(time - last_seen) / GRID_DECAY_SECONDS)
+
+    def last_known_position(self, tag: int) -> Optional[Point2]:
+        sighting = self.enemy_sightings.get(tag)
+        return sighting.position if sighting else None
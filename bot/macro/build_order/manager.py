@@ -2,21 +2,25 @@ from sc2.bot_ai import BotAI
 from sc2.ids.unit_typeid import UnitTypeId
 from sc2.ids.ability_id import AbilityId
 from sc2.position import Point2
+from typing import Optional
 from .builds import TERRAN_SAFE_1_1_1, BuildStep
+from ..placement import PlacementPlanner
 
 class BuildOrderManager:
-    def __init__(self, bot: BotAI):
+    def __init__(self, bot: BotAI, placement: Optional[PlacementPlanner] = None):
         self.bot = bot
+        self.placement = placement
         self.build_order = TERRAN_SAFE_1_1_1
         self.current_step_index = 0
         self.completed_steps = []
         self.paused = False
+        self._last_status = None
         
     async def execute(self):
         """Execute the next step in our build order"""
         # Don't do anything if we're paused or finished
         if self.paused or self.current_step_index >= len(self.build_order):
-            print(f"🚧 Build order paused at step {self.current_step_index}")
+            self._status(f"🚧 Build order paused at step {self.current_step_index}")
             return
             
         # Get current step
@@ -40,7 +44,7 @@ class BuildOrderManager:
             
             # Check if conditions are met (if any)
             if current_step.condition and not self._check_condition(current_step.condition):
-                print(f"🚧 Waiting for condition: {current_step.condition}")
+                self._status(f"🚧 Waiting for condition: {current_step.condition}")
                 return  # Wait for condition
                 
             # Try to execute the build step
@@ -51,24 +55,29 @@ class BuildOrderManager:
                 self.completed_steps.append(current_step)
                 self.current_step_index += 1
                 
+    def _status(self, message: str):
+        """Print a status line once instead of on every step"""
+        if message != self._last_status:
+            print(message)
+            self._last_status = message
+
     def _check_condition(self, condition: str) -> bool:
         """Check if a build condition is met"""
         
+        snapshot = self.bot.snapshot
+
         if condition == "barracks_ready":
-            return self.bot.structures(UnitTypeId.BARRACKS).ready.exists
+            return snapshot.has_ready(UnitTypeId.BARRACKS)
             
         elif condition == "factory_ready":
-            return self.bot.structures(UnitTypeId.FACTORY).ready.exists
+            return snapshot.has_ready(UnitTypeId.FACTORY)
             
         elif condition == "starport_ready":
-            return self.bot.structures(UnitTypeId.STARPORT).ready.exists
+            return snapshot.has_ready(UnitTypeId.STARPORT)
             
         elif condition == "factory_techlab":
             # Check if factory has a tech lab
-            for factory in self.bot.structures(UnitTypeId.FACTORY).ready:
-                if factory.has_techlab:
-                    return True
-            return False
+            return snapshot.addon_count(UnitTypeId.FACTORY, "techlab") > 0
             
         elif condition == "natural_expansion":
             # Check if we have a command center at natural
@@ -126,12 +135,20 @@ class BuildOrderManager:
         return False
         
     # === Building Methods ===
+    async def _find_location(self, structure: UnitTypeId, near: Point2) -> Optional[Point2]:
+        """Next planned slot for a structure; only asks the game once the plan runs out"""
+        if self.placement:
+            location = self.placement.take(structure)
+            if location:
+                return location
+        return await self.bot.find_placement(structure, near=near)
+
     async def _build_supply_depot(self) -> bool:
         if not self.bot.can_afford(UnitTypeId.SUPPLYDEPOT):
             return False
         
         # Don't queue multiple depots
-        if self.bot.already_pending(UnitTypeId.SUPPLYDEPOT):
+        if self.bot.snapshot.pending(UnitTypeId.SUPPLYDEPOT):
             return False
             
         workers = self.bot.workers
@@ -141,13 +158,11 @@ class BuildOrderManager:
                 self.bot.game_info.map_center, 5
             ).position)
             
-            location = await self.bot.find_placement(
-                UnitTypeId.SUPPLYDEPOT,
-                near=target_position
-            )
+            location = await self._find_location(UnitTypeId.SUPPLYDEPOT, target_position)
             if location:
                 worker = workers.closest_to(location)
                 worker.build(UnitTypeId.SUPPLYDEPOT, location)
+                self.bot.snapshot.ordered(UnitTypeId.SUPPLYDEPOT)
                 return True
         return False
         
@@ -159,6 +174,13 @@ class BuildOrderManager:
         if not workers:
             return False
             
+        # Planned slots start with the ramp wall
+        location = self.placement.take(UnitTypeId.BARRACKS) if self.placement else None
+        if location:
+            worker = workers.closest_to(location)
+            worker.build(UnitTypeId.BARRACKS, location)
+            return True
+
         # Try to build at ramp first
         if self.bot.main_base_ramp and self.bot.main_base_ramp.barracks_in_middle:
             location = await self.bot.find_placement(
@@ -213,9 +235,9 @@ class BuildOrderManager:
             return False
             
         # Build near main base
-        location = await self.bot.find_placement(
+        location = await self._find_location(
             UnitTypeId.FACTORY,
-            near=Point2(self.bot.townhalls.first.position.towards(self.bot.game_info.map_center, 8))
+            Point2(self.bot.townhalls.first.position.towards(self.bot.game_info.map_center, 8))
         )
         if location:
             worker = workers.closest_to(location)
@@ -231,9 +253,9 @@ class BuildOrderManager:
         if not workers:
             return False
             
-        location = await self.bot.find_placement(
+        location = await self._find_location(
             UnitTypeId.STARPORT,
-            near=Point2(self.bot.townhalls.first.position.towards(self.bot.game_info.map_center, 10))
+            Point2(self.bot.townhalls.first.position.towards(self.bot.game_info.map_center, 10))
         )
         if location:
             worker = workers.closest_to(location)
@@ -250,9 +272,9 @@ class BuildOrderManager:
             natural = self.bot.townhalls[1]
             workers = self.bot.workers
             if workers:
-                location = await self.bot.find_placement(
+                location = await self._find_location(
                     UnitTypeId.BUNKER,
-                    near=natural.position.towards(self.bot.enemy_start_locations[0], 8)
+                    natural.position.towards(self.bot.enemy_start_locations[0], 8)
                 )
                 if location:
                     worker = workers.closest_to(location)
@@ -268,9 +290,9 @@ class BuildOrderManager:
         if not workers:
             return False
             
-        location = await self.bot.find_placement(
+        location = await self._find_location(
             UnitTypeId.ENGINEERINGBAY,
-            near=Point2(self.bot.townhalls.first.position.towards(self.bot.game_info.map_center, 6))
+            Point2(self.bot.townhalls.first.position.towards(self.bot.game_info.map_center, 6))
         )
         if location:
             worker = workers.closest_to(location)
@@ -280,7 +302,7 @@ class BuildOrderManager:
 
     async def _build_techlab_on_factory(self) -> bool:
         # Find a factory without an addon
-        for factory in self.bot.structures(UnitTypeId.FACTORY).ready.idle:
+        for factory in self.bot.snapshot.idle(UnitTypeId.FACTORY):
             if not factory.has_addon and self.bot.can_afford(UnitTypeId.FACTORYTECHLAB):
                 factory.build(UnitTypeId.FACTORYTECHLAB)
                 return True
@@ -288,7 +310,7 @@ class BuildOrderManager:
 
     async def _upgrade_to_orbital(self) -> bool:
         # Find command centers that can be upgraded
-        for cc in self.bot.townhalls(UnitTypeId.COMMANDCENTER).ready.idle:
+        for cc in self.bot.snapshot.idle(UnitTypeId.COMMANDCENTER):
             if self.bot.can_afford(UnitTypeId.ORBITALCOMMAND):
                 cc(AbilityId.UPGRADETOORBITAL_ORBITALCOMMAND)  # Use the ability!
                 return True
@@ -299,7 +321,7 @@ class BuildOrderManager:
         if not self.bot.can_afford(UnitTypeId.MARINE):
             return False
 
-        barracks = self.bot.structures(UnitTypeId.BARRACKS).ready
+        barracks = self.bot.snapshot.ready(UnitTypeId.BARRACKS)
         if not barracks:
             return False
 
@@ -314,7 +336,7 @@ class BuildOrderManager:
         if not self.bot.can_afford(UnitTypeId.SIEGETANK):
             return False
 
-        factories = self.bot.structures(UnitTypeId.FACTORY).ready
+        factories = self.bot.snapshot.ready(UnitTypeId.FACTORY)
         if not factories:
             return False
             
@@ -329,7 +351,7 @@ class BuildOrderManager:
         if not self.bot.can_afford(UnitTypeId.MEDIVAC):
             return False
             
-        starports = self.bot.structures(UnitTypeId.STARPORT).ready
+        starports = self.bot.snapshot.ready(UnitTypeId.STARPORT)
         if not starports:
             return False
             
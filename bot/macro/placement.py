@@ -0,0 +1,281 @@
+
+import math
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+from sc2.bot_ai import BotAI
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+from sc2.unit import Unit
+
+# Side length of the square footprint of each structure we plan slots for
+FOOTPRINT_SIZES: Dict[UnitTypeId, int] = {
+    UnitTypeId.SUPPLYDEPOT: 2,
+    UnitTypeId.MISSILETURRET: 2,
+    UnitTypeId.BARRACKS: 3,
+    UnitTypeId.FACTORY: 3,
+    UnitTypeId.STARPORT: 3,
+    UnitTypeId.ENGINEERINGBAY: 3,
+    UnitTypeId.ARMORY: 3,
+    UnitTypeId.BUNKER: 3,
+}
+# Structures that need room for a 2x2 addon on their right side
+ADDON_STRUCTURES = {UnitTypeId.BARRACKS, UnitTypeId.FACTORY, UnitTypeId.STARPORT}
+
+# Slot lists, tried in order for each structure
+SLOT_KINDS: Dict[UnitTypeId, Tuple[str, ...]] = {
+    UnitTypeId.SUPPLYDEPOT: ("ramp_depot", "depot"),
+    UnitTypeId.MISSILETURRET: ("depot",),
+    UnitTypeId.BARRACKS: ("ramp_barracks", "production"),
+    UnitTypeId.FACTORY: ("production",),
+    UnitTypeId.STARPORT: ("production",),
+    UnitTypeId.ENGINEERINGBAY: ("tech",),
+    UnitTypeId.ARMORY: ("tech",),
+    UnitTypeId.BUNKER: ("bunker",),
+}
+
+# How many slots to plan per list; more than a game of this bot will use
+MAX_SLOTS = {"production": 10, "tech": 6, "depot": 30, "bunker": 4}
+# A handed out slot that never sees construction start is returned after this many game seconds
+RESERVATION_SECONDS = 20.0
+# Keep this many tiles clear around the start townhall and between it and its resources
+TOWNHALL_CLEARANCE = 3
+RESOURCE_CLEARANCE = 3
+RAMP_CLEARANCE = 4
+
+Cell = Tuple[int, int]
+
+
+def footprint_cells(center: Point2, size: int) -> List[Cell]:
+    """Grid cells covered by a size x size structure centered at center"""
+    x0 = math.floor(center.x - size / 2 + 0.01)
+    y0 = math.floor(center.y - size / 2 + 0.01)
+    return [(x, y) for x in range(x0, x0 + size) for y in range(y0, y0 + size)]
+
+
+def addon_cells(center: Point2) -> List[Cell]:
+    """Cells of the 2x2 addon attached to a 3x3 production structure"""
+    return footprint_cells(Point2((center.x + 2.5, center.y - 0.5)), 2)
+
+
+def _segment_distance(p: Tuple[float, float], a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    ax, ay = a
+    dx, dy = b[0] - ax, b[1] - ay
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, ((p[0] - ax) * dx + (p[1] - ay) * dy) / length))
+    return math.hypot(p[0] - ax - t * dx, p[1] - ay - t * dy)
+
+
+class PlacementPlanner:
+    """
+    Plans building slots once at game start from the placement grid and the
+    main base / ramp geometry, then hands them out without asking the game.
+    Slots are checked against the structures we have seen start, so a slot
+    taken by anything (including find_placement fallbacks) is skipped.
+    """
+
+    def __init__(self, bot: BotAI):
+        self.bot = bot
+        self.slots: Dict[str, Deque[Point2]] = {}
+        self.occupied: Set[Cell] = set()
+        # (expiry time, kind, position, cells) of slots handed out but not yet started
+        self.reserved: List[Tuple[float, str, Point2, List[Cell]]] = []
+        self._sizes: Dict[str, int] = {}
+
+    def plan(self) -> None:
+        """Compute every slot list; call once from on_start"""
+        bot = self.bot
+        start = bot.start_location
+        region = self._main_region(start)
+
+        blocked: Set[Cell] = set(footprint_cells(start, 5 + 2 * TOWNHALL_CLEARANCE))
+        resources = [r for r in (bot.mineral_field | bot.vespene_geyser) if r.distance_to(start) < 15]
+        for cell in region:
+            p = (cell[0] + 0.5, cell[1] + 0.5)
+            for resource in resources:
+                if _segment_distance(p, (start.x, start.y), (resource.position.x, resource.position.y)) < RESOURCE_CLEARANCE:
+                    blocked.add(cell)
+                    break
+
+        ramp = bot.main_base_ramp
+        ramp_depots: List[Point2] = []
+        ramp_barracks: List[Point2] = []
+        if ramp is not None:
+            for upper in ramp.upper:
+                for cell in footprint_cells(Point2(upper), 2 * RAMP_CLEARANCE):
+                    blocked.add(cell)
+            try:
+                ramp_depots = sorted(ramp.corner_depots, key=lambda p: p.distance_to(start))
+                if ramp.barracks_correct_placement is not None:
+                    ramp_barracks = [ramp.barracks_correct_placement]
+            except Exception:
+                # Ramps with an unusual number of upper points have no precomputed wall
+                ramp_depots, ramp_barracks = [], []
+
+        planned: Set[Cell] = set()
+        for position in ramp_depots:
+            planned.update(footprint_cells(position, 2))
+        for position in ramp_barracks:
+            planned.update(footprint_cells(position, 3))
+            planned.update(addon_cells(position))
+
+        free = region - blocked
+        toward_center = start.towards(bot.game_info.map_center, 8)
+
+        # Production and tech buildings as close to the townhall as possible, with a
+        # one-tile lane around every footprint so units can always walk out
+        production = self._pack(free, planned, 3, True, MAX_SLOTS["production"], toward_center, margin=1)
+        tech = self._pack(free, planned, 3, False, MAX_SLOTS["tech"], toward_center, margin=1)
+        # Depots fill the edge of the main, furthest from the townhall first
+        depots = self._pack(free, planned, 2, False, MAX_SLOTS["depot"], start, margin=0, furthest=True)
+
+        self._set("ramp_depot", ramp_depots, 2)
+        self._set("ramp_barracks", ramp_barracks, 3)
+        self._set("production", production, 3)
+        self._set("tech", tech, 3)
+        self._set("depot", depots, 2)
+        self._set("bunker", self._bunker_slots(), 3)
+
+    def _set(self, kind: str, positions: Iterable[Point2], size: int) -> None:
+        self.slots[kind] = deque(positions)
+        self._sizes[kind] = size
+
+    def _main_region(self, start: Point2) -> Set[Cell]:
+        """Placeable cells reachable from the start location at the same terrain height"""
+        placement = self.bot.game_info.placement_grid.data_numpy
+        height = self.bot.game_info.terrain_height.data_numpy
+        rows, cols = placement.shape
+        origin = (int(start.x), int(start.y))
+        level = int(height[origin[1], origin[0]])
+
+        region: Set[Cell] = set()
+        queue = deque([origin])
+        seen = {origin}
+        while queue:
+            x, y = queue.popleft()
+            if placement[y, x] or (x, y) == origin:
+                region.add((x, y))
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if (nx, ny) in seen or not (0 <= nx < cols and 0 <= ny < rows):
+                    continue
+                seen.add((nx, ny))
+                # The townhall itself makes its cells unplaceable, so walk through them;
+                # cliffs and ramps are unplaceable too, which keeps the fill inside the main
+                if (placement[ny, nx] or abs(nx - origin[0]) <= 3 and abs(ny - origin[1]) <= 3) \
+                        and abs(int(height[ny, nx]) - level) <= 2:
+                    queue.append((nx, ny))
+        return region
+
+    def _pack(self, free: Set[Cell], planned: Set[Cell], size: int, addon: bool, limit: int,
+              anchor: Point2, margin: int, furthest: bool = False) -> List[Point2]:
+        """Greedily place up to limit footprints in free cells, ordered by distance to anchor"""
+        offset = 0.5 if size % 2 else 0.0
+        candidates = sorted(
+            (Point2((x + offset, y + offset)) for x, y in free),
+            key=lambda p: p.distance_to(anchor),
+            reverse=furthest,
+        )
+        slots: List[Point2] = []
+        for center in candidates:
+            cells = footprint_cells(center, size)
+            if addon:
+                cells += addon_cells(center)
+            if any(cell not in free or cell in planned for cell in cells):
+                continue
+            if margin and any(cell in planned for cell in self._ring(cells, margin)):
+                continue
+            planned.update(cells)
+            slots.append(center)
+            if len(slots) >= limit:
+                break
+        return slots
+
+    @staticmethod
+    def _ring(cells: List[Cell], margin: int) -> Set[Cell]:
+        xs = [x for x, _ in cells]
+        ys = [y for _, y in cells]
+        return {
+            (x, y)
+            for x in range(min(xs) - margin, max(xs) + margin + 1)
+            for y in range(min(ys) - margin, max(ys) + margin + 1)
+        }
+
+    def _bunker_slots(self) -> List[Point2]:
+        """Bunker spots in front of the natural, toward the enemy"""
+        bot = self.bot
+        start = bot.start_location
+        expansions = [p for p in bot.expansion_locations_list if p.distance_to(start) > 5]
+        if not expansions or not bot.enemy_start_locations:
+            return []
+        natural = min(expansions, key=lambda p: p.distance_to(start))
+        target = natural.towards(bot.enemy_start_locations[0], 8)
+        placement = bot.game_info.placement_grid
+
+        slots: List[Point2] = []
+        planned: Set[Cell] = set()
+        near = sorted(
+            (Point2((int(target.x) + dx + 0.5, int(target.y) + dy + 0.5)) for dx in range(-4, 5) for dy in range(-4, 5)),
+            key=lambda p: p.distance_to(target),
+        )
+        for center in near:
+            cells = footprint_cells(center, 3)
+            if any(cell in planned or not self._in_map(cell) or not placement.is_set(cell) for cell in cells):
+                continue
+            # Stay out of the natural townhall's footprint
+            if center.distance_to(natural) < 5:
+                continue
+            planned.update(cells)
+            slots.append(center)
+            if len(slots) >= MAX_SLOTS["bunker"]:
+                break
+        return slots
+
+    def _in_map(self, cell: Cell) -> bool:
+        grid = self.bot.game_info.placement_grid
+        return 0 <= cell[0] < grid.width and 0 <= cell[1] < grid.height
+
+    def _is_free(self, cells: List[Cell]) -> bool:
+        return not any(cell in self.occupied for cell in cells)
+
+    def _cells(self, kind: str, position: Point2) -> List[Cell]:
+        cells = footprint_cells(position, self._sizes[kind])
+        if kind in ("production", "ramp_barracks"):
+            cells += addon_cells(position)
+        return cells
+
+    def take(self, structure: UnitTypeId) -> Optional[Point2]:
+        """Hand out the next free slot for a structure, or None if none is left"""
+        self._release_expired()
+        for kind in SLOT_KINDS.get(structure, ()):
+            slots = self.slots.get(kind)
+            while slots:
+                position = slots.popleft()
+                cells = self._cells(kind, position)
+                if self._is_free(cells):
+                    self.reserved.append((self.bot.time + RESERVATION_SECONDS, kind, position, cells))
+                    return position
+        return None
+
+    def _release_expired(self) -> None:
+        if not self.reserved:
+            return
+        now = self.bot.time
+        expired = [entry for entry in self.reserved if entry[0] <= now]
+        if not expired:
+            return
+        self.reserved = [entry for entry in self.reserved if entry[0] > now]
+        for _, kind, position, cells in expired:
+            if self._is_free(cells):
+                self.slots[kind].appendleft(position)
+
+    def on_construction_started(self, unit: Unit) -> None:
+        """Mark a new structure's cells as used and settle its reservation"""
+        size = FOOTPRINT_SIZES.get(unit.type_id)
+        if size is None:
+            # Townhalls, refineries and anything else: use the footprint radius
+            size = max(1, round(unit.footprint_radius * 2)) if unit.footprint_radius else 0
+        if size:
+            cells = footprint_cells(unit.position, size)
+            if unit.type_id in ADDON_STRUCTURES:
+                cells += addon_cells(unit.position)
+            self.occupied.update(cells)
+        self.reserved = [entry for entry in self.reserved if entry[2].distance_to(unit.position) > 0.5]
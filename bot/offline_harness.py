@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Offline harness for the bot's decision code
+
+Replays the tracker events of a recorded game through GameState,
+ScoutManager, GameSnapshot and BuildOrderManager._check_condition without an
+SC2 client. The units of one player become "our" units and structures, every
+other player's units are the enemy; each step the managers see a fake bot
+built from the tracker state at that game loop.
+
+There is no fog of war in tracker events, so every living enemy unit is
+visible on every step. That is the worst case for enemy tracking, which is
+what scaling measurements want.
+
+Per-step manager cost is measured with the bot's StepProfiler and memory
+growth with tracemalloc, sampled once per game minute.
+
+Usage: python offline_harness.py <replay_file_path> [--player PID] [--step LOOPS] [--speed X] [--no-memory]
+"""
+
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from typing import Dict, Any, Optional
+
+try:
+    import sc2reader
+except ImportError:
+    print(json.dumps({"error": "sc2reader not installed. Run: pip install sc2reader"}))
+    sys.exit(1)
+
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+
+from game_state import GameState
+from scouting.manager import ScoutManager
+from snapshot import GameSnapshot
+from profiler import StepProfiler
+from macro.build_order.manager import BuildOrderManager
+
+# Game loops per second at "faster" speed
+LOOPS_PER_SECOND = 22.4
+# python-sc2 observes every 4 game loops unless told otherwise
+DEFAULT_STEP_LOOPS = 4
+
+ADDON_PARENT_OFFSET = (-2.5, 0.5)
+TOWNHALL_TYPES = {UnitTypeId.COMMANDCENTER, UnitTypeId.ORBITALCOMMAND, UnitTypeId.PLANETARYFORTRESS,
+                  UnitTypeId.NEXUS, UnitTypeId.HATCHERY, UnitTypeId.LAIR, UnitTypeId.HIVE}
+
+_type_ids: Dict[str, Optional[UnitTypeId]] = {}
+
+
+def type_id_for(name: str) -> Optional[UnitTypeId]:
+    """python-sc2 type for a replay unit name, e.g. SiegeTankSieged -> SIEGETANKSIEGED"""
+    if name not in _type_ids:
+        _type_ids[name] = UnitTypeId.__members__.get(name.upper())
+    return _type_ids[name]
+
+
+class FakeUnit:
+    """The attributes of a python-sc2 Unit the managers read"""
+
+    __slots__ = ("tag", "type_id", "owner", "position", "is_ready", "is_idle",
+                 "is_structure", "add_on_tag", "has_techlab")
+
+    def __init__(self, tag: int, type_id: UnitTypeId, owner: int, position: Point2, is_ready: bool):
+        self.tag = tag
+        self.type_id = type_id
+        self.owner = owner
+        self.position = position
+        self.is_ready = is_ready
+        self.is_idle = True
+        self.is_structure = False
+        self.add_on_tag = 0
+        self.has_techlab = False
+
+
+class FakeUnits(list):
+    """List with the Units properties the managers use"""
+
+    @property
+    def amount(self) -> int:
+        return len(self)
+
+    @property
+    def exists(self) -> bool:
+        return bool(self)
+
+
+class FakeBot:
+    """Minimal BotAI stand-in rebuilt from tracker state every step"""
+
+    def __init__(self):
+        self.time = 0.0
+        self.supply_used = 0
+        self.supply_cap = 0
+        self.minerals = 0
+        self.vespene = 0
+        self.units = FakeUnits()
+        self.structures = FakeUnits()
+        self.townhalls = FakeUnits()
+        self.enemy_units = FakeUnits()
+        self.enemy_structures = FakeUnits()
+
+    def already_pending(self, type_id: UnitTypeId) -> float:
+        return sum(1 for s in self.structures if s.type_id == type_id and not s.is_ready)
+
+
+def run_harness(replay_path: str, player_id: Optional[int] = None, step_loops: int = DEFAULT_STEP_LOOPS,
+                speed: float = 0.0, track_memory: bool = True) -> Dict[str, Any]:
+    """Drive the managers through one replay and return timing and memory stats"""
+    load_start = time.perf_counter()
+    replay = sc2reader.load_replay(replay_path, load_level=3)
+    load_seconds = time.perf_counter() - load_start
+
+    players = [p for p in replay.players if p.pid]
+    if not players:
+        return {"error": "Replay has no players"}
+    if player_id is None:
+        player_id = players[0].pid
+    if player_id not in {p.pid for p in players}:
+        return {"error": f"Player {player_id} not found in replay"}
+
+    bot = FakeBot()
+    width, height = _map_size(replay)
+    game_state = GameState((width, height))
+    scout_manager = ScoutManager(bot, game_state)
+    build_manager = BuildOrderManager(bot)
+    conditions = sorted({step.condition for step in build_manager.build_order if step.condition})
+    profiler = StepProfiler()
+
+    units: Dict[int, FakeUnit] = {}
+    memory_by_minute: Dict[int, int] = {}
+    if track_memory:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+    events = replay.tracker_events
+    event_index = 0
+    last_loop = max((e.frame for e in events), default=0)
+    wall_start = time.perf_counter()
+    iteration = 0
+
+    for loop in range(0, last_loop + 1, step_loops):
+        # Apply every tracker event up to this loop
+        while event_index < len(events) and events[event_index].frame <= loop:
+            _apply_event(events[event_index], units, bot, player_id, scout_manager)
+            event_index += 1
+
+        bot.time = loop / LOOPS_PER_SECOND
+        _rebuild_views(bot, units, player_id)
+
+        profiler.begin_step(iteration, bot.time)
+        bot.snapshot = profiler.call_sync("snapshot", GameSnapshot, bot)
+        profiler.call_sync("scouting", scout_manager.execute)
+        profiler.call_sync("conditions", lambda: [build_manager._check_condition(c) for c in conditions])
+        profiler.end_step()
+        iteration += 1
+
+        minute = int(bot.time // 60)
+        if track_memory and minute not in memory_by_minute:
+            memory_by_minute[minute] = tracemalloc.get_traced_memory()[0] - baseline
+
+        if speed > 0:
+            # Pace the loop to game time divided by the speed factor
+            behind = bot.time / speed - (time.perf_counter() - wall_start)
+            if behind > 0:
+                time.sleep(behind)
+
+    wall_seconds = time.perf_counter() - wall_start
+    peak_memory = None
+    if track_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1] - baseline
+        tracemalloc.stop()
+
+    summary = profiler.summary()
+    return {
+        "success": True,
+        "filename": replay.filename,
+        "player_id": player_id,
+        "game_seconds": round(last_loop / LOOPS_PER_SECOND, 1),
+        "steps": iteration,
+        "step_loops": step_loops,
+        "load_seconds": round(load_seconds, 3),
+        "wall_seconds": round(wall_seconds, 3),
+        "speedup": round(last_loop / LOOPS_PER_SECOND / wall_seconds, 1) if wall_seconds else None,
+        "managers": {name: entry["overall"] for name, entry in summary["managers"].items()},
+        "step_by_minute": summary["managers"].get("step", {}).get("by_minute", {}),
+        "memory": {
+            "by_minute_bytes": memory_by_minute,
+            "peak_bytes": peak_memory,
+        } if track_memory else None,
+        "game_state": {
+            "enemy_sightings": len(game_state.enemy_sightings),
+            "enemy_types_seen": len(game_state.enemy_units_seen),
+            "position_samples": sum(len(h) for h in game_state.enemy_positions.values()),
+        },
+    }
+
+
+def _map_size(replay):
+    init_data = replay.raw_data.get("replay.initData") or {}
+    description = init_data.get("game_description", {})
+    return description.get("map_size_x", 256) or 256, description.get("map_size_y", 256) or 256
+
+
+def _apply_event(event, units: Dict[int, FakeUnit], bot: FakeBot, player_id: int,
+                 scout_manager: ScoutManager) -> None:
+    name = event.name
+
+    if name in ('UnitBornEvent', 'UnitInitEvent'):
+        if not event.control_pid:
+            return
+        type_id = type_id_for(event.unit_type_name)
+        if type_id is None:
+            return
+        unit = FakeUnit(event.unit_id, type_id, event.control_pid,
+                        Point2((event.x, event.y)), name == 'UnitBornEvent')
+        unit.is_structure = name == 'UnitInitEvent' or type_id in TOWNHALL_TYPES
+        units[event.unit_id] = unit
+        if event.control_pid == player_id and event.unit_type_name.endswith(("TechLab", "Reactor")):
+            _attach_addon(unit, units, player_id)
+
+    elif name == 'UnitDoneEvent':
+        unit = units.get(event.unit_id)
+        if unit:
+            unit.is_ready = True
+
+    elif name == 'UnitTypeChangeEvent':
+        unit = units.get(event.unit_id)
+        type_id = type_id_for(event.unit_type_name)
+        if unit and type_id:
+            unit.type_id = type_id
+
+    elif name == 'UnitPositionsEvent':
+        for unit_obj, (x, y) in event.units.items():
+            unit = units.get(unit_obj.id)
+            if unit:
+                unit.position = Point2((x, y))
+
+    elif name == 'UnitDiedEvent':
+        unit = units.pop(event.unit_id, None)
+        if unit and unit.owner != player_id:
+            scout_manager.on_unit_destroyed(unit.tag)
+
+    elif name == 'PlayerStatsEvent' and event.pid == player_id:
+        bot.supply_used = int(event.food_used)
+        bot.supply_cap = int(event.food_made)
+        bot.minerals = event.minerals_current
+        bot.vespene = event.vespene_current
+
+
+def _attach_addon(addon: FakeUnit, units: Dict[int, FakeUnit], player_id: int) -> None:
+    """Link an addon to the production structure it was built on"""
+    parent_position = Point2((addon.position.x + ADDON_PARENT_OFFSET[0], addon.position.y + ADDON_PARENT_OFFSET[1]))
+    for unit in units.values():
+        if unit.owner == player_id and unit.is_structure and unit is not addon \
+                and unit.position.distance_to(parent_position) <= 1.5:
+            unit.add_on_tag = addon.tag
+            unit.has_techlab = addon.type_id.name.endswith("TECHLAB")
+            return
+
+
+def _rebuild_views(bot: FakeBot, units: Dict[int, FakeUnit], player_id: int) -> None:
+    own_units, own_structures, townhalls, enemy_units, enemy_structures = \
+        FakeUnits(), FakeUnits(), FakeUnits(), FakeUnits(), FakeUnits()
+    for unit in units.values():
+        if unit.owner == player_id:
+            if unit.is_structure:
+                own_structures.append(unit)
+                if unit.type_id in TOWNHALL_TYPES:
+                    townhalls.append(unit)
+            else:
+                own_units.append(unit)
+        elif unit.is_structure:
+            enemy_structures.append(unit)
+        else:
+            enemy_units.append(unit)
+    bot.units, bot.structures, bot.townhalls = own_units, own_structures, townhalls
+    bot.enemy_units, bot.enemy_structures = enemy_units, enemy_structures
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Drive the bot's managers through a replay offline")
+    parser.add_argument("replay_path")
+    parser.add_argument("--player", type=int, default=None, help="Player ID whose units are ours (default: first)")
+    parser.add_argument("--step", type=int, default=DEFAULT_STEP_LOOPS, help="Game loops per step")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Pace at this multiple of game speed (0 = as fast as possible)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (it slows every step)")
+    args = parser.parse_args()
+
+    try:
+        result = run_harness(args.replay_path, args.player, max(1, args.step), args.speed, not args.no_memory)
+    except Exception as e:
+        result = {"error": f"Harness failed: {str(e)}"}
+    print(json.dumps(result, indent=2))
+    if "error" in result:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
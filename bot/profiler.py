@@ -0,0 +1,193 @@
+
+import heapq
+import inspect
+import json
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# One game loop at "faster" speed; a step slower than this drops frames in realtime games
+DEFAULT_STEP_BUDGET_MS = 44.6
+# Log-spaced latency buckets: bucket i holds samples up to MIN_BUCKET_MS * BUCKET_GROWTH ** i
+MIN_BUCKET_MS = 0.01
+BUCKET_GROWTH = 1.25
+BUCKET_COUNT = 64
+# Slowest steps kept verbatim for the report (all slow steps are counted)
+MAX_SLOW_STEPS = 50
+
+
+def _bucket(ms: float) -> int:
+    if ms <= MIN_BUCKET_MS:
+        return 0
+    return min(BUCKET_COUNT - 1, math.ceil(math.log(ms / MIN_BUCKET_MS, BUCKET_GROWTH)))
+
+
+def _bucket_upper(index: int) -> float:
+    return MIN_BUCKET_MS * BUCKET_GROWTH ** index
+
+
+class LatencyHistogram:
+    """Fixed-size log histogram; percentiles are accurate to one bucket (25%)"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float) -> None:
+        self.counts[_bucket(ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                # Never report more than the true maximum
+                return min(_bucket_upper(i), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "max_ms": round(self.max, 3),
+        }
+
+
+class StepProfiler:
+    """
+    Times every manager call made during on_step and keeps a latency histogram
+    per manager and game minute. Steps whose total time exceeds the budget are
+    flagged. Only depends on the game time passed to begin_step, so it runs
+    with a fake bot (and a fake clock) outside the game client.
+    """
+
+    def __init__(self, budget_ms: float = DEFAULT_STEP_BUDGET_MS,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.budget_ms = budget_ms
+        self.clock = clock
+        # (manager name, game minute) -> histogram; "step" holds whole-step times
+        self.histograms: Dict[Tuple[str, int], LatencyHistogram] = {}
+        self.steps = 0
+        self.slow_step_count = 0
+        # Min-heap of (total_ms, step number, step) holding the slowest MAX_SLOW_STEPS steps
+        self.slow_steps: List[Tuple[float, int, Dict[str, Any]]] = []
+
+        self._iteration = 0
+        self._game_time = 0.0
+        self._minute = 0
+        self._step_start: Optional[float] = None
+        self._step_calls: Dict[str, float] = {}
+
+    def begin_step(self, iteration: int, game_time: float) -> None:
+        self._iteration = iteration
+        self._game_time = game_time
+        self._minute = int(game_time // 60)
+        self._step_calls = {}
+        self._step_start = self.clock()
+
+    async def call(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call a manager method (sync or async) and record how long it took"""
+        start = self.clock()
+        try:
+            result = fn(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        finally:
+            self._record(name, (self.clock() - start) * 1000.0)
+
+    def call_sync(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call a plain function outside the event loop and record how long it took"""
+        start = self.clock()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._record(name, (self.clock() - start) * 1000.0)
+
+    def _record(self, name: str, ms: float) -> None:
+        self._histogram(name).add(ms)
+        self._step_calls[name] = self._step_calls.get(name, 0.0) + ms
+
+    def _histogram(self, name: str) -> LatencyHistogram:
+        key = (name, self._minute)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        return histogram
+
+    def end_step(self) -> None:
+        if self._step_start is None:
+            return
+        total = (self.clock() - self._step_start) * 1000.0
+        self._step_start = None
+        self._histogram("step").add(total)
+        self.steps += 1
+
+        if total > self.budget_ms:
+            self.slow_step_count += 1
+            if len(self.slow_steps) < MAX_SLOW_STEPS or total > self.slow_steps[0][0]:
+                step = {
+                    "iteration": self._iteration,
+                    "game_time": round(self._game_time, 1),
+                    "total_ms": round(total, 3),
+                    "calls_ms": {name: round(ms, 3) for name, ms in self._step_calls.items()},
+                }
+                if len(self.slow_steps) < MAX_SLOW_STEPS:
+                    heapq.heappush(self.slow_steps, (total, self.steps, step))
+                else:
+                    heapq.heappushpop(self.slow_steps, (total, self.steps, step))
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-manager totals and per-minute p50/p95/max"""
+        managers: Dict[str, Dict[str, Any]] = {}
+        for (name, minute), histogram in sorted(self.histograms.items()):
+            entry = managers.setdefault(name, {"overall": LatencyHistogram(), "by_minute": {}})
+            entry["overall"].merge(histogram)
+            entry["by_minute"][minute] = histogram.summary()
+        for entry in managers.values():
+            entry["overall"] = entry["overall"].summary()
+
+        return {
+            "budget_ms": self.budget_ms,
+            "steps": self.steps,
+            "slow_steps": self.slow_step_count,
+            "managers": managers,
+            "slowest_steps": [step for _, _, step in sorted(self.slow_steps, reverse=True)],
+        }
+
+    def report(self, path: Optional[str] = None) -> Dict[str, Any]:
+        """Print a per-manager table and optionally write the full summary as JSON"""
+        summary = self.summary()
+        print(f"\n⏱️  Step profile: {summary['steps']} steps, "
+              f"{summary['slow_steps']} over the {self.budget_ms:g} ms budget")
+        print(f"{'manager':<24}{'calls':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for name, entry in summary["managers"].items():
+            overall = entry["overall"]
+            print(f"{name:<24}{overall['count']:>8}{overall['p50_ms']:>10.3f}"
+                  f"{overall['p95_ms']:>10.3f}{overall['max_ms']:>10.3f}")
+
+        if path:
+            with open(path, "w") as f:
+                json.dump(summary, f, indent=2)
+            print(f"Step profile written to {path}")
+        return summary
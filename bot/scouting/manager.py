@@ -7,17 +7,17 @@ class ScoutManager:
         self.bot = bot
         self.game_state = game_state
 
-    def execute(self): 
+    def execute(self):
         """Updates the game state with what we see"""
-        # Track visible enemies
+        time = self.bot.time
+
+        # Track visible enemies; cost is O(visible units) per step
         for unit in self.bot.enemy_units:
-            # Add to seen set
-            self.game_state.enemy_units_seen.add(unit.type_id)
-            
-            # Count units
-            self.game_state.enemy_unit_counts[unit.type_id] = self.game_state.enemy_unit_counts.get(unit.type_id, 0) + 1
-            
-            # Track positions
-            if unit.type_id not in self.game_state.enemy_positions:
-                self.game_state.enemy_positions[unit.type_id] = []
-            self.game_state.enemy_positions[unit.type_id].append(unit.position)
+            self.game_state.record_enemy(unit.tag, unit.type_id, unit.position, time)
+
+        # Keep memory bounded however long the game runs
+        self.game_state.prune(time)
+
+    def on_unit_destroyed(self, unit_tag: int):
+        """Forget enemies we know are dead"""
+        self.game_state.forget_enemy(unit_tag)
@@ -0,0 +1,86 @@
+
+from collections import defaultdict
+from typing import Dict, List
+from sc2.bot_ai import BotAI
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.unit import Unit
+
+TOWNHALL_TYPES = {
+    UnitTypeId.COMMANDCENTER,
+    UnitTypeId.ORBITALCOMMAND,
+    UnitTypeId.PLANETARYFORTRESS,
+}
+
+
+class GameSnapshot:
+    """
+    Our own units and structures grouped once per step. Built at the top of
+    on_step from a single pass over bot.structures and bot.units, so managers
+    answer counts, readiness, idleness and addon questions with dict lookups
+    instead of re-filtering unit collections. Like the python-sc2 unit data it
+    reflects the observation, not orders issued earlier in the same step.
+    """
+
+    def __init__(self, bot: BotAI):
+        self.bot = bot
+        self.counts: Dict[UnitTypeId, int] = defaultdict(int)
+        self._ready: Dict[UnitTypeId, List[Unit]] = defaultdict(list)
+        self._idle: Dict[UnitTypeId, List[Unit]] = defaultdict(list)
+        # Ready production structures by addon state: "techlab", "reactor" or "none"
+        self.addons: Dict[UnitTypeId, Dict[str, int]] = defaultdict(lambda: {"techlab": 0, "reactor": 0, "none": 0})
+        self.idle_townhalls: List[Unit] = []
+        self._pending: Dict[UnitTypeId, float] = {}
+
+        for structure in bot.structures:
+            type_id = structure.type_id
+            self.counts[type_id] += 1
+            if not structure.is_ready:
+                continue
+            self._ready[type_id].append(structure)
+            idle = structure.is_idle
+            if idle:
+                self._idle[type_id].append(structure)
+                if type_id in TOWNHALL_TYPES:
+                    self.idle_townhalls.append(structure)
+            if structure.add_on_tag:
+                self.addons[type_id]["techlab" if structure.has_techlab else "reactor"] += 1
+            else:
+                self.addons[type_id]["none"] += 1
+
+        for unit in bot.units:
+            self.counts[unit.type_id] += 1
+
+        self.worker_count = self.counts[UnitTypeId.SCV]
+
+    def count(self, type_id: UnitTypeId) -> int:
+        """Units or structures of a type, including those under construction"""
+        return self.counts.get(type_id, 0)
+
+    def ready(self, type_id: UnitTypeId) -> List[Unit]:
+        """Finished structures of a type"""
+        return self._ready.get(type_id, [])
+
+    def ready_count(self, type_id: UnitTypeId) -> int:
+        return len(self._ready.get(type_id, ()))
+
+    def has_ready(self, type_id: UnitTypeId) -> bool:
+        return bool(self._ready.get(type_id))
+
+    def idle(self, type_id: UnitTypeId) -> List[Unit]:
+        """Ready structures of a type with an empty queue"""
+        return self._idle.get(type_id, [])
+
+    def addon_count(self, type_id: UnitTypeId, addon: str) -> int:
+        """Ready structures of a type with the given addon state"""
+        return self.addons[type_id][addon] if type_id in self.addons else 0
+
+    def pending(self, type_id: UnitTypeId) -> float:
+        """bot.already_pending, asked at most once per type per step"""
+        value = self._pending.get(type_id)
+        if value is None:
+            value = self._pending[type_id] = self.bot.already_pending(type_id)
+        return value
+
+    def ordered(self, type_id: UnitTypeId) -> None:
+        """Count an order issued this step as pending, so later managers see it"""
+        self._pending[type_id] = self.pending(type_id) + 1
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The bot modules import their siblings by module name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import profiler
+from profiler import StepProfiler
+
+
+class FakeClock:
+    """perf_counter stand-in that only moves when a fake manager spends time"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def spend(self, ms):
+        self.now += ms / 1000.0
+
+
+class FakeBot:
+    """The parts of BotAI a step touches: game time and a few managers"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.time = 0.0
+        self.step_ms = {}
+
+    async def distribute_workers(self):
+        self.clock.spend(self.step_ms.get("distribute_workers", 1.0))
+
+    def snapshot(self):
+        self.clock.spend(self.step_ms.get("snapshot", 0.5))
+        return "snapshot"
+
+
+def run_step(profiler_, bot, iteration):
+    async def on_step():
+        profiler_.begin_step(iteration, bot.time)
+        assert profiler_.call_sync("snapshot", bot.snapshot) == "snapshot"
+        await profiler_.call("distribute_workers", bot.distribute_workers)
+        profiler_.end_step()
+
+    asyncio.run(on_step())
+
+
+def test_histograms_and_slow_steps(tmp_path):
+    clock = FakeClock()
+    bot = FakeBot(clock)
+    step_profiler = StepProfiler(budget_ms=10.0, clock=clock)
+
+    for iteration in range(100):
+        bot.time = iteration
+        # Every tenth step blows the budget
+        bot.step_ms = {"distribute_workers": 20.0 if iteration % 10 == 0 else 1.0}
+        run_step(step_profiler, bot, iteration)
+
+    summary = step_profiler.report(str(tmp_path / "profile.json"))
+    assert summary["steps"] == 100
+    assert summary["slow_steps"] == 10
+
+    workers = summary["managers"]["distribute_workers"]
+    assert workers["overall"]["count"] == 100
+    # Percentiles are accurate to one 25% bucket
+    assert 1.0 <= workers["overall"]["p50_ms"] <= 1.25
+    assert workers["overall"]["max_ms"] == 20.0
+    # Game times 0..99 s span minutes 0 and 1
+    assert sorted(workers["by_minute"]) == [0, 1]
+    assert summary["managers"]["step"]["overall"]["p95_ms"] >= 20.0
+
+    with open(tmp_path / "profile.json") as f:
+        written = json.load(f)
+    assert written["slow_steps"] == 10
+    assert written["slowest_steps"][0]["calls_ms"] == {"snapshot": 0.5, "distribute_workers": 20.0}
+
+
+def test_slowest_steps_are_kept(monkeypatch):
+    monkeypatch.setattr(profiler, "MAX_SLOW_STEPS", 3)
+    clock = FakeClock()
+    bot = FakeBot(clock)
+    step_profiler = StepProfiler(budget_ms=10.0, clock=clock)
+
+    # Over budget from the start, the slowest steps come last
+    for iteration, ms in enumerate([15, 11, 12, 50, 13, 40, 30]):
+        bot.step_ms = {"distribute_workers": ms}
+        run_step(step_profiler, bot, iteration)
+
+    summary = step_profiler.summary()
+    assert summary["slow_steps"] == 7
+    assert [step["iteration"] for step in summary["slowest_steps"]] == [3, 5, 6]
+    assert [step["total_ms"] for step in summary["slowest_steps"]] == [50.5, 40.5, 30.5]
@@ -5,272 +5,121 @@ SC2 Replay Analyzer Script
 This script parses StarCraft II replay files and extracts game information,
 player statistics, and build orders using sc2reader library.
 
-Usage: python analyze_replay.py <replay_file_path>
+Usage: python analyze_replay.py <replay_file_path> [--index PATH] [--stats PATH] [--sections heatmaps,...]
+                                 [--format json|json-compact|msgpack|cbor] [--compress gzip|zstd] [--coord-digits N]
+                                 [--from SECONDS] [--to SECONDS] [--categories army,building,...]
+                                 [--players 1,2] [--include-types A,B] [--exclude-types A,B] [--drop-events]
+                                 [--path-tolerance TILES] [--map-cache PATH]
 """
 
 import sys
 import json
 import os
+import argparse
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 
 try:
     import sc2reader
 except ImportError:
     print(json.dumps({"error": "sc2reader not installed. Run: pip install sc2reader"}))
     sys.exit(1)
+from sc2reader.engine import GameEngine
+from sc2reader.engine.plugins import ContextLoader, GameHeartNormalizer
 
+from fingerprint import FingerprintIndex, fingerprint_file, fingerprint_replay
+from game_info import extract_game_info
+from unit_catalog import UNIT_CATEGORIES, unit_filter
+from engine_plugins import (ApmPlugin, BuildOrderPlugin, DropEventsPlugin, PlayerStatsPlugin,
+                            SectionsPlugin, SummaryTrackPlugin, TimeSeriesPlugin)
+from heatmaps import HeatmapBuilder
+from unit_lifetimes import UnitLifetimeBuilder
+from army_composition import ArmyCompositionBuilder
+from production import ProductionBuilder
+from trajectories import DEFAULT_TOLERANCE, TrajectoryBuilder
+from map_geometry import MapGeometryBuilder
+from output_formats import ENCODINGS, COMPRESSIONS, check_available, encode_output
 
-def format_timestamp(seconds: int) -> str:
-    """Convert seconds to MM:SS format"""
-    minutes = seconds // 60
-    seconds = seconds % 60
-    return f"{minutes:02d}:{seconds:02d}"
+# Optional sections, computed only when requested with --sections; each
+# builder is fed the tracker events by SectionsPlugin
+OPTIONAL_SECTIONS = {
+    "heatmaps": HeatmapBuilder,
+    "unit_lifetimes": UnitLifetimeBuilder,
+    "army_composition": ArmyCompositionBuilder,
+    "trajectories": TrajectoryBuilder,
+    "production": ProductionBuilder,
+    "map_geometry": MapGeometryBuilder,
+}
 
 
-def extract_time_series(replay) -> List[Dict[str, Any]]:
-    """Extract time series data showing units and buildings positions at 0.1-second intervals"""
-    time_series = []
-    
+def extract_time_series(replay, start: Optional[float] = None, end: Optional[float] = None,
+                        keep_unit: Optional[Callable[[str, int], bool]] = None,
+                        player_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Extract time series data showing units and buildings positions at 0.1-second intervals
+    from an already loaded replay. See TimeSeriesPlugin for start/end, keep_unit and player_ids.
+    """
     if not hasattr(replay, 'tracker_events'):
-        return time_series
-        
-    # Get game duration in seconds with higher precision
-    duration = replay.game_length.total_seconds() if hasattr(replay, 'game_length') else 0
-    
-    # Track active units by ID with position history and velocity
-    active_units = {}  # unit_id -> {type, x, y, control_pid, is_building, last_update, vx, vy}
-    
-    # Initialize snapshots for each 0.1 second (10 FPS)
-    interval = 0.1
-    current_time = 0.0
-    while current_time <= duration:
-        snapshot = {
-            "timestamp": round(current_time, 1),
-            "players": {}
-        }
-        
-        # Initialize player data using control_pid
-        for player in replay.players:
-            if hasattr(player, 'result') and player.result != 'Unknown':
-                snapshot["players"][str(player.pid)] = {
-                    "name": player.name,
-                    "race": player.pick_race if hasattr(player, 'pick_race') else player.play_race,
-                    "team": player.team_id if hasattr(player, 'team_id') else 0,
-                    "units": [],
-                    "buildings": []
-                }
-        
-        time_series.append(snapshot)
-        current_time += interval
-    
-    # Track units created/destroyed at each timestamp using decimal precision
-    unit_changes_by_time = {}  # snapshot_index -> {created: [], destroyed: []}
-    
-    # Process tracker events to build unit lifecycle data
-    for event in replay.tracker_events:
-        if not hasattr(event, 'second'):
-            continue
-            
-        event_time = float(event.second)
-        if event_time < 0 or event_time > duration:
-            continue
-            
-        # Find closest snapshot index
-        snapshot_index = int(event_time / interval)
-        if snapshot_index >= len(time_series):
-            continue
-            
-        if snapshot_index not in unit_changes_by_time:
-            unit_changes_by_time[snapshot_index] = {"created": [], "destroyed": []}
-        
-        # Handle unit creation events
-        if event.name in ['UnitBornEvent', 'UnitInitEvent'] and hasattr(event, 'unit'):
-            if hasattr(event, 'control_pid') and event.control_pid in [1, 2]:
-                unit_name = event.unit.name if hasattr(event.unit, 'name') else "Unknown"
-                if is_game_unit(unit_name):
-                    unit_id = event.unit_id if hasattr(event, 'unit_id') else None
-                    if unit_id:
-                        # Store unit data in active_units
-                        active_units[unit_id] = {
-                            "type": unit_name,
-                            "x": event.x if hasattr(event, 'x') else 0,
-                            "y": event.y if hasattr(event, 'y') else 0,
-                            "control_pid": event.control_pid,
-                            "is_building": is_building(unit_name),
-                            "last_update": event_time,
-                            "vx": 0.0,
-                            "vy": 0.0
-                        }
-                        unit_changes_by_time[snapshot_index]["created"].append(unit_id)
-        
-        # Handle unit death events
-        elif event.name == 'UnitDiedEvent' and hasattr(event, 'unit_id'):
-            unit_id = event.unit_id
-            if unit_id in active_units:
-                unit_changes_by_time[snapshot_index]["destroyed"].append(unit_id)
-        
-        # Handle position update events with velocity calculation
-        elif event.name == 'UnitPositionsEvent' and hasattr(event, 'units'):
-            for unit_obj, (x, y) in event.units.items():
-                # Extract unit ID from unit object
-                unit_id = None
-                if hasattr(unit_obj, 'id'):
-                    unit_id = unit_obj.id
-                elif hasattr(unit_obj, 'unit_id'):
-                    unit_id = unit_obj.unit_id
-                
-                if unit_id and unit_id in active_units:
-                    unit_info = active_units[unit_id]
-                    old_x, old_y = unit_info["x"], unit_info["y"]
-                    time_delta = event_time - unit_info["last_update"]
-                    
-                    # Calculate velocity if enough time has passed
-                    if time_delta > 0.01:  # Avoid division by very small numbers
-                        unit_info["vx"] = (x - old_x) / time_delta
-                        unit_info["vy"] = (y - old_y) / time_delta
-                    
-                    unit_info["x"] = x
-                    unit_info["y"] = y
-                    unit_info["last_update"] = event_time
-    
-    # Build snapshots progressively
-    current_active_units = {}
-    
-    for snapshot_idx, snapshot in enumerate(time_series):
-        # Apply changes for this timestamp
-        if snapshot_idx in unit_changes_by_time:
-            changes = unit_changes_by_time[snapshot_idx]
-            
-            # Add newly created units
-            for unit_id in changes["created"]:
-                if unit_id in active_units:
-                    current_active_units[unit_id] = active_units[unit_id].copy()
-            
-            # Remove destroyed units
-            for unit_id in changes["destroyed"]:
-                if unit_id in current_active_units:
-                    del current_active_units[unit_id]
-        
-        # Populate snapshot with current active units
-        for unit_id, unit_info in current_active_units.items():
-            player_id = str(unit_info["control_pid"])
-            if player_id in snapshot["players"]:
-                unit_data = {
-                    "type": unit_info["type"],
-                    "x": unit_info["x"],
-                    "y": unit_info["y"],
-                    "unit_id": unit_id,
-                    "vx": unit_info.get("vx", 0.0),
-                    "vy": unit_info.get("vy", 0.0)
-                }
-                
-                if unit_info["is_building"]:
-                    snapshot["players"][player_id]["buildings"].append(unit_data)
-                else:
-                    snapshot["players"][player_id]["units"].append(unit_data)
-    
-    return time_series
+        return []
 
+    plugin = TimeSeriesPlugin(start, end, keep_unit, player_ids)
+    plugin.begin(replay)
+    for event in replay.tracker_events:
+        plugin.feed(event)
+        if plugin.done:
+            break
+    return plugin.finish()
 
-def is_game_unit(unit_type: str) -> bool:
-    """Determine if a unit type is a real game unit (not UI elements or map features)"""
-    excluded_prefixes = [
-        'Beacon', 'Mineral', 'Vespene', 'XelNaga', 'Destructible', 
-        'Acceleration', 'Collapsible', 'Purifier', 'Rock'
-    ]
-    
-    return not any(unit_type.startswith(prefix) for prefix in excluded_prefixes)
 
+def extract_summary_track(replay, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, Any]:
+    """Per-second overview counters of every player from an already loaded replay (see SummaryTrackPlugin)"""
+    if not hasattr(replay, 'tracker_events'):
+        return {}
 
-def is_building(unit_type: str) -> bool:
-    """Determine if a unit type is a building"""
-    buildings = {
-        # Terran buildings
-        "CommandCenter", "OrbitalCommand", "PlanetaryFortress", "SupplyDepot", 
-        "Barracks", "Factory", "Starport", "EngineeringBay", "Armory", "Refinery", 
-        "Bunker", "MissileTurret", "SensorTower", "TechLab", "Reactor", "Academy", 
-        "FusionCore", "GhostAcademy",
-        
-        # Protoss buildings
-        "Nexus", "Pylon", "Gateway", "Warpgate", "Assimilator", "Forge", 
-        "PhotonCannon", "CyberneticsCore", "Stargate", "Robotics", "RoboticsBay", 
-        "FleetBeacon", "TemplarArchives", "DarkShrine", "TwilightCouncil", "ShieldBattery",
-        
-        # Zerg buildings
-        "Hatchery", "Lair", "Hive", "Extractor", "SpawningPool", "EvolutionChamber", 
-        "RoachWarren", "BanelingNest", "CreepTumor", "SpineCrawler", "SporeCrawler", 
-        "HydraliskDen", "LurkerDen", "LurkerDenMP", "Infestation", "InfestationPit", 
-        "Spire", "GreaterSpire", "NydusNetwork", "NydusCanal", "UltraliskCavern"
-    }
-    return unit_type in buildings
+    plugin = SummaryTrackPlugin(start, end)
+    plugin.begin(replay)
+    for event in replay.tracker_events:
+        plugin.feed(event)
+        if plugin.done:
+            break
+    return plugin.finish()
 
 
-def extract_build_order(player, max_actions: int = None) -> List[Dict[str, Any]]:
-    """Extract build order from player events"""
-    build_actions = []
-    action_count = 0
-    
-    # Get relevant events from the player
+def extract_build_order(player, max_actions: int = None, start: Optional[float] = None,
+                        end: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Extract build order from player events, optionally only inside [start, end] seconds"""
+    plugin = BuildOrderPlugin(max_actions, start, end)
     for event in player.events:
-        if max_actions and action_count >= max_actions:
-            break
-            
-        action_name = None
-        unit_type = None
-        timestamp = event.second if hasattr(event, 'second') else 0
-        
-        # Check different event types and extract meaningful build actions
-        if hasattr(event, 'unit') and hasattr(event.unit, 'name'):
-            if event.name in ['UnitBornEvent', 'UnitInitEvent']:
-                action_name = f"Build {event.unit.name}"
-                unit_type = event.unit.name
-            elif event.name == 'UnitDoneEvent':
-                action_name = f"Complete {event.unit.name}"
-                unit_type = event.unit.name
-            elif event.name == 'UnitDiedEvent' and hasattr(event, 'killer'):
-                # Skip death events for build order
-                continue
-                
-        elif hasattr(event, 'ability') and hasattr(event.ability, 'name'):
-            ability_name = event.ability.name
-            if 'Train' in ability_name:
-                # Extract unit name from ability (e.g., "TrainMarine" -> "Marine")
-                unit_name = ability_name.replace('Train', '')
-                action_name = f"Train {unit_name}"
-                unit_type = unit_name
-            elif 'Build' in ability_name:
-                # Extract building name from ability (e.g., "BuildSupplyDepot" -> "SupplyDepot")
-                building_name = ability_name.replace('Build', '')
-                action_name = f"Build {building_name}"
-                unit_type = building_name
-            elif 'Research' in ability_name:
-                # Extract research name from ability
-                research_name = ability_name.replace('Research', '')
-                action_name = f"Research {research_name}"
-                unit_type = research_name
-                
-        elif hasattr(event, 'upgrade') and hasattr(event.upgrade, 'name'):
-            if event.name == 'UpgradeCompleteEvent':
-                action_name = f"Upgrade {event.upgrade.name}"
-                unit_type = event.upgrade.name
-        
-        if action_name and timestamp > 0:
-            build_actions.append({
-                "action_name": action_name,
-                "unit_type": unit_type,
-                "timestamp": timestamp,
-                "order_index": action_count + 1,
-                "formatted_time": format_timestamp(timestamp)
-            })
-            action_count += 1
-    
-    return build_actions
+        plugin.feed(player.pid, event)
+    return plugin.build_orders.get(player.pid, [])
 
 
-def analyze_replay(replay_path: str) -> Dict[str, Any]:
+def analyze_replay(replay_path: str, index_path: Optional[str] = None,
+                   sections: Optional[List[str]] = None,
+                   stats_path: Optional[str] = None,
+                   start: Optional[float] = None,
+                   end: Optional[float] = None,
+                   unit_filters: Optional[Dict[str, Any]] = None,
+                   keep_events: bool = True,
+                   section_options: Optional[Dict[str, Dict[str, Any]]] = None,
+                   tracks: bool = True) -> Dict[str, Any]:
     """
     Analyze a single SC2 replay file and return structured data
+
+    When index_path points to a fingerprint index, replays whose game has
+    already been analyzed under another filename are reported as duplicates
+    without being parsed. sections names extra OPTIONAL_SECTIONS to include.
+    When stats_path is given, the replay's rows in that corpus stats table
+    are updated. start/end (seconds) restrict every section to that window:
+    stats are cumulative up to end, APM and build orders count actions
+    inside the window only, and the corpus stats table is left untouched.
+    unit_filters holds unit_catalog.unit_filter arguments (categories,
+    player_ids, include_types, exclude_types) applied to the time series.
+    With keep_events=False the replay's decoded event lists are released as
+    soon as the sections have consumed them. section_options maps a section
+    name to extra keyword arguments for its builder. With tracks=False the
+    time series and summary track are neither built nor returned, for callers
+    that only need player stats and build orders.
     """
     try:
         # Validate input
@@ -289,84 +138,77 @@ def analyze_replay(replay_path: str) -> Dict[str, Any]:
         if file_size < 1024:  # Less than 1KB seems suspicious
             return {"error": "Replay file appears to be corrupted (too small)"}
         
+        # Skip games we've already analyzed under a different filename
+        index = None
+        if index_path:
+            index = FingerprintIndex(index_path)
+            fingerprint = fingerprint_file(replay_path)
+            duplicate_of = index.find_duplicate(fingerprint, os.path.basename(replay_path))
+            if duplicate_of:
+                return {
+                    "success": True,
+                    "duplicate_of": duplicate_of,
+                    "fingerprint": fingerprint,
+                }
+        
+        # Every section runs as an engine plugin during the single pass
+        # sc2reader makes over the events while loading
+        unit_filters = unit_filters or {}
+        stats_plugin = PlayerStatsPlugin(end)
+        apm_plugin = ApmPlugin(start, end)
+        build_order_plugin = BuildOrderPlugin(start=start, end=end)
+        time_series_plugin = TimeSeriesPlugin(start, end, unit_filter(**unit_filters),
+                                              unit_filters.get("player_ids"))
+        summary_plugin = SummaryTrackPlugin(start, end)
+        section_options = section_options or {}
+        sections_plugin = SectionsPlugin({
+            name: OPTIONAL_SECTIONS[name](start=start, end=end, **section_options.get(name, {}))
+            for name in sections or []
+        })
+        plugins = [stats_plugin, apm_plugin, build_order_plugin, sections_plugin]
+        if tracks:
+            plugins += [time_series_plugin, summary_plugin]
+        if not keep_events:
+            plugins.append(DropEventsPlugin())
+        engine = GameEngine(plugins=[GameHeartNormalizer(), ContextLoader()] + plugins)
+        
         # Load replay with tracker events for proper stats extraction
-        replay = sc2reader.load_replay(replay_path, load_level=4)
+        replay = sc2reader.load_replay(replay_path, load_level=4, engine=engine)
         
         if not replay:
             return {"error": "Failed to load replay file - possibly corrupted or unsupported format"}
         
-        # Extract basic game information
-        game_info = {
-            "filename": os.path.basename(replay_path),
-            "map_name": replay.map_name if hasattr(replay, 'map_name') else "Unknown",
-            "game_version": f"{replay.release_string}" if hasattr(replay, 'release_string') else "Unknown",
-            "duration": replay.game_length.total_seconds() if hasattr(replay, 'game_length') else 0,
-            "played_at": int(replay.start_time.timestamp()) if hasattr(replay, 'start_time') else None,
-        }
-        
-        # Initialize player stats tracking from tracker events
-        player_stats_data = {}
+        # The engine turns plugin exceptions into plugin failures instead of raising
+        failed = [name for name in getattr(replay, 'plugin_failures', [])
+                  if name in {plugin.name for plugin in plugins}]
+        if failed:
+            details = replay.plugin_result.get(failed[0], (1, {}))[1]
+            return {"error": f"Error analyzing replay: {failed[0]} failed: {details.get('error', 'unknown error')}"}
         
-        # Process tracker events for accurate resource and army stats
-        if hasattr(replay, 'tracker_events'):
-            for event in replay.tracker_events:
-                # Import the event class for type checking
-                try:
-                    if hasattr(event, 'pid') and event.name == 'PlayerStatsEvent':
-                        pid = event.pid
-                        if pid not in player_stats_data:
-                            player_stats_data[pid] = {
-                                'minerals_collected': 0,
-                                'vespene_collected': 0,
-                                'units_killed_value': 0,
-                                'army_value_max': 0
-                            }
-                        
-                        stats = player_stats_data[pid]
-                        
-                        # Track maximum values over time
-                        if hasattr(event, 'minerals_collection_rate') and hasattr(event, 'second'):
-                            total_mins = event.minerals_collection_rate * event.second / 60 if event.second > 0 else 0
-                            stats['minerals_collected'] = max(stats['minerals_collected'], total_mins)
-                        
-                        if hasattr(event, 'vespene_collection_rate') and hasattr(event, 'second'):
-                            total_vesp = event.vespene_collection_rate * event.second / 60 if event.second > 0 else 0
-                            stats['vespene_collected'] = max(stats['vespene_collected'], total_vesp)
-                        
-                        # Units killed value
-                        if hasattr(event, 'minerals_killed') and hasattr(event, 'vespene_killed'):
-                            killed_value = event.minerals_killed + event.vespene_killed
-                            stats['units_killed_value'] = max(stats['units_killed_value'], killed_value)
-                        
-                        # Army value
-                        if hasattr(event, 'minerals_used_current_army') and hasattr(event, 'vespene_used_current_army'):
-                            army_value = event.minerals_used_current_army + event.vespene_used_current_army
-                            stats['army_value_max'] = max(stats['army_value_max'], army_value)
-                except:
-                    # Skip events that don't match our pattern
-                    pass
-        
-        # Extract time series data for replay visualization
-        time_series = extract_time_series(replay)
+        # Extract basic game information
+        game_info = extract_game_info(replay, replay_path)
+        game_info["fingerprint"] = fingerprint_replay(replay)
+        if start is not None or end is not None:
+            game_info["window"] = {"from": start, "to": end}
         
         # Extract player information
         players_data = []
-        game_minutes = game_info["duration"] / 60 if game_info["duration"] > 0 else 1
+        window_start = start or 0
+        window_end = game_info["duration"] if end is None else min(end, game_info["duration"])
+        game_minutes = (window_end - window_start) / 60 if window_end > window_start else 1
+        windowed = start is not None or end is not None
         
         for player in replay.players:
             # Skip observers
             if not hasattr(player, 'result') or player.result == 'Unknown':
                 continue
                 
-            # Calculate APM from player events
-            apm = 0
-            if hasattr(player, 'events'):
-                # Count Command and Selection events as actions (standard APM calculation)
-                action_events = [e for e in player.events if any(x in type(e).__name__ for x in ['Command', 'Selection'])]
-                apm = int(len(action_events) / game_minutes) if game_minutes > 0 else 0
+            # Count Command and Selection events as actions (standard APM calculation)
+            action_count = apm_plugin.actions.get(player.pid, 0)
+            apm = int(action_count / game_minutes) if game_minutes > 0 else 0
                 
             # Get stats from tracker events
-            player_tracker_stats = player_stats_data.get(player.pid, {
+            player_tracker_stats = stats_plugin.player_stats_data.get(player.pid, {
                 'minerals_collected': 0,
                 'vespene_collected': 0,
                 'units_killed_value': 0,
@@ -385,36 +227,113 @@ def analyze_replay(replay_path: str) -> Dict[str, Any]:
                 "army_value_max": int(player_tracker_stats['army_value_max'])
             }
             
-            # Extract build order
-            build_order = extract_build_order(player)
-            
             players_data.append({
                 "player": player_stats,
-                "build_order": build_order
+                "build_order": build_order_plugin.build_orders.get(player.pid, [])
             })
         
-        return {
+        result = {
             "success": True,
             "game_info": game_info,
             "players": players_data,
-            "time_series": time_series
         }
+        if tracks:
+            result["time_series"] = time_series_plugin.time_series
+            result["summary_track"] = summary_plugin.summary_track
+        result.update(sections_plugin.results)
+        
+        # A window is not the whole game, so it must not replace the replay's corpus rows
+        if stats_path and not windowed:
+            from corpus_stats import CorpusTable, rows_from_analysis
+            table = CorpusTable(stats_path)
+            table.upsert(rows_from_analysis(result))
+            table.save()
+        
+        if index is not None:
+            index.register(game_info["fingerprint"], game_info["filename"])
+            index.save()
+        
+        return result
         
     except Exception as e:
         return {"error": f"Error analyzing replay: {str(e)}"}
 
 
+def parse_list(value: str) -> List[str]:
+    """argparse type for comma-separated names"""
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def parse_categories(value: str) -> List[str]:
+    """argparse type for --categories"""
+    categories = parse_list(value)
+    unknown = [name for name in categories if name not in UNIT_CATEGORIES + ["other"]]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown categor(ies): {', '.join(unknown)}")
+    return categories
+
+
+def parse_sections(value: str) -> List[str]:
+    """argparse type for --sections"""
+    sections = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in sections if name not in OPTIONAL_SECTIONS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown section(s): {', '.join(unknown)}")
+    return sections
+
+
 def main():
     """Main entry point"""
-    if len(sys.argv) != 2:
-        print(json.dumps({"error": "Usage: python analyze_replay.py <replay_file_path>"}))
+    parser = argparse.ArgumentParser(description="Analyze a StarCraft II replay")
+    parser.add_argument("replay_path")
+    parser.add_argument("--index", help="Fingerprint index used to skip already analyzed games")
+    parser.add_argument("--sections", type=parse_sections, default=[],
+                        help=f"Comma-separated optional sections: {', '.join(OPTIONAL_SECTIONS)}")
+    parser.add_argument("--stats", help="Corpus stats table to update with this replay's rows")
+    parser.add_argument("--from", dest="start", type=float, default=None, help="Window start in seconds")
+    parser.add_argument("--to", dest="end", type=float, default=None, help="Window end in seconds")
+    parser.add_argument("--categories", type=parse_categories, default=None,
+                        help=f"Time series unit categories to keep: {', '.join(UNIT_CATEGORIES + ['other'])}")
+    parser.add_argument("--players", type=lambda value: [int(pid) for pid in parse_list(value)], default=None,
+                        help="Comma-separated player IDs to keep in the time series")
+    parser.add_argument("--include-types", type=parse_list, default=None,
+                        help="Unit types always kept in the time series")
+    parser.add_argument("--exclude-types", type=parse_list, default=None,
+                        help="Unit types dropped from the time series")
+    parser.add_argument("--path-tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Trajectory simplification tolerance in map tiles")
+    parser.add_argument("--map-cache", help="Map geometry cache read and extended by the map_geometry section")
+    parser.add_argument("--drop-events", action="store_true",
+                        help="Release the decoded event lists once the sections are computed")
+    parser.add_argument("--format", choices=ENCODINGS, default="json", help="Output encoding")
+    parser.add_argument("--compress", choices=COMPRESSIONS, default="none", help="Output compression")
+    parser.add_argument("--coord-digits", type=int, default=None,
+                        help="Round coordinates and velocities to this many decimals")
+    args = parser.parse_args()
+
+    error = check_available(args.format, args.compress)
+    if error:
+        print(json.dumps({"error": error}))
         sys.exit(1)
     
-    replay_path = sys.argv[1]
-    result = analyze_replay(replay_path)
+    result = analyze_replay(args.replay_path, index_path=args.index, sections=args.sections,
+                            stats_path=args.stats, start=args.start, end=args.end,
+                            unit_filters={
+                                "categories": args.categories,
+                                "player_ids": args.players,
+                                "include_types": args.include_types,
+                                "exclude_types": args.exclude_types,
+                            },
+                            keep_events=not args.drop_events,
+                            section_options={"trajectories": {"tolerance": args.path_tolerance},
+                                             "map_geometry": {"cache_path": args.map_cache}})
     
-    # Output JSON to stdout for Node.js to capture
-    print(json.dumps(result, indent=2))
+    # Output to stdout for Node.js to capture
+    if args.format == "json" and args.compress == "none" and args.coord_digits is None:
+        print(json.dumps(result, indent=2))
+    else:
+        sys.stdout.buffer.write(encode_output(result, args.format, args.compress, args.coord_digits))
+        sys.stdout.buffer.flush()
     
     # Exit with appropriate code
     if "error" in result:
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Army Composition
+
+Builds a dense (time bucket x unit type) count matrix of each player's army
+in one pass over the tracker events. Births, morphs and deaths are written as
++1/-1 deltas into the bucket where they take effect and a cumulative sum over
+time turns the deltas into counts, so row b is the army alive at
+b * bucket_seconds. Supply and resource value curves are the count matrix
+times the unit catalog's per-type supply and cost vectors.
+
+Matrices from many replays are aligned on a shared unit type vocabulary with
+stack_compositions, which makes corpus questions such as "the typical army at
+8:00 in ZvT" a masked mean over one axis.
+
+Usage: python army_composition.py <replay_file_path>... --at SECONDS [--matchup ZvT]
+"""
+
+import sys
+import json
+import argparse
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from compact_arrays import encode_array, decode_array
+from engine_plugins import run_builder
+from unit_catalog import UNIT_STATS, WORKER_TYPES, stats_unit_type
+
+DEFAULT_BUCKET_SECONDS = 10
+
+
+def army_unit_type(unit_type: str) -> Optional[str]:
+    """Catalog name of an army unit in any mode, None for workers and everything else"""
+    name = stats_unit_type(unit_type)
+    return name if name and name not in WORKER_TYPES else None
+
+
+class ArmyCompositionBuilder:
+    """Collects army count deltas one tracker event at a time; see extract_army_composition"""
+
+    def __init__(self, bucket_seconds: int = DEFAULT_BUCKET_SECONDS,
+                 start: Optional[float] = None, end: Optional[float] = None):
+        self.bucket_seconds = bucket_seconds
+        self.start = start
+        self.end = end
+        self.done = False
+
+    def begin(self, replay) -> None:
+        self.pids = [player.pid for player in replay.players
+                     if hasattr(player, 'result') and player.result != 'Unknown']
+        self.player_index = {pid: i for i, pid in enumerate(self.pids)}
+
+        self.unit_types: List[str] = []
+        self.type_index: Dict[str, int] = {}
+        self.units: Dict[int, List[Any]] = {}  # unit_id -> [player index, type column or None]
+        self.pending: Dict[int, str] = {}      # warped-in units counted once they finish
+        self.deltas: List[Tuple[int, int, int, int]] = []  # (player, bucket, column, +1/-1)
+        self.last_second = 0
+
+    def column(self, name: str) -> int:
+        col = self.type_index.get(name)
+        if col is None:
+            col = self.type_index[name] = len(self.unit_types)
+            self.unit_types.append(name)
+        return col
+
+    def feed(self, event) -> None:
+        """Process one tracker event; events must arrive in time order"""
+        name = event.name
+        second = event.second
+        if self.end is not None and second > self.end:
+            self.done = True
+            return
+        # Events at t change the counts sampled at every bucket boundary >= t
+        bucket = -(-second // self.bucket_seconds)
+        self.last_second = second
+        units, deltas = self.units, self.deltas
+
+        if name == 'UnitBornEvent':
+            p_index = self.player_index.get(getattr(event, 'control_pid', None))
+            if p_index is None:
+                return
+            army_type = army_unit_type(event.unit_type_name)
+            col = self.column(army_type) if army_type else None
+            units[event.unit_id] = [p_index, col]
+            if col is not None:
+                deltas.append((p_index, bucket, col, 1))
+
+        elif name == 'UnitInitEvent':
+            p_index = self.player_index.get(getattr(event, 'control_pid', None))
+            if p_index is None:
+                return
+            units[event.unit_id] = [p_index, None]
+            army_type = army_unit_type(event.unit_type_name)
+            if army_type:
+                self.pending[event.unit_id] = army_type
+
+        elif name == 'UnitDoneEvent':
+            army_type = self.pending.pop(event.unit_id, None)
+            unit = units.get(event.unit_id)
+            if army_type and unit is not None:
+                unit[1] = self.column(army_type)
+                deltas.append((unit[0], bucket, unit[1], 1))
+
+        elif name == 'UnitTypeChangeEvent':
+            unit = units.get(event.unit_id)
+            if unit is None:
+                return
+            army_type = army_unit_type(event.unit_type_name)
+            col = self.column(army_type) if army_type else None
+            if col != unit[1]:
+                if unit[1] is not None:
+                    deltas.append((unit[0], bucket, unit[1], -1))
+                if col is not None:
+                    deltas.append((unit[0], bucket, col, 1))
+                unit[1] = col
+
+        elif name == 'UnitDiedEvent':
+            self.pending.pop(event.unit_id, None)
+            unit = units.pop(event.unit_id, None)
+            if unit is not None and unit[1] is not None:
+                deltas.append((unit[0], bucket, unit[1], -1))
+
+    def finish(self) -> Dict[str, Any]:
+        if np is None:
+            return {"error": "numpy not installed. Run: pip install numpy"}
+
+        bucket_seconds = self.bucket_seconds
+        n_buckets = self.last_second // bucket_seconds + 1
+        counts = np.zeros((len(self.pids), n_buckets + 1, len(self.unit_types)), dtype=np.int32)
+        if self.deltas:
+            d = np.asarray(self.deltas, dtype=np.int32)
+            np.add.at(counts, (d[:, 0], d[:, 1], d[:, 2]), d[:, 3])
+        counts = np.cumsum(counts, axis=1)[:, :n_buckets]
+        first_bucket = 0
+        if self.start is not None:
+            first_bucket = min(n_buckets, -(-int(self.start) // bucket_seconds))
+            counts = counts[:, first_bucket:]
+        counts = np.clip(counts, 0, None).astype(np.uint16)
+
+        supply, value = composition_curves(counts, self.unit_types)
+        return {
+            "bucket_seconds": bucket_seconds,
+            "first_bucket": first_bucket,
+            "players": [str(pid) for pid in self.pids],
+            "unit_types": self.unit_types,
+            "counts": encode_array(counts, compress=True),
+            "supply": encode_array(supply),
+            "value": encode_array(value),
+        }
+
+
+def extract_army_composition(replay, bucket_seconds: int = DEFAULT_BUCKET_SECONDS,
+                             start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Per player army count matrix plus supply and value curves. With start/end
+    (seconds) only the buckets inside the window are returned; first_bucket
+    is the index of the first one.
+    """
+    if not hasattr(replay, 'tracker_events'):
+        return {}
+    return run_builder(ArmyCompositionBuilder(bucket_seconds, start, end), replay)
+
+
+def type_vectors(unit_types: List[str]):
+    """Per type supply (float32) and (minerals, gas) cost (int32) vectors"""
+    supply = np.asarray([UNIT_STATS[name][2] for name in unit_types], dtype=np.float32)
+    cost = np.asarray([UNIT_STATS[name][:2] for name in unit_types], dtype=np.int32).reshape(-1, 2)
+    return supply, cost
+
+
+def composition_curves(counts, unit_types: List[str]):
+    """Army supply (players, buckets) and value (players, buckets, [minerals, gas]) from counts"""
+    supply_vector, cost_matrix = type_vectors(unit_types)
+    supply = counts.astype(np.float32) @ supply_vector
+    value = counts.astype(np.int32) @ cost_matrix
+    return supply.astype(np.float32), value.astype(np.int32)
+
+
+def stack_compositions(entries: List[Tuple[Dict[str, Any], int]]) -> Tuple[List[str], Any, Any]:
+    """
+    Align (composition section, player index) pairs from many replays on one
+    unit type vocabulary and bucket axis. Returns the vocabulary, a
+    (games, buckets, types) int32 array padded with zeros and each game's
+    number of valid buckets. All sections must share bucket_seconds; windowed
+    sections are placed at their first_bucket.
+    """
+    vocabulary: List[str] = []
+    index: Dict[str, int] = {}
+    matrices = []
+    for section, player in entries:
+        counts = decode_array(section["counts"])[player]
+        columns = []
+        for name in section["unit_types"]:
+            if name not in index:
+                index[name] = len(vocabulary)
+                vocabulary.append(name)
+            columns.append(index[name])
+        matrices.append((section.get("first_bucket", 0), counts, columns))
+
+    max_buckets = max((first + counts.shape[0] for first, counts, _ in matrices), default=0)
+    stacked = np.zeros((len(matrices), max_buckets, len(vocabulary)), dtype=np.int32)
+    lengths = np.zeros(len(matrices), dtype=np.int32)
+    for i, (first, counts, columns) in enumerate(matrices):
+        stacked[i, first:first + counts.shape[0]][:, columns] = counts
+        lengths[i] = first + counts.shape[0]
+    return vocabulary, stacked, lengths
+
+
+def typical_army(vocabulary: List[str], stacked, lengths, second: int,
+                 bucket_seconds: int = DEFAULT_BUCKET_SECONDS) -> Dict[str, Any]:
+    """Mean army at a game time over the stacked games that lasted that long"""
+    bucket = second // bucket_seconds
+    alive = lengths > bucket
+    games = int(alive.sum())
+    if not games:
+        return {"games": 0, "units": {}, "supply": 0.0}
+    mean = stacked[alive, bucket].mean(axis=0)
+    supply_vector, _ = type_vectors(vocabulary)
+    units = {name: round(float(count), 2) for name, count in zip(vocabulary, mean) if count > 0}
+    return {
+        "games": games,
+        "units": dict(sorted(units.items(), key=lambda item: -item[1])),
+        "supply": round(float(mean @ supply_vector), 1),
+    }
+
+
+def _race_initial(race: str) -> str:
+    return race[:1].upper() if race else "?"
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Typical army composition across replays")
+    parser.add_argument("replays", nargs="+")
+    parser.add_argument("--at", type=int, required=True, help="Game time in seconds")
+    parser.add_argument("--matchup", help="Only players in this matchup, e.g. ZvT")
+    parser.add_argument("--bucket", type=int, default=DEFAULT_BUCKET_SECONDS, help="Bucket size in seconds")
+    args = parser.parse_args()
+
+    if np is None:
+        print(json.dumps({"error": "numpy not installed. Run: pip install numpy"}))
+        sys.exit(1)
+
+    import sc2reader
+
+    entries = []
+    errors = []
+    for replay_path in args.replays:
+        try:
+            replay = sc2reader.load_replay(replay_path, load_level=3)
+        except Exception as e:
+            errors.append({"filename": replay_path, "error": str(e)})
+            continue
+        section = extract_army_composition(replay, args.bucket)
+        races = {str(p.pid): (p.play_race, p.team_id) for p in replay.players}
+        for i, pid in enumerate(section.get("players", [])):
+            race, team = races[pid]
+            opponents = [r for other, (r, t) in races.items() if t != team]
+            matchup = f"{_race_initial(race)}v{_race_initial(opponents[0] if opponents else '')}"
+            if args.matchup is None or matchup.lower() == args.matchup.lower():
+                entries.append((section, i))
+
+    vocabulary, stacked, lengths = stack_compositions(entries)
+    result = typical_army(vocabulary, stacked, lengths, args.at, args.bucket)
+    print(json.dumps({"success": True, "at": args.at, **result, "errors": errors}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
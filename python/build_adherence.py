@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Build Order Adherence
+
+Scores how closely players follow the reference builds the bot plays
+(supply-keyed BuildStep lists such as TERRAN_SAFE_1_1_1 in
+bot/macro/build_order/builds.py). builds.py imports python-sc2, which the
+analyzer doesn't need, so the reference builds are read with ast instead of
+being imported.
+
+Each player's opening (extract_build_order output without worker production,
+plus orbital/fortress morphs from the tracker events) is aligned to a
+reference with a weighted edit distance: a reference step is either matched
+to a later action of the same type, costing up to MATCH_COST by how far the
+player's supply was from the step's, or missed (MISS_COST); off-plan actions
+in between cost EXTRA_COST and actions after the last step are free. Every
+(player, reference) pair of a batch is padded into one array and the DP runs
+one reference step at a time over all pairs at once; within a row the
+left-to-right "extra action" chain is a running minimum (np.minimum.accumulate),
+so there is no Python loop over actions or pairs.
+
+Per matched step the output has the supply delta (player supply at the action
+minus the step's supply) and the time delta (action time minus the time the
+player reached the step's supply).
+
+Usage: python build_adherence.py <replay_file_path>... [--build NAME] [--builds PATH] [--minutes N]
+"""
+
+import sys
+import json
+import os
+import ast
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from unit_catalog import MORPH_TIMES, WORKER_TYPES
+
+DEFAULT_BUILDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   "..", "bot", "macro", "build_order", "builds.py")
+
+# Only actions in the opening are aligned; reference builds end around 50 supply
+DEFAULT_MINUTES = 8
+
+MISS_COST = 1.0          # Reference step the player never did
+EXTRA_COST = 0.25        # Off-plan action before the last matched step
+MATCH_COST = 0.5         # Matching cost at SUPPLY_TOLERANCE or more supply off
+SUPPLY_TOLERANCE = 10.0
+
+# Pairs aligned per kernel call, bounding the (pairs x steps x actions) cost array
+BATCH_PAIRS = 1024
+
+# Generic addon steps match the addon of any production structure
+_GENERIC_ADDONS = ("TECHLAB", "REACTOR")
+
+
+def load_reference_builds(builds_path: str = DEFAULT_BUILDS_PATH) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Every module level list of BuildStep(...) calls in builds.py, by variable
+    name. Plain string actions (decision markers) are left out.
+    """
+    with open(builds_path, 'r') as f:
+        tree = ast.parse(f.read(), filename=builds_path)
+
+    builds = {}
+    for node in tree.body:
+        if not (isinstance(node, ast.Assign) and isinstance(node.value, ast.List)
+                and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)):
+            continue
+        steps = []
+        for element in node.value.elts:
+            if not (isinstance(element, ast.Call) and getattr(element.func, 'id', None) == "BuildStep"):
+                break
+            arguments = list(element.args) + [keyword.value for keyword in element.keywords]
+            if len(arguments) < 2 or not isinstance(arguments[0], ast.Constant):
+                break
+            action = arguments[1]
+            if not isinstance(action, ast.Attribute):
+                continue
+            condition = arguments[2].value if len(arguments) > 2 and isinstance(arguments[2], ast.Constant) else None
+            steps.append({"supply": int(arguments[0].value), "action": action.attr, "condition": condition})
+        else:
+            if steps:
+                builds[node.targets[0].id] = steps
+    return builds
+
+
+def reference_race(build_name: str) -> Optional[str]:
+    """Race named by a build's prefix (TERRAN_SAFE_1_1_1 -> Terran), None if it has none"""
+    race = build_name.split("_", 1)[0].capitalize()
+    return race if race in ("Terran", "Protoss", "Zerg") else None
+
+
+def action_token(unit_type: str) -> str:
+    """Build order unit type in UnitTypeId/UpgradeId spelling (SupplyDepot -> SUPPLYDEPOT)"""
+    return unit_type.upper()
+
+
+def tokens_match(reference: str, action: str) -> bool:
+    """Whether an action fulfils a reference step"""
+    return reference == action or (reference in _GENERIC_ADDONS and action.endswith(reference))
+
+
+def player_openings(replay, minutes: int = DEFAULT_MINUTES) -> List[Dict[str, Any]]:
+    """Opening actions and supply curve of every player in a loaded (level 4) replay"""
+    from analyze_replay import extract_build_order
+
+    cutoff = minutes * 60
+    pids = {player.pid for player in replay.players
+            if hasattr(player, 'result') and player.result != 'Unknown'}
+
+    # Morphs never show up as build order abilities; take them from the tracker
+    supply: Dict[int, List[Tuple[int, float]]] = {pid: [] for pid in pids}
+    morphs: Dict[int, List[Tuple[str, str, int]]] = {pid: [] for pid in pids}
+    units: Dict[int, List[Any]] = {}  # unit_id -> [owner, type name]
+    for event in getattr(replay, 'tracker_events', []):
+        name = event.name
+        if name == 'PlayerStatsEvent':
+            if event.pid in pids:
+                supply[event.pid].append((event.second, event.food_used))
+        elif name in ('UnitBornEvent', 'UnitInitEvent'):
+            units[event.unit_id] = [event.control_pid, event.unit_type_name]
+        elif name == 'UnitTypeChangeEvent':
+            unit = units.get(event.unit_id)
+            if unit is None:
+                continue
+            morph = MORPH_TIMES.get(event.unit_type_name)
+            if morph and unit[1] == "CommandCenter" and unit[0] in pids:
+                morphs[unit[0]].append((f"Morph {event.unit_type_name}", event.unit_type_name,
+                                        max(0, event.second - morph)))
+            unit[1] = event.unit_type_name
+
+    openings = []
+    for player in replay.players:
+        if player.pid not in pids:
+            continue
+        actions = [
+            (action["action_name"], action["unit_type"], action["timestamp"])
+            for action in extract_build_order(player)
+            if not action["action_name"].startswith("Complete") and action["unit_type"] not in WORKER_TYPES
+        ]
+        actions = sorted(actions + morphs[player.pid], key=lambda action: action[2])
+        curve = supply[player.pid] or [(0, 0.0)]
+        openings.append({
+            "pid": player.pid,
+            "player": player.name,
+            "race": player.pick_race if hasattr(player, 'pick_race') else player.play_race,
+            "result": player.result,
+            "actions": [action for action in actions if action[2] <= cutoff],
+            "supply_seconds": [second for second, _ in curve],
+            "supply": [food for _, food in curve],
+        })
+    return openings
+
+
+def replay_openings(replay_path: str, minutes: int = DEFAULT_MINUTES) -> Dict[str, Any]:
+    """Load a replay and extract every player's opening, or an error"""
+    import sc2reader
+
+    try:
+        replay = sc2reader.load_replay(replay_path, load_level=4)
+        return {"filename": os.path.basename(replay_path), "players": player_openings(replay, minutes)}
+    except Exception as e:
+        return {"filename": os.path.basename(replay_path), "error": f"Failed to load replay: {str(e)}"}
+
+
+def align_batch(references: List[List[Dict[str, Any]]], openings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Align references[k] to openings[k] for every k in one vectorized DP and
+    return each pair's step-by-step alignment and summary
+    """
+    pairs = len(references)
+    if not pairs:
+        return []
+    steps = max(max(len(reference) for reference in references), 1)
+    width = max(max(len(opening["actions"]) for opening in openings), 1)
+
+    vocabulary: Dict[str, int] = {}
+
+    def code(token: str) -> int:
+        return vocabulary.setdefault(token, len(vocabulary))
+
+    ref_codes = np.zeros((pairs, steps), dtype=np.int32)
+    ref_supply = np.zeros((pairs, steps))
+    ref_valid = np.zeros((pairs, steps), dtype=bool)
+    act_codes = np.zeros((pairs, width), dtype=np.int32)
+    act_supply = np.zeros((pairs, width))
+    act_valid = np.zeros((pairs, width), dtype=bool)
+    for k, (reference, opening) in enumerate(zip(references, openings)):
+        n, m = len(reference), len(opening["actions"])
+        ref_codes[k, :n] = [code(step["action"]) for step in reference]
+        ref_supply[k, :n] = [step["supply"] for step in reference]
+        ref_valid[k, :n] = True
+        if m:
+            act_codes[k, :m] = [code(action_token(unit_type)) for _, unit_type, _ in opening["actions"]]
+            act_supply[k, :m] = np.interp([second for _, _, second in opening["actions"]],
+                                          opening["supply_seconds"], opening["supply"])
+            act_valid[k, :m] = True
+
+    tokens = list(vocabulary)
+    compatible = np.array([[tokens_match(a, b) for b in tokens] for a in tokens], dtype=bool)
+
+    # Matching cost of step i to action j, infinite where the types differ
+    matches = compatible[ref_codes[:, :, None], act_codes[:, None, :]]
+    matches &= ref_valid[:, :, None] & act_valid[:, None, :]
+    supply_off = np.minimum(np.abs(ref_supply[:, :, None] - act_supply[:, None, :]) / SUPPLY_TOLERANCE, 1.0)
+    match_cost = np.where(matches, MATCH_COST * supply_off, np.inf)
+
+    # Padding steps pass through for free, padding actions are free extras
+    miss_cost = np.where(ref_valid, MISS_COST, 0.0)
+    extra = np.zeros((pairs, width + 1))
+    extra[:, 1:] = np.cumsum(np.where(act_valid, EXTRA_COST, 0.0), axis=1)
+
+    # moves: 0 = match (diagonal), 1 = miss (up), 2 = extra action (left)
+    moves = np.zeros((pairs, steps, width + 1), dtype=np.int8)
+    row = extra.copy()
+    diagonal = np.full((pairs, width + 1), np.inf)
+    for i in range(steps):
+        up = row + miss_cost[:, i, None]
+        diagonal[:, 1:] = row[:, :-1] + match_cost[:, i, :]
+        best = np.minimum(up, diagonal)
+        # D[j] = min_k<=j (best[k] + extra[j] - extra[k])
+        next_row = extra + np.minimum.accumulate(best - extra, axis=1)
+        moves[:, i] = np.where(next_row < best - 1e-9, 2, np.where(diagonal < up, 0, 1))
+        row = next_row
+
+    # Actions after the last step are free: end at the cheapest column
+    ends = np.argmin(row, axis=1)
+    costs = row[np.arange(pairs), ends]
+
+    results = []
+    for k, (reference, opening) in enumerate(zip(references, openings)):
+        i, j = len(reference), int(ends[k])
+        matched: Dict[int, int] = {}
+        while i > 0:
+            move = moves[k, i - 1, j]
+            if move == 0:
+                matched[i - 1] = j - 1
+                i, j = i - 1, j - 1
+            elif move == 1:
+                i -= 1
+            else:
+                j -= 1
+        results.append(_summarize(reference, opening, matched, act_supply[k], int(ends[k]), float(costs[k])))
+    return results
+
+
+def _summarize(reference: List[Dict[str, Any]], opening: Dict[str, Any], matched: Dict[int, int],
+               act_supply, end: int, cost: float) -> Dict[str, Any]:
+    # Time each step's supply was first reached, from the running maximum of the supply curve
+    reached = np.maximum.accumulate(np.asarray(opening["supply"], dtype=np.float64))
+    reach_index = np.searchsorted(reached, [step["supply"] for step in reference], side='left')
+
+    rows = []
+    supply_deltas = []
+    time_deltas = []
+    for i, step in enumerate(reference):
+        row = {"supply": step["supply"], "action": step["action"], "matched": None}
+        j = matched.get(i)
+        if j is not None:
+            action_name, _, second = opening["actions"][j]
+            supply_delta = round(float(act_supply[j]) - step["supply"], 1)
+            row.update(matched=action_name, time=second, supply_delta=supply_delta, time_delta=None)
+            supply_deltas.append(abs(supply_delta))
+            if reach_index[i] < len(reached):
+                row["time_delta"] = second - int(opening["supply_seconds"][reach_index[i]])
+                time_deltas.append(abs(row["time_delta"]))
+        rows.append(row)
+
+    steps = len(reference)
+    return {
+        "score": round(max(0.0, 1.0 - cost / (steps * MISS_COST)), 4) if steps else 0.0,
+        "matched": len(matched),
+        "steps": steps,
+        "extra_actions": end - len(matched),
+        "mean_abs_supply_delta": round(float(np.mean(supply_deltas)), 2) if supply_deltas else None,
+        "mean_abs_time_delta": round(float(np.mean(time_deltas)), 1) if time_deltas else None,
+        "alignment": rows,
+    }
+
+
+def score_openings(replays: List[Dict[str, Any]], builds: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Adherence of every player to every reference build of their race"""
+    pairs = []
+    for replay in replays:
+        for opening in replay.get("players", []):
+            for build_name, reference in builds.items():
+                race = reference_race(build_name)
+                if race is None or race == opening["race"]:
+                    pairs.append((replay["filename"], opening, build_name, reference))
+
+    results = []
+    for first in range(0, len(pairs), BATCH_PAIRS):
+        batch = pairs[first:first + BATCH_PAIRS]
+        aligned = align_batch([pair[3] for pair in batch], [pair[1] for pair in batch])
+        for (filename, opening, build_name, _), alignment in zip(batch, aligned):
+            results.append({
+                "key": f"{filename}#{opening['pid']}",
+                "filename": filename,
+                "player": opening["player"],
+                "race": opening["race"],
+                "result": opening["result"],
+                "build": build_name,
+                **alignment,
+            })
+    return results
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Score build order adherence to reference builds")
+    parser.add_argument("replays", nargs="+")
+    parser.add_argument("--builds", default=DEFAULT_BUILDS_PATH, help="Python file with the reference builds")
+    parser.add_argument("--build", action="append", help="Reference build name (default: every build)")
+    parser.add_argument("--minutes", type=int, default=DEFAULT_MINUTES, help="Length of the opening in minutes")
+    parser.add_argument("--player", help="Only this player name")
+    parser.add_argument("--summary", action="store_true", help="Leave out the step-by-step alignments")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    if np is None:
+        print(json.dumps({"error": "numpy not installed. Run: pip install numpy"}))
+        sys.exit(1)
+
+    try:
+        builds = load_reference_builds(args.builds)
+    except (OSError, SyntaxError) as e:
+        print(json.dumps({"error": f"Failed to read reference builds: {str(e)}"}))
+        sys.exit(1)
+    if args.build:
+        unknown = [name for name in args.build if name not in builds]
+        if unknown:
+            print(json.dumps({"error": f"Unknown build(s): {', '.join(unknown)}", "builds": sorted(builds)}))
+            sys.exit(1)
+        builds = {name: builds[name] for name in args.build}
+
+    workers = args.workers or os.cpu_count() or 1
+    minutes = [args.minutes] * len(args.replays)
+    if workers > 1 and len(args.replays) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            replays = list(pool.map(replay_openings, args.replays, minutes))
+    else:
+        replays = [replay_openings(path, args.minutes) for path in args.replays]
+
+    errors = [replay for replay in replays if "error" in replay]
+    results = score_openings([replay for replay in replays if "error" not in replay], builds)
+    if args.player:
+        results = [result for result in results if result["player"] == args.player]
+    if args.summary:
+        for result in results:
+            del result["alignment"]
+    results.sort(key=lambda result: (result["build"], -result["score"]))
+
+    print(json.dumps({"success": True, "builds": sorted(builds), "results": results, "errors": errors}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
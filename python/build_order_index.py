@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Build Order Similarity Index
+
+Encodes the first N minutes of each player's build order (as produced by
+extract_build_order) as a set of shingles: action n-grams plus actions tagged
+with a coarse time bucket. Each set is summarised by a MinHash signature and
+bucketed with LSH banding, so "find games with this opening" only compares a
+handful of candidates. Candidates are re-ranked with an exact timing-aware
+alignment score.
+
+Usage:
+    python build_order_index.py build <replays_dir> [--index PATH] [--minutes N] [--retry-failed]
+    python build_order_index.py query <replay_file_path> [--player NAME] [-k N]
+"""
+
+import sys
+import json
+import os
+import math
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import sc2reader
+except ImportError:
+    print(json.dumps({"error": "sc2reader not installed. Run: pip install sc2reader"}))
+    sys.exit(1)
+
+from analyze_replay import extract_build_order
+
+INDEX_VERSION = 2
+INDEX_FILENAME = ".build_order_index.json"
+
+DEFAULT_PARAMS = {
+    "minutes": 5,          # Only the opening is indexed
+    "ngram": 3,            # Longest action n-gram used as a shingle
+    "time_bucket": 30,     # Seconds per bucket for timed shingles
+    "num_perm": 64,        # MinHash signature length
+    "bands": 16,           # LSH bands (num_perm / bands rows per band)
+}
+
+# With b bands of r rows, a pair becomes a candidate with probability
+# 1 - (1 - J^r)^b, which crosses 50% near J = (1/b)^(1/r). 16 bands of 4
+# rows put that at J ~ 0.5: openings sharing half their shingles are
+# almost always found, while unrelated ones (J ~ 0.2) rarely collide.
+
+# Worker production dominates every opening and says little about the build
+WORKER_ACTIONS = {"Train SCV", "Train Probe", "Train Drone"}
+
+# Timing tolerance (seconds) of the exact re-rank; actions this far apart count ~37%
+TIMING_TAU = 20.0
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def opening_actions(build_order: List[Dict[str, Any]], minutes: int) -> List[Tuple[str, int]]:
+    """Reduce a build order to (action_name, timestamp) pairs within the opening"""
+    cutoff = minutes * 60
+    return [
+        (action["action_name"], int(action["timestamp"]))
+        for action in build_order
+        if action["timestamp"] <= cutoff and action["action_name"] not in WORKER_ACTIONS
+    ]
+
+
+def shingles(actions: List[Tuple[str, int]], ngram: int, time_bucket: int) -> set:
+    """Encode an action sequence as untimed n-grams plus timed unigrams"""
+    names = [name for name, _ in actions]
+    result = set()
+    for n in range(1, ngram + 1):
+        for i in range(len(names) - n + 1):
+            result.add(">".join(names[i:i + n]))
+    for name, timestamp in actions:
+        result.add(f"{name}@{timestamp // time_bucket}")
+    return result
+
+
+def _permutations(num_perm: int) -> List[Tuple[int, int]]:
+    """Deterministic (a, b) pairs for the universal hash family a*x + b mod p"""
+    perms = []
+    for i in range(num_perm):
+        seed = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(seed[:8], "little") % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(seed[8:], "little") % _MERSENNE_PRIME
+        perms.append((a, b))
+    return perms
+
+
+def minhash(shingle_set: set, perms: List[Tuple[int, int]]) -> List[int]:
+    """MinHash signature of a shingle set"""
+    if not shingle_set:
+        return [_MERSENNE_PRIME] * len(perms)
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little")
+        for s in shingle_set
+    ]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in perms]
+
+
+def timing_similarity(a: List[Tuple[str, int]], b: List[Tuple[str, int]], tau: float = TIMING_TAU) -> float:
+    """
+    Exact timing-aware similarity in [0, 1]: the best order-preserving alignment
+    of identical actions, each match weighted by exp(-|time delta| / tau)
+    """
+    if not a or not b:
+        return 0.0
+    previous = [0.0] * (len(b) + 1)
+    for name_a, time_a in a:
+        current = [0.0] * (len(b) + 1)
+        for j, (name_b, time_b) in enumerate(b, start=1):
+            best = max(previous[j], current[j - 1])
+            if name_a == name_b:
+                best = max(best, previous[j - 1] + math.exp(-abs(time_a - time_b) / tau))
+            current[j] = best
+        previous = current
+    return previous[-1] / max(len(a), len(b))
+
+
+class BuildOrderIndex:
+    """MinHash/LSH index over opening build orders, persisted as JSON"""
+
+    def __init__(self, index_path: str, params: Optional[Dict[str, int]] = None):
+        self.index_path = index_path
+        self.params = dict(DEFAULT_PARAMS)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # Replays that could not be loaded, by filename, with the error
+        self.failed: Dict[str, str] = {}
+
+        try:
+            with open(index_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.params = data["params"]
+                self.entries = data["entries"]
+                self.failed = data.get("failed", {})
+        except (OSError, ValueError):
+            pass
+
+        # A different encoding invalidates every stored signature
+        if params and any(self.params.get(k) != v for k, v in params.items()):
+            self.params.update(params)
+            self.entries = {}
+
+        self._perms = _permutations(self.params["num_perm"])
+        self._rows = self.params["num_perm"] // self.params["bands"]
+        self._buckets: List[Dict[str, List[str]]] = [{} for _ in range(self.params["bands"])]
+        for key, entry in self.entries.items():
+            self._add_to_buckets(key, entry["signature"])
+
+    def _band_keys(self, signature: List[int]) -> List[str]:
+        rows = self._rows
+        return [
+            hashlib.blake2b(repr(signature[i * rows:(i + 1) * rows]).encode(), digest_size=8).hexdigest()
+            for i in range(self.params["bands"])
+        ]
+
+    def _add_to_buckets(self, key: str, signature: List[int]) -> None:
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def encode(self, build_order: List[Dict[str, Any]]) -> Tuple[List[Tuple[str, int]], List[int]]:
+        """Opening actions and MinHash signature for a build order"""
+        actions = opening_actions(build_order, self.params["minutes"])
+        shingle_set = shingles(actions, self.params["ngram"], self.params["time_bucket"])
+        return actions, minhash(shingle_set, self._perms)
+
+    def add(self, key: str, build_order: List[Dict[str, Any]], **metadata) -> None:
+        """Index one player's build order under a unique key"""
+        if key in self.entries:
+            return
+        actions, signature = self.encode(build_order)
+        self.entries[key] = dict(metadata, actions=actions, signature=signature)
+        self._add_to_buckets(key, signature)
+
+    def query(self, build_order: List[Dict[str, Any]], k: int = 10,
+              exclude: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top-k most similar indexed openings for a build order"""
+        actions, signature = self.encode(build_order)
+
+        candidates = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        candidates.discard(exclude)
+
+        results = []
+        for key in candidates:
+            entry = self.entries[key]
+            estimated = sum(x == y for x, y in zip(signature, entry["signature"])) / len(signature)
+            stored_actions = [tuple(action) for action in entry["actions"]]
+            results.append({
+                "key": key,
+                "similarity": round(timing_similarity(actions, stored_actions), 4),
+                "estimated_jaccard": round(estimated, 4),
+                **{name: value for name, value in entry.items() if name not in ("actions", "signature")},
+            })
+
+        results.sort(key=lambda result: result["similarity"], reverse=True)
+        return results[:k]
+
+    def save(self) -> None:
+        """Write the index atomically"""
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": INDEX_VERSION, "params": self.params, "entries": self.entries,
+                       "failed": self.failed},
+                      f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+
+
+def replay_build_orders(replay_path: str) -> List[Dict[str, Any]]:
+    """Load a replay and extract every player's build order with its metadata"""
+    replay = sc2reader.load_replay(replay_path, load_level=4)
+    filename = os.path.basename(replay_path)
+    players = []
+    for player in replay.players:
+        if not hasattr(player, 'result') or player.result == 'Unknown':
+            continue
+        players.append({
+            "key": f"{filename}#{player.pid}",
+            "filename": filename,
+            "map_name": replay.map_name,
+            "player": player.name,
+            "race": player.pick_race if hasattr(player, 'pick_race') else player.play_race,
+            "result": player.result,
+            "build_order": extract_build_order(player),
+        })
+    return players
+
+
+def _safe_replay_build_orders(replay_path: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """replay_build_orders that returns the error instead of raising it"""
+    try:
+        return replay_build_orders(replay_path), None
+    except Exception as e:
+        return [], str(e)
+
+
+def build_index(replays_dir: str, index_path: str, minutes: int, workers: Optional[int] = None,
+                retry_failed: bool = False) -> Dict[str, Any]:
+    """
+    Incrementally add every not yet indexed replay in a directory. Replays
+    that fail to load are recorded in the index and skipped by later builds
+    unless retry_failed is set.
+    """
+    index = BuildOrderIndex(index_path, {"minutes": minutes})
+    if retry_failed:
+        index.failed = {}
+    skipped_files = {entry["filename"] for entry in index.entries.values()} | set(index.failed)
+    paths = [
+        os.path.join(replays_dir, filename)
+        for filename in sorted(os.listdir(replays_dir))
+        if filename.endswith(".SC2Replay") and filename not in skipped_files
+    ]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_safe_replay_build_orders, paths))
+    else:
+        results = [_safe_replay_build_orders(path) for path in paths]
+
+    added = 0
+    failed = {}
+    for path, (players, error) in zip(paths, results):
+        if error is not None:
+            failed[os.path.basename(path)] = error
+            continue
+        added += 1
+        for player in players:
+            build_order = player.pop("build_order")
+            index.add(player.pop("key"), build_order, **player)
+
+    index.failed.update(failed)
+    index.save()
+    return {
+        "success": True,
+        "index_path": index_path,
+        "added": added,
+        "failed": failed,
+        "previously_failed": len(index.failed) - len(failed),
+        "entries": len(index.entries),
+    }
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Build order similarity index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Index every replay in a directory")
+    build_parser.add_argument("replays_dir")
+    build_parser.add_argument("--index")
+    build_parser.add_argument("--minutes", type=int, default=DEFAULT_PARAMS["minutes"])
+    build_parser.add_argument("--workers", type=int)
+    build_parser.add_argument("--retry-failed", action="store_true",
+                              help="Retry replays that failed to load in earlier builds")
+
+    query_parser = subparsers.add_parser("query", help="Find openings similar to a replay's")
+    query_parser.add_argument("replay_path")
+    query_parser.add_argument("--index")
+    query_parser.add_argument("--player", help="Player name or pid (default: every player)")
+    query_parser.add_argument("-k", type=int, default=10)
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index_path = args.index or os.path.join(args.replays_dir, INDEX_FILENAME)
+        print(json.dumps(build_index(args.replays_dir, index_path, args.minutes, args.workers,
+                                     args.retry_failed), indent=2))
+        return
+
+    index_path = args.index or os.path.join(os.path.dirname(os.path.abspath(args.replay_path)), INDEX_FILENAME)
+    index = BuildOrderIndex(index_path)
+    results = []
+    for player in replay_build_orders(args.replay_path):
+        if args.player and args.player not in (player["player"], player["key"].rsplit("#", 1)[1]):
+            continue
+        results.append({
+            "player": player["player"],
+            "similar": index.query(player["build_order"], args.k, exclude=player["key"]),
+        })
+    print(json.dumps({"success": True, "players": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Compact array encoding for analyzer output
+
+Dense numeric sections (heatmaps, count matrices, summary tracks) are emitted
+as little-endian raw buffers in base64 instead of nested JSON lists, which is
+several times smaller and decodes straight into a typed array on either side
+of the pipe (numpy.frombuffer in Python, a TypedArray in the browser).
+"""
+
+import base64
+import zlib
+from typing import Dict, Any
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def encode_array(array, compress: bool = False) -> Dict[str, Any]:
+    """
+    Encode a numpy array as {"dtype", "shape", "data"} with base64 data.
+    Mostly-zero arrays such as heatmaps should set compress to deflate the buffer first.
+    """
+    array = np.ascontiguousarray(array)
+    data = array.astype(array.dtype.newbyteorder("<"), copy=False).tobytes()
+    encoded = {"dtype": array.dtype.name, "shape": list(array.shape)}
+    if compress:
+        data = zlib.compress(data, 6)
+        encoded["compression"] = "zlib"
+    encoded["data"] = base64.b64encode(data).decode("ascii")
+    return encoded
+
+
+def decode_array(encoded: Dict[str, Any]):
+    """Inverse of encode_array"""
+    dtype = np.dtype(encoded["dtype"]).newbyteorder("<")
+    data = base64.b64decode(encoded["data"])
+    if encoded.get("compression") == "zlib":
+        data = zlib.decompress(data)
+    return np.frombuffer(data, dtype=dtype).reshape(encoded["shape"]).astype(dtype.newbyteorder("="))
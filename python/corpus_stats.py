@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Corpus Stats Table
+
+Keeps one typed, columnar table of per-replay, per-player rows (matchup, map,
+result, APM, economy stats, game length, build-order features) in a single
+.npz file. Rows are replaced per replay as replays are (re)analyzed, and the
+query API answers filters and grouped aggregates with vectorized numpy
+operations instead of re-running analyze_replay over the corpus.
+
+String columns are dictionary encoded (int32 codes plus a vocabulary) so
+filters and group-bys compare integers only.
+
+Usage:
+    python corpus_stats.py add <replay_file_path>... [--table PATH]
+    python corpus_stats.py query [--where col=value ...] [--group-by col,...] [--agg col=fn ...]
+
+Example:
+    python corpus_stats.py query --where player=Serral --group-by map --agg win=mean --agg apm=mean --agg apm=max
+"""
+
+import sys
+import json
+import os
+import argparse
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print(json.dumps({"error": "numpy not installed. Run: pip install numpy"}))
+    sys.exit(1)
+
+TABLE_VERSION = 1
+TABLE_FILENAME = ".corpus_stats.npz"
+
+# Column name -> dtype; "str" columns are dictionary encoded
+COLUMNS: Dict[str, str] = {
+    "filename": "str",
+    "fingerprint": "str",
+    "map": "str",
+    "player": "str",
+    "race": "str",
+    "opponent": "str",
+    "opponent_race": "str",
+    "matchup": "str",
+    "win": "int8",             # 1 win, 0 loss, -1 tie/unknown
+    "apm": "int32",
+    "resources_collected": "int32",
+    "units_killed": "int32",
+    "army_value_max": "int32",
+    "duration": "float32",
+    "played_at": "int64",
+    "first_expansion_time": "int32",   # Seconds, -1 if the player never expanded
+    "opening_actions": "int16",        # Non-worker build actions in the first 5 minutes
+}
+
+AGGREGATES = ("count", "sum", "mean", "min", "max")
+
+TOWNHALL_ACTIONS = {"Build CommandCenter", "Build Nexus", "Build Hatchery"}
+WORKER_ACTIONS = {"Train SCV", "Train Probe", "Train Drone"}
+OPENING_SECONDS = 300
+
+
+def _race_initial(race: str) -> str:
+    return race[:1].upper() if race else "?"
+
+
+def rows_from_analysis(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Turn an analyze_replay result into one row per player"""
+    game_info = result["game_info"]
+    players = [entry["player"] for entry in result["players"]]
+    rows = []
+
+    for entry in result["players"]:
+        player = entry["player"]
+        opponents = [other for other in players if other["team"] != player["team"]]
+        opponent = opponents[0] if opponents else {"name": "", "race": ""}
+        build_order = entry.get("build_order", [])
+
+        expansions = [
+            action["timestamp"] for action in build_order
+            if action["action_name"] in TOWNHALL_ACTIONS
+        ]
+        opening = [
+            action for action in build_order
+            if action["timestamp"] <= OPENING_SECONDS and action["action_name"] not in WORKER_ACTIONS
+        ]
+
+        rows.append({
+            "filename": game_info["filename"],
+            "fingerprint": game_info.get("fingerprint", ""),
+            "map": game_info["map_name"],
+            "player": player["name"],
+            "race": player["race"],
+            "opponent": opponent["name"],
+            "opponent_race": opponent["race"],
+            "matchup": f"{_race_initial(player['race'])}v{_race_initial(opponent['race'])}",
+            "win": {"Win": 1, "Loss": 0}.get(player["result"], -1),
+            "apm": player["apm"],
+            "resources_collected": player["resources_collected"],
+            "units_killed": player["units_killed"],
+            "army_value_max": player["army_value_max"],
+            "duration": game_info["duration"],
+            "played_at": game_info.get("played_at") or 0,
+            "first_expansion_time": min(expansions) if expansions else -1,
+            "opening_actions": len(opening),
+        })
+
+    return rows
+
+
+class CorpusTable:
+    """Columnar per-player stats table backed by a single .npz file"""
+
+    def __init__(self, table_path: str):
+        self.table_path = table_path
+        self.codes: Dict[str, Any] = {}
+        self.vocab: Dict[str, List[str]] = {}
+        self.columns: Dict[str, Any] = {}
+
+        loaded = False
+        if os.path.exists(table_path):
+            with np.load(table_path, allow_pickle=False) as data:
+                if int(data["__version__"]) == TABLE_VERSION:
+                    for name, dtype in COLUMNS.items():
+                        if dtype == "str":
+                            self.codes[name] = data[f"{name}__codes"]
+                            self.vocab[name] = data[f"{name}__vocab"].tolist()
+                        else:
+                            self.columns[name] = data[name]
+                    loaded = True
+
+        if not loaded:
+            for name, dtype in COLUMNS.items():
+                if dtype == "str":
+                    self.codes[name] = np.zeros(0, dtype=np.int32)
+                    self.vocab[name] = []
+                else:
+                    self.columns[name] = np.zeros(0, dtype=dtype)
+
+        self._lookup = {name: {value: i for i, value in enumerate(values)} for name, values in self.vocab.items()}
+
+    def __len__(self) -> int:
+        return len(self.codes["filename"])
+
+    def _encode(self, name: str, value: str) -> int:
+        lookup = self._lookup[name]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self.vocab[name])
+            self.vocab[name].append(value)
+        return code
+
+    def upsert(self, rows: List[Dict[str, Any]]) -> None:
+        """Replace all rows of the replays present in rows, then append rows"""
+        if not rows:
+            return
+        filenames = {row["filename"] for row in rows}
+        stale_codes = [self._lookup["filename"][f] for f in filenames if f in self._lookup["filename"]]
+        keep = ~np.isin(self.codes["filename"], stale_codes)
+
+        for name, dtype in COLUMNS.items():
+            if dtype == "str":
+                new = np.fromiter((self._encode(name, str(row[name])) for row in rows), dtype=np.int32, count=len(rows))
+                self.codes[name] = np.concatenate([self.codes[name][keep], new])
+            else:
+                new = np.asarray([row[name] for row in rows], dtype=dtype)
+                self.columns[name] = np.concatenate([self.columns[name][keep], new])
+
+    def save(self) -> None:
+        """Write the table atomically"""
+        arrays = {"__version__": np.asarray(TABLE_VERSION)}
+        for name, dtype in COLUMNS.items():
+            if dtype == "str":
+                arrays[f"{name}__codes"] = self.codes[name]
+                arrays[f"{name}__vocab"] = np.asarray(self.vocab[name], dtype=str)
+            else:
+                arrays[name] = self.columns[name]
+        tmp_path = self.table_path + ".tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, self.table_path)
+
+    def _mask(self, where: Optional[Dict[str, Any]]):
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in (where or {}).items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            if COLUMNS[name] == "str":
+                wanted = [self._lookup[name][v] for v in values if v in self._lookup[name]]
+                mask &= np.isin(self.codes[name], wanted)
+            else:
+                mask &= np.isin(self.columns[name], np.asarray(values, dtype=COLUMNS[name]))
+        return mask
+
+    def query(self, where: Optional[Dict[str, Any]] = None, group_by: Optional[List[str]] = None,
+              agg: Optional[List[Tuple[str, str]]] = None) -> List[Dict[str, Any]]:
+        """
+        Filter rows with where (column -> value or list of values), then group by
+        the given columns (string or numeric) and aggregate numeric columns with (column, fn)
+        pairs, e.g. agg=[("apm", "mean"), ("apm", "max"), ("games", "count")].
+        Each aggregate is output as column_fn (apm_mean), counts under their
+        column name (games). Unknown or tie results (win == -1) are excluded
+        from aggregates over the win column; a group left with no values for
+        an aggregate gets None.
+        """
+        agg = agg or [("games", "count")]
+        group_by = group_by or []
+        mask = self._mask(where)
+
+        # Numeric columns are coded by their distinct values, like the string vocabularies
+        key_columns, labels = [], []
+        for name in group_by:
+            if COLUMNS[name] == "str":
+                key_columns.append(self.codes[name][mask])
+                labels.append(self.vocab[name])
+            else:
+                values, codes = np.unique(self.columns[name][mask], return_inverse=True)
+                key_columns.append(codes.reshape(-1))
+                labels.append(values.tolist())
+
+        if group_by:
+            keys = np.stack(key_columns, axis=1)
+            groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+        else:
+            groups = np.zeros((1, 0), dtype=np.int32)
+            inverse = np.zeros(int(mask.sum()), dtype=np.intp)
+
+        n_groups = len(groups)
+        results = [
+            {name: label[code] for name, label, code in zip(group_by, labels, group)}
+            for group in groups.tolist()
+        ]
+
+        for name, fn in agg:
+            if fn not in AGGREGATES:
+                raise ValueError(f"Unknown aggregate: {fn}")
+            if fn == "count":
+                output_name = name
+                values = np.bincount(inverse, minlength=n_groups)
+            else:
+                output_name = f"{name}_{fn}"
+                column = self.columns[name][mask].astype(np.float64)
+                valid = column >= 0 if name == "win" else np.ones(len(column), dtype=bool)
+                values = _aggregate(column[valid], inverse[valid], n_groups, fn)
+            for row, value in zip(results, values.tolist()):
+                if isinstance(value, float):
+                    # NaN and infinities are not JSON; they only come from empty groups
+                    value = round(value, 4) if np.isfinite(value) else None
+                row[output_name] = value
+
+        return results
+
+
+def _aggregate(column, inverse, n_groups: int, fn: str):
+    """Grouped aggregate of one numeric column"""
+    if fn in ("sum", "mean"):
+        sums = np.bincount(inverse, weights=column, minlength=n_groups)
+        if fn == "sum":
+            return sums
+        counts = np.bincount(inverse, minlength=n_groups)
+        return np.divide(sums, counts, out=np.full(n_groups, np.nan), where=counts > 0)
+    fill = np.inf if fn == "min" else -np.inf
+    values = np.full(n_groups, fill)
+    (np.minimum if fn == "min" else np.maximum).at(values, inverse, column)
+    return values
+
+
+def default_table_path() -> str:
+    """The table lives next to the replays it describes"""
+    return os.path.join("replays", TABLE_FILENAME)
+
+
+def _parse_pairs(pairs: List[str]) -> List[Tuple[str, str]]:
+    result = []
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        if name not in COLUMNS and name != "games":
+            raise SystemExit(json.dumps({"error": f"Unknown column: {name}"}))
+        result.append((name, value))
+    return result
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Corpus-level per-player stats table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="Analyze replays and upsert their rows")
+    add_parser.add_argument("replays", nargs="+")
+    add_parser.add_argument("--table", default=default_table_path())
+
+    query_parser = subparsers.add_parser("query", help="Filter and aggregate the table")
+    query_parser.add_argument("--table", default=default_table_path())
+    query_parser.add_argument("--where", action="append", default=[], help="column=value")
+    query_parser.add_argument("--group-by", default="", help="Comma-separated columns")
+    query_parser.add_argument("--agg", action="append", default=[],
+                              help="column=count|sum|mean|min|max, repeatable, also for the same column")
+
+    args = parser.parse_args()
+    table = CorpusTable(args.table)
+
+    if args.command == "add":
+        from analyze_replay import analyze_replay
+
+        errors = []
+        for replay_path in args.replays:
+            # The table only needs player stats and build orders
+            result = analyze_replay(replay_path, tracks=False)
+            if "error" in result:
+                errors.append({"filename": os.path.basename(replay_path), "error": result["error"]})
+                continue
+            table.upsert(rows_from_analysis(result))
+        table.save()
+        print(json.dumps({"success": True, "rows": len(table), "errors": errors}, indent=2))
+        return
+
+    where = dict(_parse_pairs(args.where))
+    for name, value in where.items():
+        if COLUMNS[name] != "str":
+            where[name] = float(value)
+    group_by = [name for name in args.group_by.split(",") if name]
+    unknown = [name for name in group_by if name not in COLUMNS]
+    if unknown:
+        raise SystemExit(json.dumps({"error": f"Unknown column: {unknown[0]}"}))
+    agg = _parse_pairs(args.agg) or None
+    print(json.dumps({"success": True, "rows": table.query(where, group_by, agg)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,576 @@
+"""
+Analyzer sections as sc2reader engine plugins
+
+Each plugin updates its own compact accumulator while sc2reader's GameEngine
+walks the replay's events once, right after they are decoded, instead of
+analyze_replay traversing replay.tracker_events and every player.events list
+again afterwards. Register them after sc2reader's ContextLoader, which links
+events to players and units.
+
+DropEventsPlugin, registered last, empties the decoded event lists at the end
+of the engine run so they are not held while the result is serialized.
+sc2reader decodes each stream completely before the engine starts, so it
+lowers what is kept after loading, not the decode peak itself.
+
+The optional sections are builders in their own modules (HeatmapBuilder,
+ProductionBuilder, ...) that SectionsPlugin feeds every tracker event during
+the same run. The same plugins and builders are fed by hand by the
+standalone extract_* functions, so there is one implementation of every
+section.
+"""
+
+from typing import Callable, Dict, List, Any, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from compact_arrays import encode_array
+from unit_catalog import is_game_unit, is_building, unit_category, unit_supply
+
+
+def format_timestamp(seconds: int) -> str:
+    """Convert seconds to MM:SS format"""
+    minutes = seconds // 60
+    seconds = seconds % 60
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def is_action_event(event) -> bool:
+    """Command and selection events count towards APM"""
+    return any(x in type(event).__name__ for x in ['Command', 'Selection'])
+
+
+def _event_player(event):
+    # ContextLoader sets event.player on the game and message events it adds to player.events
+    return getattr(event, 'player', None)
+
+
+class PlayerStatsPlugin:
+    """Economy and army maxima per player from PlayerStatsEvent, up to end"""
+
+    name = "AnalyzerPlayerStats"
+
+    def __init__(self, end: Optional[float] = None):
+        self.end = end
+        self.player_stats_data: Dict[int, Dict[str, float]] = {}
+
+    def handlePlayerStatsEvent(self, event, replay):
+        if self.end is not None and event.second > self.end:
+            return
+        self.feed(event)
+
+    def feed(self, event) -> None:
+        try:
+            pid = event.pid
+            if pid not in self.player_stats_data:
+                self.player_stats_data[pid] = {
+                    'minerals_collected': 0,
+                    'vespene_collected': 0,
+                    'units_killed_value': 0,
+                    'army_value_max': 0
+                }
+
+            stats = self.player_stats_data[pid]
+
+            # Track maximum values over time
+            if hasattr(event, 'minerals_collection_rate') and hasattr(event, 'second'):
+                total_mins = event.minerals_collection_rate * event.second / 60 if event.second > 0 else 0
+                stats['minerals_collected'] = max(stats['minerals_collected'], total_mins)
+
+            if hasattr(event, 'vespene_collection_rate') and hasattr(event, 'second'):
+                total_vesp = event.vespene_collection_rate * event.second / 60 if event.second > 0 else 0
+                stats['vespene_collected'] = max(stats['vespene_collected'], total_vesp)
+
+            # Units killed value
+            if hasattr(event, 'minerals_killed') and hasattr(event, 'vespene_killed'):
+                killed_value = event.minerals_killed + event.vespene_killed
+                stats['units_killed_value'] = max(stats['units_killed_value'], killed_value)
+
+            # Army value
+            if hasattr(event, 'minerals_used_current_army') and hasattr(event, 'vespene_used_current_army'):
+                army_value = event.minerals_used_current_army + event.vespene_used_current_army
+                stats['army_value_max'] = max(stats['army_value_max'], army_value)
+        except:
+            # Skip events that don't match our pattern
+            pass
+
+
+class ApmPlugin:
+    """Action counts per player, optionally inside [start, end] seconds only"""
+
+    name = "AnalyzerApm"
+
+    def __init__(self, start: Optional[float] = None, end: Optional[float] = None):
+        self.start = start
+        self.end = end
+        self.actions: Dict[int, int] = {}
+
+    def handleGameEvent(self, event, replay):
+        player = _event_player(event)
+        if player is None or not is_action_event(event):
+            return
+        if (self.start is not None and event.second < self.start) or (self.end is not None and event.second > self.end):
+            return
+        self.actions[player.pid] = self.actions.get(player.pid, 0) + 1
+
+
+def build_action(event):
+    """(action name, unit type, timestamp) of a build order step, or None"""
+    action_name = None
+    unit_type = None
+    timestamp = event.second if hasattr(event, 'second') else 0
+
+    # Check different event types and extract meaningful build actions
+    if hasattr(event, 'unit') and hasattr(event.unit, 'name'):
+        if event.name in ['UnitBornEvent', 'UnitInitEvent']:
+            action_name = f"Build {event.unit.name}"
+            unit_type = event.unit.name
+        elif event.name == 'UnitDoneEvent':
+            action_name = f"Complete {event.unit.name}"
+            unit_type = event.unit.name
+
+    elif hasattr(event, 'ability') and hasattr(event.ability, 'name'):
+        ability_name = event.ability.name
+        if 'Train' in ability_name:
+            # Extract unit name from ability (e.g., "TrainMarine" -> "Marine")
+            unit_name = ability_name.replace('Train', '')
+            action_name = f"Train {unit_name}"
+            unit_type = unit_name
+        elif 'Build' in ability_name:
+            # Extract building name from ability (e.g., "BuildSupplyDepot" -> "SupplyDepot")
+            building_name = ability_name.replace('Build', '')
+            action_name = f"Build {building_name}"
+            unit_type = building_name
+        elif 'Research' in ability_name:
+            # Extract research name from ability
+            research_name = ability_name.replace('Research', '')
+            action_name = f"Research {research_name}"
+            unit_type = research_name
+
+    elif hasattr(event, 'upgrade') and hasattr(event.upgrade, 'name'):
+        if event.name == 'UpgradeCompleteEvent':
+            action_name = f"Upgrade {event.upgrade.name}"
+            unit_type = event.upgrade.name
+
+    if action_name and timestamp > 0:
+        return action_name, unit_type, timestamp
+    return None
+
+
+class BuildOrderPlugin:
+    """Build order per player from the events sc2reader attaches to players"""
+
+    name = "AnalyzerBuildOrder"
+
+    def __init__(self, max_actions: int = None, start: Optional[float] = None, end: Optional[float] = None):
+        self.max_actions = max_actions
+        self.start = start
+        self.end = end
+        self.build_orders: Dict[int, List[Dict[str, Any]]] = {}
+
+    def handleGameEvent(self, event, replay):
+        player = _event_player(event)
+        if player is not None:
+            self.feed(player.pid, event)
+
+    def handleMessageEvent(self, event, replay):
+        self.handleGameEvent(event, replay)
+
+    def feed(self, pid: int, event) -> None:
+        build_actions = self.build_orders.setdefault(pid, [])
+        if self.max_actions and len(build_actions) >= self.max_actions:
+            return
+        timestamp = event.second if hasattr(event, 'second') else 0
+        if (self.start is not None and timestamp < self.start) or (self.end is not None and timestamp > self.end):
+            return
+
+        action = build_action(event)
+        if action:
+            action_name, unit_type, timestamp = action
+            build_actions.append({
+                "action_name": action_name,
+                "unit_type": unit_type,
+                "timestamp": timestamp,
+                "order_index": len(build_actions) + 1,
+                "formatted_time": format_timestamp(timestamp)
+            })
+
+
+class TimeSeriesPlugin:
+    """
+    Unit and building positions at 0.1-second intervals. With start/end
+    (seconds) only frames inside the window are built; earlier events only
+    rebuild the units alive at start, and events after end are ignored (done
+    turns True so hand-fed loops can stop). keep_unit (see
+    unit_catalog.unit_filter) drops units before the frames are filled, so
+    filtered units cost nothing per frame; player_ids limits the players
+    listed in each frame. Units are typed by their final unit type, as
+    sc2reader names them once the whole replay is loaded.
+    """
+
+    name = "AnalyzerTimeSeries"
+    interval = 0.1
+
+    def __init__(self, start: Optional[float] = None, end: Optional[float] = None,
+                 keep_unit: Optional[Callable[[str, int], bool]] = None,
+                 player_ids: Optional[List[int]] = None):
+        self.start = start
+        self.end = end
+        self.keep_unit = keep_unit
+        self.player_ids = player_ids
+        self.time_series: List[Dict[str, Any]] = []
+        self.done = False
+
+    def handleInitGame(self, event, replay):
+        self.begin(replay)
+
+    def handleTrackerEvent(self, event, replay):
+        if not self.done:
+            self.feed(event)
+
+    def handleEndGame(self, event, replay):
+        self.finish()
+
+    def begin(self, replay) -> None:
+        # Get game duration in seconds with higher precision
+        duration = replay.game_length.total_seconds() if hasattr(replay, 'game_length') else 0
+
+        # Track active units by ID with position history and velocity
+        self.active_units = {}  # unit_id -> {type, x, y, control_pid, is_building, last_update, vx, vy}
+        # Track units created/destroyed at each timestamp using decimal precision
+        self.unit_changes_by_time = {}  # snapshot_index -> {created: [], destroyed: []}
+
+        self.last_time = duration if self.end is None else min(duration, self.end)
+        listed_players = set(self.player_ids) if self.player_ids is not None else {p.pid for p in replay.players}
+
+        # Initialize snapshots for each 0.1 second (10 FPS)
+        interval = self.interval
+        current_time = 0.0
+        self.first_index = 0  # Frames skipped before the window
+        while current_time <= self.last_time:
+            if self.start is not None and current_time < self.start - 1e-9:
+                self.first_index += 1
+                current_time += interval
+                continue
+
+            snapshot = {
+                "timestamp": round(current_time, 1),
+                "players": {}
+            }
+
+            # Initialize player data using control_pid
+            for player in replay.players:
+                if hasattr(player, 'result') and player.result != 'Unknown' and player.pid in listed_players:
+                    snapshot["players"][str(player.pid)] = {
+                        "name": player.name,
+                        "race": player.pick_race if hasattr(player, 'pick_race') else player.play_race,
+                        "team": player.team_id if hasattr(player, 'team_id') else 0,
+                        "units": [],
+                        "buildings": []
+                    }
+
+            self.time_series.append(snapshot)
+            current_time += interval
+
+    def feed(self, event) -> None:
+        """Process one tracker event; events must arrive in time order"""
+        if not hasattr(event, 'second'):
+            return
+
+        event_time = float(event.second)
+        if event_time > self.last_time:
+            # Tracker events are in time order, nothing later can land in a frame
+            self.done = True
+            return
+        if event_time < 0:
+            return
+
+        # Find closest snapshot index; changes before the window apply to its first frame
+        snapshot_index = max(0, int(event_time / self.interval) - self.first_index)
+        if snapshot_index >= len(self.time_series):
+            return
+
+        active_units = self.active_units
+        if snapshot_index not in self.unit_changes_by_time:
+            self.unit_changes_by_time[snapshot_index] = {"created": [], "destroyed": []}
+
+        # Handle unit creation events
+        if event.name in ['UnitBornEvent', 'UnitInitEvent'] and hasattr(event, 'unit'):
+            if hasattr(event, 'control_pid') and event.control_pid in [1, 2]:
+                unit_id = event.unit_id if hasattr(event, 'unit_id') else None
+                if unit_id:
+                    # Type checks wait for finish: units are listed under their final type
+                    active_units[unit_id] = {
+                        "unit": event.unit,
+                        "x": event.x if hasattr(event, 'x') else 0,
+                        "y": event.y if hasattr(event, 'y') else 0,
+                        "control_pid": event.control_pid,
+                        "last_update": event_time,
+                        "vx": 0.0,
+                        "vy": 0.0
+                    }
+                    self.unit_changes_by_time[snapshot_index]["created"].append(unit_id)
+
+        # Handle unit death events
+        elif event.name == 'UnitDiedEvent' and hasattr(event, 'unit_id'):
+            unit_id = event.unit_id
+            if unit_id in active_units:
+                self.unit_changes_by_time[snapshot_index]["destroyed"].append(unit_id)
+
+        # Handle position update events with velocity calculation
+        elif event.name == 'UnitPositionsEvent' and hasattr(event, 'units'):
+            for unit_obj, (x, y) in event.units.items():
+                # Extract unit ID from unit object
+                unit_id = None
+                if hasattr(unit_obj, 'id'):
+                    unit_id = unit_obj.id
+                elif hasattr(unit_obj, 'unit_id'):
+                    unit_id = unit_obj.unit_id
+
+                if unit_id and unit_id in active_units:
+                    unit_info = active_units[unit_id]
+                    old_x, old_y = unit_info["x"], unit_info["y"]
+                    time_delta = event_time - unit_info["last_update"]
+
+                    # Calculate velocity if enough time has passed
+                    if time_delta > 0.01:  # Avoid division by very small numbers
+                        unit_info["vx"] = (x - old_x) / time_delta
+                        unit_info["vy"] = (y - old_y) / time_delta
+
+                    unit_info["x"] = x
+                    unit_info["y"] = y
+                    unit_info["last_update"] = event_time
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Fill every frame with the units alive at its timestamp"""
+        active_units = {}
+        for unit_id, unit_info in self.active_units.items():
+            # sc2reader renames unit objects as they morph, so by now this is the final type
+            unit_name = getattr(unit_info.pop("unit"), 'name', None) or "Unknown"
+            if is_game_unit(unit_name) and (self.keep_unit is None or self.keep_unit(unit_name, unit_info["control_pid"])):
+                unit_info["type"] = unit_name
+                unit_info["is_building"] = is_building(unit_name)
+                active_units[unit_id] = unit_info
+        current_active_units = {}
+
+        for snapshot_idx, snapshot in enumerate(self.time_series):
+            # Apply changes for this timestamp
+            if snapshot_idx in self.unit_changes_by_time:
+                changes = self.unit_changes_by_time[snapshot_idx]
+
+                # Add newly created units
+                for unit_id in changes["created"]:
+                    if unit_id in active_units:
+                        current_active_units[unit_id] = active_units[unit_id].copy()
+
+                # Remove destroyed units
+                for unit_id in changes["destroyed"]:
+                    if unit_id in current_active_units:
+                        del current_active_units[unit_id]
+
+            # Populate snapshot with current active units
+            for unit_id, unit_info in current_active_units.items():
+                player_id = str(unit_info["control_pid"])
+                if player_id in snapshot["players"]:
+                    unit_data = {
+                        "type": unit_info["type"],
+                        "x": unit_info["x"],
+                        "y": unit_info["y"],
+                        "unit_id": unit_id,
+                        "vx": unit_info.get("vx", 0.0),
+                        "vy": unit_info.get("vy", 0.0)
+                    }
+
+                    if unit_info["is_building"]:
+                        snapshot["players"][player_id]["buildings"].append(unit_data)
+                    else:
+                        snapshot["players"][player_id]["units"].append(unit_data)
+
+        self.active_units = {}
+        self.unit_changes_by_time = {}
+        return self.time_series
+
+
+class SummaryTrackPlugin:
+    """
+    Low-resolution overview of the game for the timeline: one row per second
+    and player of COLUMNS, as a compressed uint16 array of a few
+    kilobytes that the viewer can draw before it fetches any frames.
+
+    Unit counts and army supply follow births, morphs and deaths to the
+    second; deaths counts the player's units lost in that second; supply and
+    resources are the latest PlayerStatsEvent values (sampled every 10 s).
+    Supply is rounded up like the in-game counter. With start/end (seconds)
+    only the rows inside the window are returned; first_second is the first
+    row's game time.
+    """
+
+    name = "AnalyzerSummaryTrack"
+
+    # Counters kept per second, in output column order
+    COLUMNS = ["workers", "army", "buildings", "army_supply", "deaths",
+               "supply_used", "supply_made", "minerals", "vespene", "minerals_rate", "vespene_rate"]
+    _UNIT_COLUMNS = {"worker": 0, "army": 1, "building": 2}
+    _STATS_FIELDS = ["food_used", "food_made", "minerals_current", "vespene_current",
+                     "minerals_collection_rate", "vespene_collection_rate"]
+
+    def __init__(self, start: Optional[float] = None, end: Optional[float] = None):
+        self.start = start
+        self.end = end
+        self.summary_track: Dict[str, Any] = {}
+        self.done = False
+
+    def handleInitGame(self, event, replay):
+        self.begin(replay)
+
+    def handleTrackerEvent(self, event, replay):
+        if not self.done:
+            self.feed(event)
+
+    def handleEndGame(self, event, replay):
+        self.finish()
+
+    def begin(self, replay) -> None:
+        duration = replay.game_length.total_seconds() if hasattr(replay, 'game_length') else 0
+        self.last_second = int(duration if self.end is None else min(duration, self.end))
+        self.players = [player.pid for player in replay.players
+                        if hasattr(player, 'result') and player.result != 'Unknown']
+        self.player_index = {pid: i for i, pid in enumerate(self.players)}
+        self.units: Dict[int, List[Any]] = {}  # unit_id -> [player index, unit column or None, half supply]
+        # (second, player index, column, delta) of the unit counters, army supply in half supply
+        self.deltas: List[tuple] = []
+        # (second, player index, stats values)
+        self.stats: List[tuple] = []
+
+    def _unit_state(self, unit_type: str):
+        column = self._UNIT_COLUMNS.get(unit_category(unit_type)) if is_game_unit(unit_type) else None
+        return column, int(unit_supply(unit_type) * 2) if column == 1 else 0
+
+    def _add(self, second: int, unit: List[Any], sign: int) -> None:
+        if unit[1] is not None:
+            self.deltas.append((second, unit[0], unit[1], sign))
+        if unit[2]:
+            self.deltas.append((second, unit[0], 3, sign * unit[2]))
+
+    def feed(self, event) -> None:
+        """Process one tracker event; events must arrive in time order"""
+        second = event.second
+        if second > self.last_second:
+            self.done = True
+            return
+
+        name = event.name
+        if name in ('UnitBornEvent', 'UnitInitEvent'):
+            index = self.player_index.get(event.control_pid)
+            if index is None:
+                return
+            unit = [index, *self._unit_state(event.unit_type_name)]
+            self.units[event.unit_id] = unit
+            self._add(second, unit, 1)
+        elif name == 'UnitTypeChangeEvent':
+            unit = self.units.get(event.unit_id)
+            if unit is not None:
+                self._add(second, unit, -1)
+                unit[1:] = self._unit_state(event.unit_type_name)
+                self._add(second, unit, 1)
+        elif name == 'UnitDiedEvent':
+            unit = self.units.pop(event.unit_id, None)
+            if unit is not None:
+                self._add(second, unit, -1)
+                if unit[1] is not None:
+                    self.deltas.append((second, unit[0], 4, 1))
+        elif name == 'PlayerStatsEvent':
+            index = self.player_index.get(event.pid)
+            if index is not None:
+                self.stats.append((second, index, [getattr(event, field, 0) for field in self._STATS_FIELDS]))
+
+    def finish(self) -> Dict[str, Any]:
+        """Accumulate the counters into the per-second array"""
+        if np is None:
+            self.summary_track = {"error": "numpy not installed. Run: pip install numpy"}
+            return self.summary_track
+
+        seconds = self.last_second + 1
+        values = np.zeros((len(self.players), seconds, len(self.COLUMNS)), dtype=np.int64)
+        if self.deltas:
+            second, index, column, delta = np.array(self.deltas, dtype=np.int64).T
+            np.add.at(values, (index, second, column), delta)
+        # Deaths are per second, everything else before them is a running total
+        values[:, :, :4] = np.cumsum(values[:, :, :4], axis=1)
+        values[:, :, 3] = (values[:, :, 3] + 1) // 2
+
+        # Stats are sampled: each second takes the latest sample at or before it
+        for index in range(len(self.players)):
+            samples = [(second, row) for second, i, row in self.stats if i == index]
+            if not samples:
+                continue
+            sample_seconds = np.array([second for second, _ in samples])
+            rows = np.ceil(np.array([row for _, row in samples], dtype=np.float64))
+            latest = np.searchsorted(sample_seconds, np.arange(seconds), side='right') - 1
+            values[index, :, 5:] = np.where(latest[:, None] >= 0, rows[np.maximum(latest, 0)], 0)
+
+        first_second = max(0, int(self.start)) if self.start is not None else 0
+        values = np.clip(values[:, first_second:], 0, np.iinfo(np.uint16).max).astype(np.uint16)
+        self.summary_track = {
+            "players": [str(pid) for pid in self.players],
+            "columns": self.COLUMNS,
+            "first_second": first_second,
+            "values": encode_array(values, compress=True),
+        }
+        self.units = {}
+        self.deltas = []
+        self.stats = []
+        return self.summary_track
+
+
+def run_builder(builder, replay) -> Dict[str, Any]:
+    """Feed a section builder a loaded replay's tracker events by hand and return its section"""
+    builder.begin(replay)
+    for event in replay.tracker_events:
+        builder.feed(event)
+        if builder.done:
+            break
+    return builder.finish()
+
+
+class SectionsPlugin:
+    """
+    Feeds the optional sections' builders every tracker event during the
+    engine run. A builder has begin(replay), feed(event), a done flag set
+    once it needs no more events, and finish() returning its section.
+    """
+
+    name = "AnalyzerSections"
+
+    def __init__(self, builders: Dict[str, Any]):
+        self.builders = builders
+        self.results: Dict[str, Any] = {}
+
+    def handleInitGame(self, event, replay):
+        for builder in self.builders.values():
+            builder.begin(replay)
+
+    def handleTrackerEvent(self, event, replay):
+        for builder in self.builders.values():
+            if not builder.done:
+                builder.feed(event)
+
+    def handleEndGame(self, event, replay):
+        for name, builder in self.builders.items():
+            self.results[name] = builder.finish()
+
+
+class DropEventsPlugin:
+    """Releases the decoded event lists once the other plugins are done with them"""
+
+    name = "AnalyzerDropEvents"
+
+    def handleEndGame(self, event, replay):
+        replay.events = []
+        replay.tracker_events = []
+        replay.game_events = []
+        replay.message_events = []
+        for player in replay.entities:
+            player.events = []
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+SC2 Replay Fingerprinting
+
+Computes a cheap, stable fingerprint for a replay from header fields, player
+toons, the game's random seed and a prefix of the raw tracker event stream.
+The same game saved under different filenames produces the same fingerprint,
+and nothing beyond the replay details needs to be decoded.
+
+A fingerprint index (fingerprint -> filename of the already analyzed copy)
+lets the analyzer recognise re-uploads and skip parsing, analysis and storage.
+
+Usage: python fingerprint.py <replay_file_path>... [--index PATH] [--register]
+"""
+
+import sys
+import json
+import os
+import hashlib
+import argparse
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+try:
+    import sc2reader
+except ImportError:
+    print(json.dumps({"error": "sc2reader not installed. Run: pip install sc2reader"}))
+    sys.exit(1)
+
+FINGERPRINT_VERSION = 1
+INDEX_FILENAME = ".fingerprint_index.json"
+
+# Roughly the first few hundred tracker events: initial unit births and the
+# first player stats ticks, which are identical for every copy of a game
+TRACKER_PREFIX_BYTES = 16384
+
+
+def _player_toons(replay) -> list:
+    """Toon handles of the actual players, read straight from replay.details"""
+    details = replay.raw_data.get("replay.details") or replay.raw_data.get("replay.details.backup") or {}
+    toons = []
+    for player in details.get("players", []):
+        bnet = player.get("bnet", {})
+        toons.append(f"{bnet.get('region', 0)}-S2-{bnet.get('subregion', 0)}-{bnet.get('uid', 0)}")
+    return sorted(toons)
+
+
+def _random_seed(replay) -> int:
+    """The lobby random seed, shared by every client in the game"""
+    init_data = replay.raw_data.get("replay.initData") or replay.raw_data.get("replay.initData.backup") or {}
+    return init_data.get("game_description", {}).get("random_value", 0)
+
+
+def fingerprint_replay(replay) -> str:
+    """Fingerprint an already loaded replay (load_level >= 1)"""
+    digest = hashlib.sha1()
+    digest.update(f"v{FINGERPRINT_VERSION}|{replay.base_build}|{replay.frames}|".encode())
+    digest.update(f"{getattr(replay, 'map_hash', '')}|{_random_seed(replay)}|".encode())
+    digest.update(",".join(_player_toons(replay)).encode())
+
+    # Hash the raw (decompressed but undecoded) tracker stream prefix
+    tracker_data = replay.archive.read_file("replay.tracker.events") or b""
+    digest.update(tracker_data[:TRACKER_PREFIX_BYTES])
+
+    return digest.hexdigest()
+
+
+def fingerprint_file(replay_path: str) -> str:
+    """Fingerprint a replay file without decoding any event stream"""
+    replay = sc2reader.load_replay(replay_path, load_level=1, engine=None)
+    return fingerprint_replay(replay)
+
+
+class FingerprintIndex:
+    """Persistent mapping of replay fingerprints to the analyzed replay's filename"""
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(index_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == FINGERPRINT_VERSION:
+                self.entries = data.get("fingerprints", {})
+        except (OSError, ValueError):
+            pass
+
+    def lookup(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the existing entry for a fingerprint, if any"""
+        return self.entries.get(fingerprint)
+
+    def find_duplicate(self, fingerprint: str, filename: str) -> Optional[str]:
+        """Return the filename of an earlier copy of this game, if it differs from filename"""
+        entry = self.lookup(fingerprint)
+        if entry and entry["filename"] != filename:
+            return entry["filename"]
+        return None
+
+    def register(self, fingerprint: str, filename: str) -> None:
+        """Record a fingerprint; the first filename registered for a game wins"""
+        if fingerprint not in self.entries:
+            self.entries[fingerprint] = {
+                "filename": filename,
+                "registered_at": int(datetime.now().timestamp()),
+            }
+
+    def save(self) -> None:
+        """Write the index atomically"""
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": FINGERPRINT_VERSION, "fingerprints": self.entries}, f, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+
+def default_index_path(replay_path: str) -> str:
+    """The index lives next to the replays it describes"""
+    return os.path.join(os.path.dirname(os.path.abspath(replay_path)), INDEX_FILENAME)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Fingerprint replays and detect duplicates")
+    parser.add_argument("replays", nargs="+")
+    parser.add_argument("--index", help=f"Fingerprint index path (default: {INDEX_FILENAME} next to the replays)")
+    parser.add_argument("--register", action="store_true", help="Add non-duplicate replays to the index")
+    args = parser.parse_args()
+
+    index = FingerprintIndex(args.index or default_index_path(args.replays[0]))
+    results = []
+
+    for replay_path in args.replays:
+        filename = os.path.basename(replay_path)
+        try:
+            fingerprint = fingerprint_file(replay_path)
+        except Exception as e:
+            results.append({"filename": filename, "error": f"Error fingerprinting replay: {str(e)}"})
+            continue
+
+        duplicate_of = index.find_duplicate(fingerprint, filename)
+        if args.register and not duplicate_of:
+            index.register(fingerprint, filename)
+
+        results.append({"filename": filename, "fingerprint": fingerprint, "duplicate_of": duplicate_of})
+
+    if args.register:
+        index.save()
+
+    print(json.dumps({"success": True, "replays": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
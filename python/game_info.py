@@ -0,0 +1,21 @@
+"""
+Replay Game Info
+
+Basic game information shared by the analyzer and the directory scanner. It
+lives apart from analyze_replay so the scanner does not import the engine
+plugins and numpy just for it.
+"""
+
+import os
+from typing import Dict, Any
+
+
+def extract_game_info(replay, replay_path: str) -> Dict[str, Any]:
+    """Extract basic game information (available from load_level=1 onwards)"""
+    return {
+        "filename": os.path.basename(replay_path),
+        "map_name": replay.map_name if hasattr(replay, 'map_name') else "Unknown",
+        "game_version": f"{replay.release_string}" if hasattr(replay, 'release_string') else "Unknown",
+        "duration": replay.game_length.total_seconds() if hasattr(replay, 'game_length') else 0,
+        "played_at": int(replay.start_time.timestamp()) if hasattr(replay, 'start_time') else None,
+    }
@@ -0,0 +1,193 @@
+"""
+Position Heatmaps
+
+Bins every sampled unit position (births, periodic UnitPositionsEvent samples)
+and every death location into 2D histograms per player, unit category and
+game phase. Samples are collected by HeatmapBuilder as the tracker events
+are fed to it and binned with one numpy bincount, so a full game costs tens
+of milliseconds.
+
+Grids are uint16 at map resolution (one cell per map tile by default) and are
+summed across replays of the same map with sum_heatmaps for corpus views;
+sum_heatmaps reports the replays it left out because their grids differ in shape.
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from compact_arrays import encode_array, decode_array
+from engine_plugins import run_builder
+from unit_catalog import UNIT_CATEGORIES, is_game_unit, unit_category
+
+# Game phases as (name, start second); each phase runs until the next one starts
+PHASES: List[Tuple[str, int]] = [("early", 0), ("mid", 360), ("late", 720)]
+
+# One layer per unit category plus a layer of death locations (where fighting happened)
+LAYERS: List[str] = UNIT_CATEGORIES + ["deaths"]
+
+UINT16_MAX = 65535
+
+
+def map_size(replay) -> Tuple[int, int]:
+    """Playable map dimensions in tiles, from the replay's initData"""
+    init_data = replay.raw_data.get("replay.initData") or replay.raw_data.get("replay.initData.backup") or {}
+    description = init_data.get("game_description", {})
+    return description.get("map_size_x", 256) or 256, description.get("map_size_y", 256) or 256
+
+
+class HeatmapBuilder:
+    """
+    Collects position samples one tracker event at a time; finish() bins
+    them. See extract_heatmaps for cell_size and start/end.
+    """
+
+    def __init__(self, cell_size: int = 1, start: Optional[float] = None, end: Optional[float] = None):
+        self.cell_size = cell_size
+        self.start = start
+        self.end = end
+        self.done = False
+
+    def begin(self, replay) -> None:
+        self.pids = [player.pid for player in replay.players
+                     if hasattr(player, 'result') and player.result != 'Unknown']
+        self.player_index = {pid: i for i, pid in enumerate(self.pids)}
+        self.layer_index = {layer: i for i, layer in enumerate(LAYERS)}
+        self.map_size = map_size(replay)
+
+        self.owners: Dict[int, List[int]] = {}  # unit_id -> [player index, layer index]
+        self.xs: List[int] = []
+        self.ys: List[int] = []
+        self.seconds: List[int] = []
+        self.sample_players: List[int] = []
+        self.sample_layers: List[int] = []
+
+    def _sample(self, x: int, y: int, second: int, p_index: int, layer: int) -> None:
+        self.xs.append(x)
+        self.ys.append(y)
+        self.seconds.append(second)
+        self.sample_players.append(p_index)
+        self.sample_layers.append(layer)
+
+    def feed(self, event) -> None:
+        """Process one tracker event; events must arrive in time order"""
+        name = event.name
+        if self.end is not None and event.second > self.end:
+            self.done = True
+            return
+
+        if name == 'UnitPositionsEvent':
+            second = event.second
+            owners = self.owners
+            for unit, (x, y) in event.units.items():
+                owner = owners.get(unit.id)
+                if owner is not None:
+                    self._sample(x, y, second, owner[0], owner[1])
+
+        elif name in ('UnitBornEvent', 'UnitInitEvent'):
+            p_index = self.player_index.get(getattr(event, 'control_pid', None))
+            if p_index is None or not is_game_unit(event.unit_type_name):
+                return
+            layer = self.layer_index.get(unit_category(event.unit_type_name))
+            if layer is None:
+                return
+            self.owners[event.unit_id] = [p_index, layer]
+            self._sample(event.x, event.y, event.second, p_index, layer)
+
+        elif name == 'UnitTypeChangeEvent':
+            owner = self.owners.get(event.unit_id)
+            if owner is not None:
+                layer = self.layer_index.get(unit_category(event.unit_type_name))
+                if layer is not None:
+                    owner[1] = layer
+
+        elif name == 'UnitDiedEvent':
+            owner = self.owners.pop(event.unit_id, None)
+            if owner is not None:
+                self._sample(event.x, event.y, event.second, owner[0], self.layer_index["deaths"])
+
+    def finish(self) -> Dict[str, Any]:
+        if np is None:
+            return {"error": "numpy not installed. Run: pip install numpy"}
+
+        xs, ys, seconds = self.xs, self.ys, self.seconds
+        sample_players, sample_layers = self.sample_players, self.sample_layers
+        if self.start is not None:
+            # Earlier events were only needed to know who owns which unit
+            keep = [i for i, second in enumerate(seconds) if second >= self.start]
+            xs, ys, seconds = [xs[i] for i in keep], [ys[i] for i in keep], [seconds[i] for i in keep]
+            sample_players = [sample_players[i] for i in keep]
+            sample_layers = [sample_layers[i] for i in keep]
+
+        cell_size = self.cell_size
+        width, height = self.map_size
+        grid_w = -(-width // cell_size)
+        grid_h = -(-height // cell_size)
+        shape = (len(self.pids), len(LAYERS), len(PHASES), grid_h, grid_w)
+
+        grids = bin_positions(
+            np.asarray(xs, dtype=np.int32), np.asarray(ys, dtype=np.int32),
+            np.asarray(seconds, dtype=np.int32), np.asarray(sample_players, dtype=np.int32),
+            np.asarray(sample_layers, dtype=np.int32), shape, cell_size,
+        )
+
+        return {
+            "width": width,
+            "height": height,
+            "cell_size": cell_size,
+            "players": [str(pid) for pid in self.pids],
+            "layers": LAYERS,
+            "phases": [phase for phase, _ in PHASES],
+            "samples": len(xs),
+            "grids": encode_array(grids, compress=True),
+        }
+
+
+def extract_heatmaps(replay, cell_size: int = 1, start: Optional[float] = None,
+                     end: Optional[float] = None) -> Dict[str, Any]:
+    """Extract per player, per layer, per phase position histograms, optionally for [start, end] seconds only"""
+    if not hasattr(replay, 'tracker_events'):
+        return {}
+    return run_builder(HeatmapBuilder(cell_size, start, end), replay)
+
+
+def bin_positions(xs, ys, seconds, sample_players, sample_layers,
+                  shape: Tuple[int, ...], cell_size: int = 1):
+    """Vectorized 5D histogram: (player, layer, phase, y, x) counts saturated to uint16"""
+    n_players, n_layers, n_phases, grid_h, grid_w = shape
+    phase_starts = np.asarray([start for _, start in PHASES], dtype=np.int32)
+    phases = np.searchsorted(phase_starts, seconds, side="right") - 1
+
+    cells_x = np.clip(xs // cell_size, 0, grid_w - 1)
+    cells_y = np.clip(ys // cell_size, 0, grid_h - 1)
+    flat = (((sample_players * n_layers + sample_layers) * n_phases + phases) * grid_h + cells_y) * grid_w + cells_x
+
+    counts = np.bincount(flat, minlength=n_players * n_layers * n_phases * grid_h * grid_w)
+    return np.minimum(counts, UINT16_MAX).astype(np.uint16).reshape(shape)
+
+
+def sum_heatmaps(heatmaps: List[Dict[str, Any]], layer: Optional[str] = None) -> Tuple[Any, List[int]]:
+    """
+    Sum the grids of several replays (of the same map) over replays and players.
+    Returns a uint32 array of shape (layers, phases, h, w), or (phases, h, w) for
+    one layer, and the indices of the heatmaps left out because their grid shape
+    differs from the first one's (another map or resolution).
+    """
+    total = None
+    skipped: List[int] = []
+    for i, heatmap in enumerate(heatmaps):
+        if "grids" not in heatmap:
+            continue
+        grids = decode_array(heatmap["grids"]).sum(axis=0, dtype=np.uint32)
+        if total is None:
+            total = grids
+        elif total.shape == grids.shape:
+            total += grids
+        else:
+            skipped.append(i)
+    if total is not None and layer is not None:
+        total = total[LAYERS.index(layer)]
+    return total, skipped
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Persistent Analysis Job Queue
+
+Analyze requests are submitted as jobs to a SQLite queue instead of starting
+a fresh analyzer process per request. Jobs are keyed by the replay's
+fingerprint (see fingerprint.py) plus their analysis options, so a second
+request for a game that is queued, running or already analyzed joins the
+existing job instead of starting another analysis (single flight). A later
+interactive request raises the priority of a queued batch job it joins.
+
+`serve` runs a bounded pool of worker processes (default: the worker count
+calibrated by validate_environment.py --write, else one per core) that
+claim the highest priority queued job, run analyze_replay in-process and
+store its result file next to the queue, in the output format and
+compression of that tuning file (see output_formats.py). A worker whose
+peak memory went over the tuned per-worker budget exits after its job and
+is replaced, which hands the memory back to the OS. Clients poll `status`
+or block on `submit --wait`, which prints the analysis result as JSON like
+analyze_replay.py. Jobs left running by a worker that died are requeued.
+
+Usage: python job_queue.py submit <replay_file_path> [--priority interactive|batch] [--sections A,B] [--wait]
+       python job_queue.py status <job_id>
+       python job_queue.py list [--status queued|running|done|failed]
+       python job_queue.py serve [--workers N]
+"""
+
+import sys
+import json
+import os
+import time
+import signal
+import sqlite3
+import argparse
+import resource
+import multiprocessing
+from typing import Dict, List, Any, Optional
+
+from fingerprint import fingerprint_file
+from output_formats import check_available, decode_output, encode_output
+from validate_environment import load_tuning
+
+QUEUE_FILENAME = ".analysis_jobs.sqlite"
+RESULTS_DIRNAME = ".analysis_results"
+
+# Interactive requests are claimed before any batch backfill job
+PRIORITIES = {"interactive": 10, "batch": 0}
+
+STATUSES = ["queued", "running", "done", "failed"]
+
+# Seconds between queue polls of an idle worker or a waiting client
+POLL_INTERVAL = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL,
+    options TEXT NOT NULL,
+    replay_path TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 1,
+    worker_pid INTEGER,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result_path TEXT,
+    error TEXT,
+    UNIQUE (fingerprint, options)
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority DESC, id);
+"""
+
+
+class JobQueue:
+    """SQLite-backed analysis jobs, safe to share between processes"""
+
+    def __init__(self, queue_path: str):
+        self.queue_path = queue_path
+        self.results_dir = os.path.join(os.path.dirname(os.path.abspath(queue_path)), RESULTS_DIRNAME)
+        # Autocommit mode; writes take the database lock with BEGIN IMMEDIATE
+        self.connection = sqlite3.connect(queue_path, timeout=30, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def submit(self, replay_path: str, priority: str = "interactive",
+               options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Queue a replay for analysis, or join the job already covering the same game and options"""
+        fingerprint = fingerprint_file(replay_path)
+        options_key = json.dumps(options or {}, sort_keys=True)
+        level = PRIORITIES[priority]
+
+        db = self.connection
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT * FROM jobs WHERE fingerprint = ? AND options = ?",
+                             (fingerprint, options_key)).fetchone()
+            if row is None:
+                cursor = db.execute(
+                    "INSERT INTO jobs (fingerprint, options, replay_path, priority, status, submitted_at) "
+                    "VALUES (?, ?, ?, ?, 'queued', ?)",
+                    (fingerprint, options_key, os.path.abspath(replay_path), level, time.time()))
+                job_id, deduplicated = cursor.lastrowid, False
+            elif row["status"] == "failed" or (row["status"] == "done" and not os.path.exists(row["result_path"])):
+                # A failed job, or one whose result file is gone, is rerun by the next request for it
+                db.execute("UPDATE jobs SET status = 'queued', priority = ?, replay_path = ?, requests = requests + 1, "
+                           "error = NULL, worker_pid = NULL, submitted_at = ? WHERE id = ?",
+                           (level, os.path.abspath(replay_path), time.time(), row["id"]))
+                job_id, deduplicated = row["id"], False
+            else:
+                db.execute("UPDATE jobs SET requests = requests + 1, priority = MAX(priority, ?) WHERE id = ?",
+                           (level, row["id"]))
+                job_id, deduplicated = row["id"], True
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+        return dict(self.status(job_id), deduplicated=deduplicated)
+
+    def status(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Public view of a job, None if it does not exist"""
+        row = self.connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            "job_id": row["id"],
+            "status": row["status"],
+            "fingerprint": row["fingerprint"],
+            "replay_path": row["replay_path"],
+            "priority": row["priority"],
+            "requests": row["requests"],
+            "submitted_at": row["submitted_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+        if row["status"] == "queued":
+            job["position"] = self.connection.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND (priority > ? OR (priority = ? AND id < ?))",
+                (row["priority"], row["priority"], row["id"])).fetchone()[0]
+        if row["result_path"]:
+            job["result_path"] = row["result_path"]
+        if row["error"]:
+            job["error"] = row["error"]
+        return job
+
+    def jobs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """All jobs, or those with one status, in claim order"""
+        if status:
+            rows = self.connection.execute("SELECT id FROM jobs WHERE status = ? ORDER BY priority DESC, id",
+                                           (status,)).fetchall()
+        else:
+            rows = self.connection.execute("SELECT id FROM jobs ORDER BY id").fetchall()
+        return [self.status(row["id"]) for row in rows]
+
+    def claim(self, worker_pid: int) -> Optional[sqlite3.Row]:
+        """Atomically mark the highest priority queued job as running and return it"""
+        db = self.connection
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority DESC, id LIMIT 1").fetchone()
+            if row is not None:
+                db.execute("UPDATE jobs SET status = 'running', worker_pid = ?, started_at = ? WHERE id = ?",
+                           (worker_pid, time.time(), row["id"]))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return row
+
+    def finish(self, job_id: int, result_path: Optional[str] = None, error: Optional[str] = None) -> None:
+        """Record the outcome of a claimed job"""
+        self.connection.execute(
+            "UPDATE jobs SET status = ?, result_path = ?, error = ?, finished_at = ?, worker_pid = NULL WHERE id = ?",
+            ("failed" if error else "done", result_path, error, time.time(), job_id))
+
+    def requeue_orphans(self, live_pids: Optional[List[int]] = None) -> int:
+        """Requeue running jobs whose worker is gone; returns how many"""
+        rows = self.connection.execute("SELECT id, worker_pid FROM jobs WHERE status = 'running'").fetchall()
+        orphans = [row["id"] for row in rows
+                   if (live_pids is not None and row["worker_pid"] not in live_pids) or not _pid_alive(row["worker_pid"])]
+        for job_id in orphans:
+            self.connection.execute(
+                "UPDATE jobs SET status = 'queued', worker_pid = NULL, started_at = NULL "
+                "WHERE id = ? AND status = 'running'", (job_id,))
+        return len(orphans)
+
+    def wait(self, job_id: int, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Poll until a job is done or failed, or the timeout passes"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.status(job_id)
+            if job is None or job["status"] in ("done", "failed"):
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(POLL_INTERVAL)
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def output_settings(tuning: Dict[str, Any]) -> Dict[str, str]:
+    """Result file encoding and compression from a tuning file, if this host can produce them"""
+    encoding = tuning.get("format", "json-compact")
+    compression = tuning.get("compress", "none")
+    if check_available(encoding, compression):
+        return {"encoding": "json-compact", "compression": "none"}
+    return {"encoding": encoding, "compression": compression}
+
+
+def result_extension(encoding: str, compression: str) -> str:
+    if encoding.startswith("json"):
+        encoding = "json"
+    return encoding if compression == "none" else f"{encoding}.{compression}"
+
+
+def run_job(queue: JobQueue, job: sqlite3.Row, encoding: str = "json-compact",
+            compression: str = "none") -> None:
+    """Analyze a claimed job's replay and store the result file"""
+    from analyze_replay import analyze_replay
+
+    try:
+        result = analyze_replay(job["replay_path"], **json.loads(job["options"]))
+    except Exception as e:
+        result = {"error": f"Error analyzing replay: {str(e)}"}
+    if "error" in result:
+        queue.finish(job["id"], error=result["error"])
+        return
+
+    os.makedirs(queue.results_dir, exist_ok=True)
+    result_path = os.path.join(queue.results_dir,
+                               f"{job['id']}-{job['fingerprint']}.{result_extension(encoding, compression)}")
+    tmp_path = result_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(encode_output(result, encoding, compression))
+    os.replace(tmp_path, result_path)
+    queue.finish(job["id"], result_path=result_path)
+
+
+def worker_loop(queue_path: str, output: Dict[str, str], memory_budget_mb: Optional[int] = None) -> None:
+    """Claim and run jobs until terminated, or until a job pushed the worker over its memory budget"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # Import the analyzer (and sc2reader) once per worker instead of once per job
+    import analyze_replay  # noqa: F401
+
+    queue = JobQueue(queue_path)
+    pid = os.getpid()
+    while True:
+        job = queue.claim(pid)
+        if job is None:
+            time.sleep(POLL_INTERVAL)
+            continue
+        run_job(queue, job, **output)
+        # The allocator keeps freed memory, so an oversized worker is replaced rather than reused
+        if memory_budget_mb and resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 > memory_budget_mb:
+            queue.close()
+            return
+
+
+def serve(queue_path: str, workers: Optional[int] = None) -> None:
+    """Run a fixed-size worker pool over the queue, replacing workers that die or exit"""
+    tuning = load_tuning()
+    workers = workers or tuning.get("workers") or os.cpu_count() or 1
+    output = output_settings(tuning)
+    memory_budget_mb = tuning.get("memory_budget_mb")
+    queue = JobQueue(queue_path)
+    # Stop like on Ctrl-C so the workers are terminated and their jobs requeued
+    signal.signal(signal.SIGTERM, lambda signum, frame: _raise_interrupt())
+    pool: List[multiprocessing.Process] = []
+    try:
+        while True:
+            pool = [process for process in pool if process.is_alive()]
+            # Jobs of workers that crashed mid-analysis go back to the queue
+            queue.requeue_orphans([process.pid for process in pool])
+            while len(pool) < workers:
+                process = multiprocessing.Process(target=worker_loop, args=(queue_path, output, memory_budget_mb),
+                                                  daemon=True)
+                process.start()
+                pool.append(process)
+            time.sleep(POLL_INTERVAL * 4)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in pool:
+            process.terminate()
+        for process in pool:
+            process.join()
+        queue.requeue_orphans([])
+        queue.close()
+
+
+def _raise_interrupt():
+    raise KeyboardInterrupt
+
+
+def default_queue_path() -> str:
+    """The queue lives next to the replays it analyzes"""
+    return os.path.join("replays", QUEUE_FILENAME)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Deduplicated persistent replay analysis queue")
+    parser.add_argument("--queue", default=default_queue_path(), help="Queue database path")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    submit_parser = subparsers.add_parser("submit", help="Queue a replay, or join the job already covering it")
+    submit_parser.add_argument("replay_path")
+    submit_parser.add_argument("--priority", choices=list(PRIORITIES), default="interactive")
+    submit_parser.add_argument("--sections", default="", help="Comma-separated optional analyzer sections")
+    submit_parser.add_argument("--wait", action="store_true", help="Block until done and print the analysis result")
+    submit_parser.add_argument("--timeout", type=float, default=None, help="Seconds to wait at most")
+
+    status_parser = subparsers.add_parser("status", help="Show a job")
+    status_parser.add_argument("job_id", type=int)
+
+    list_parser = subparsers.add_parser("list", help="List jobs")
+    list_parser.add_argument("--status", choices=STATUSES)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the worker pool")
+    serve_parser.add_argument("--workers", type=int, help="Number of worker processes (default: validate_environment.py --write tuning, else CPU count)")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.queue, args.workers)
+        return
+
+    queue = JobQueue(args.queue)
+
+    if args.command == "submit":
+        if not os.path.exists(args.replay_path):
+            print(json.dumps({"error": f"Replay file not found: {args.replay_path}"}))
+            sys.exit(1)
+        sections = [name.strip() for name in args.sections.split(",") if name.strip()]
+        try:
+            job = queue.submit(args.replay_path, args.priority, {"sections": sections} if sections else None)
+        except Exception as e:
+            print(json.dumps({"error": f"Error submitting replay: {str(e)}"}))
+            sys.exit(1)
+
+        if not args.wait:
+            print(json.dumps(dict(job, success=True), indent=2))
+            return
+
+        job = queue.wait(job["job_id"], args.timeout)
+        if job["status"] == "done":
+            # Same output as analyze_replay.py for the caller, whatever the result file's encoding
+            with open(job["result_path"], 'rb') as f:
+                result = decode_output(f.read())
+            sys.stdout.write(json.dumps(result, separators=(",", ":")))
+            return
+        print(json.dumps({"error": job.get("error") or f"Job {job['job_id']} still {job['status']}",
+                          "job_id": job["job_id"], "status": job["status"]}))
+        sys.exit(1)
+
+    if args.command == "status":
+        job = queue.status(args.job_id)
+        if job is None:
+            print(json.dumps({"error": f"Job not found: {args.job_id}"}))
+            sys.exit(1)
+        print(json.dumps(dict(job, success=True), indent=2))
+        return
+
+    print(json.dumps({"success": True, "jobs": queue.jobs(args.status)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
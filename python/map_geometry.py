@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Map Geometry Cache
+
+The corpus replays the same handful of maps, so base locations and regions
+are derived once per map version (map name plus the map file hash) and kept
+in a JSON cache next to the replays.
+
+Bases come from the neutral mineral field and geyser births at the start of
+the tracker stream: resources closer than RESOURCE_SPREAD tiles form one
+cluster, clusters without a geyser (mineral walls) are dropped, and the town
+hall spot is the point nearest to the cluster's resources that keeps the
+in-game minimum distance from every mineral field and geyser. Each map tile
+within BASE_RADIUS of a base gets that base's region ID (index + 1, 0 for
+open ground) in a dense GRID_SIZE x GRID_SIZE uint8 grid, so labeling a
+position is one array lookup.
+
+Labels are relative to a player's start base: the main, natural, third and
+fourth, and the same ranks from the opponent's start for the enemy's. Without
+pathing data straight-line distance is misleading (on Persephone a base
+behind the main is as close as the natural), so the cache also counts which
+base players from each start actually take as their first, second and third
+expansion; each rank goes to the base most often taken at that point, and
+straight-line distance only decides ranks no replay has shown yet. Labels
+sharpen as more replays of a map pass through the cache.
+
+Usage: python map_geometry.py <replay_file_path>... [--cache PATH]
+"""
+
+import sys
+import json
+import os
+import argparse
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from compact_arrays import encode_array, decode_array
+from engine_plugins import run_builder
+from unit_catalog import START_TOWN_HALLS, is_geyser, is_mineral_field
+
+CACHE_VERSION = 1
+CACHE_FILENAME = ".map_cache.json"
+
+# Resources of one base are at most this far (tiles) from their nearest neighbour
+RESOURCE_SPREAD = 7.0
+# Mineral fields of a standard base
+FULL_BASE_MINERALS = 8
+# Closest a town hall center may be to a mineral field / geyser (tracker positions)
+MINERAL_CLEARANCE = 6.0
+GEYSER_CLEARANCE = 7.0
+# Town hall candidates are searched this far around the resources' centroid
+SEARCH_RADIUS = 10.0
+# Tiles this close to a base belong to its region
+BASE_RADIUS = 16.0
+# Tracker positions are whole tiles and no map is larger than 256 x 256
+GRID_SIZE = 256
+
+RANK_LABELS = ["main", "natural", "third", "fourth"]
+# Expansions per player that are counted towards the learned base order
+COUNTED_EXPANSIONS = len(RANK_LABELS) - 1
+
+
+def map_key(replay) -> str:
+    """Cache key of a replay's map: name and map file hash"""
+    return f"{replay.map_name}|{getattr(replay, 'map_hash', '')}"
+
+
+def _clusters(points, spread: float) -> List[List[int]]:
+    """Single-linkage clusters of points closer than spread, as index lists"""
+    distances = np.hypot(*(points[:, None, :] - points[None, :, :]).transpose(2, 0, 1))
+    labels = np.arange(len(points))
+    while True:
+        # Every point takes the smallest label among its neighbours until nothing changes
+        merged = np.where(distances <= spread, labels[None, :], len(points)).min(axis=1)
+        if (merged == labels).all():
+            break
+        labels = merged
+    return [np.flatnonzero(labels == label).tolist() for label in np.unique(labels)]
+
+
+def _town_hall_spot(resources, minerals, geysers) -> Tuple[float, float]:
+    """Point nearest to a base's resources that keeps clear of every mineral field and geyser"""
+    center = resources.mean(axis=0)
+    offsets = np.arange(-SEARCH_RADIUS, SEARCH_RADIUS + 0.5, 0.5)
+    xs, ys = np.meshgrid(center[0] + offsets, center[1] + offsets)
+    candidates = np.stack([xs.ravel(), ys.ravel()], axis=1)
+
+    def distances(points):
+        return np.hypot(*(candidates[:, None, :] - points[None, :, :]).transpose(2, 0, 1))
+
+    total = distances(resources).sum(axis=1)
+    blocked = distances(minerals).min(axis=1) < MINERAL_CLEARANCE
+    if len(geysers):
+        blocked |= distances(geysers).min(axis=1) < GEYSER_CLEARANCE
+    total[blocked] = np.inf
+    best = int(np.argmin(total))
+    return float(candidates[best, 0]), float(candidates[best, 1])
+
+
+def find_bases(minerals: List[Tuple[int, int]], geysers: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+    """Base locations from mineral field and geyser positions"""
+    if not minerals or not geysers:
+        return []
+    mineral_points = np.asarray(minerals, dtype=np.float64)
+    geyser_points = np.asarray(geysers, dtype=np.float64)
+    points = np.vstack([mineral_points, geyser_points])
+
+    bases = []
+    for cluster in _clusters(points, RESOURCE_SPREAD):
+        cluster_geysers = [i for i in cluster if i >= len(minerals)]
+        if not cluster_geysers:
+            continue
+        base_geysers = points[cluster_geysers]
+        base_minerals = points[[i for i in cluster if i < len(minerals)]]
+        if len(base_minerals) > FULL_BASE_MINERALS + 2:
+            # A mineral wall chained onto the base; only fields near its geysers place the town hall
+            base_minerals = base_minerals[np.hypot(*(base_minerals - base_geysers.mean(axis=0)).T) <= 12]
+        x, y = _town_hall_spot(np.vstack([base_minerals, base_geysers]), mineral_points, geyser_points)
+        bases.append({"x": round(x, 1), "y": round(y, 1), "minerals": len(base_minerals), "geysers": len(cluster_geysers)})
+
+    bases.sort(key=lambda base: (base["y"], base["x"]))
+    return bases
+
+
+def region_grid(bases: List[Dict[str, Any]]):
+    """GRID_SIZE x GRID_SIZE region IDs indexed [y, x]: nearest base within BASE_RADIUS, 0 elsewhere"""
+    grid = np.zeros((GRID_SIZE, GRID_SIZE), dtype=np.uint8)
+    if not bases:
+        return grid
+    centers = np.array([(base["x"], base["y"]) for base in bases])
+    ys, xs = np.mgrid[0:GRID_SIZE, 0:GRID_SIZE]
+    # Tile (x, y) covers [x, x + 1), so measure from its center
+    distances = np.hypot(xs[..., None] + 0.5 - centers[:, 0], ys[..., None] + 0.5 - centers[:, 1])
+    nearest = np.argmin(distances, axis=-1)
+    inside = np.take_along_axis(distances, nearest[..., None], axis=-1)[..., 0] <= BASE_RADIUS
+    grid[inside] = nearest[inside] + 1
+    return grid
+
+
+def town_hall_inits(events) -> Dict[int, List[Tuple[int, int]]]:
+    """Positions of the town halls every player started building, in game order"""
+    positions: Dict[int, List[Tuple[int, int]]] = {}
+    for event in events:
+        if event.name == 'UnitInitEvent' and event.unit_type_name in START_TOWN_HALLS:
+            positions.setdefault(event.control_pid, []).append((event.x, event.y))
+    return positions
+
+
+def start_positions(events) -> Dict[int, Tuple[int, int]]:
+    """Position of every player's initial town hall"""
+    positions = {}
+    for event in events:
+        if event.second > 0:
+            break
+        if event.name == 'UnitBornEvent' and event.control_pid and event.unit_type_name in START_TOWN_HALLS:
+            positions.setdefault(event.control_pid, (event.x, event.y))
+    return positions
+
+
+class MapGeometry:
+    """Bases and region grid of one map version with O(1) position labels"""
+
+    def __init__(self, entry: Dict[str, Any]):
+        self.entry = entry
+        self.bases: List[Dict[str, Any]] = entry["bases"]
+        self.grid = decode_array(entry["regions"])
+        self._centers = np.array([(base["x"], base["y"]) for base in self.bases]).reshape(-1, 2)
+        self._labels: Dict[Tuple[int, Optional[int]], List[Optional[str]]] = {}
+
+    def region(self, x: float, y: float) -> int:
+        """Region ID of a position: base index + 1, or 0 outside every base"""
+        ix, iy = int(x), int(y)
+        if 0 <= ix < GRID_SIZE and 0 <= iy < GRID_SIZE:
+            return int(self.grid[iy, ix])
+        return 0
+
+    def nearest_base(self, x: float, y: float) -> Optional[int]:
+        """Index of the base closest to a position"""
+        if not self.bases:
+            return None
+        return int(np.argmin(np.hypot(self._centers[:, 0] - x, self._centers[:, 1] - y)))
+
+    def _ranks(self, base: int):
+        # Rank 0 is the base itself, then the most common expansion at each point, then by distance
+        by_distance = np.argsort(np.hypot(*(self._centers - self._centers[base]).T), kind='stable').tolist()
+        counts = self.entry.get("expansions", {}).get(str(base), {})
+        order = [base]
+        for position in range(COUNTED_EXPANSIONS):
+            # Ties go to the closer base
+            taken = [(counts[key][position], -by_distance.index(int(key)), int(key)) for key in counts
+                     if int(key) not in order and counts[key][position]]
+            if not taken:
+                break
+            order.append(max(taken)[2])
+        order += [other for other in by_distance if other not in order]
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(len(order))
+        return ranks
+
+    def region_labels(self, start_base: int, enemy_base: Optional[int] = None) -> List[Optional[str]]:
+        """Label of every region ID for a player starting at start_base; index with region()"""
+        labels: List[Optional[str]] = [None] * (len(self.bases) + 1)
+        enemy_ranks = self._ranks(enemy_base) if enemy_base is not None else None
+        for base, rank in enumerate(self._ranks(start_base)):
+            if rank < len(RANK_LABELS):
+                labels[base + 1] = RANK_LABELS[rank]
+            elif enemy_ranks is not None and enemy_ranks[base] < len(RANK_LABELS):
+                labels[base + 1] = f"enemy {RANK_LABELS[enemy_ranks[base]]}"
+            else:
+                labels[base + 1] = f"base {base + 1}"
+        return labels
+
+    def label(self, x: float, y: float, start_base: int, enemy_base: Optional[int] = None) -> Optional[str]:
+        """"main", "natural", "enemy third", ... for a position, None on open ground"""
+        labels = self._labels.get((start_base, enemy_base))
+        if labels is None:
+            labels = self._labels[(start_base, enemy_base)] = self.region_labels(start_base, enemy_base)
+        return labels[self.region(x, y)]
+
+
+class MapCache:
+    """Per map version geometry, computed from the first replay of each map; in memory only without a path"""
+
+    def __init__(self, cache_path: Optional[str] = None):
+        self.cache_path = cache_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        if not cache_path:
+            return
+        try:
+            with open(cache_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("maps", {})
+        except (OSError, ValueError):
+            pass
+
+    def get(self, replay, events: Optional[List[Any]] = None) -> MapGeometry:
+        """
+        Geometry of a loaded (level 3+) replay's map, derived and cached on
+        first sight. events defaults to the replay's tracker events; a subset
+        holding the second 0 births and the town hall inits is enough.
+        """
+        if events is None:
+            events = replay.tracker_events
+        key = map_key(replay)
+        entry = self.entries.get(key)
+        if entry is None:
+            minerals, geysers = [], []
+            for event in events:
+                if event.second > 0:
+                    break
+                if event.name == 'UnitBornEvent' and not event.control_pid:
+                    if is_mineral_field(event.unit_type_name):
+                        minerals.append((event.x, event.y))
+                    elif is_geyser(event.unit_type_name):
+                        geysers.append((event.x, event.y))
+            bases = find_bases(minerals, geysers)
+            entry = self.entries[key] = {
+                "map_name": replay.map_name,
+                "map_hash": getattr(replay, 'map_hash', ''),
+                "bases": bases,
+                "start_bases": [],
+                "regions": encode_array(region_grid(bases), compress=True),
+            }
+            self.dirty = True
+
+        geometry = MapGeometry(entry)
+        # Start locations and expansion counts accumulate over the replays of a map, each replay once
+        counted = entry.setdefault("counted_replays", [])
+        replay_id = getattr(replay, 'filehash', None)
+        if replay_id in counted or not geometry.bases:
+            return geometry
+        counted.append(replay_id)
+        self.dirty = True
+
+        inits = town_hall_inits(events)
+        for pid, start in start_positions(events).items():
+            start_base = geometry.nearest_base(*start)
+            if start_base not in entry["start_bases"]:
+                entry["start_bases"] = sorted(entry["start_bases"] + [start_base])
+            taken = [start_base]
+            for x, y in inits.get(pid, []):
+                region = geometry.region(x, y)
+                # Town halls off a base (hidden or proxy ones) don't say anything about the order
+                if region and region - 1 not in taken:
+                    taken.append(region - 1)
+            counts = entry.setdefault("expansions", {}).setdefault(str(start_base), {})
+            for position, base in enumerate(taken[1:COUNTED_EXPANSIONS + 1]):
+                counts.setdefault(str(base), [0] * COUNTED_EXPANSIONS)[position] += 1
+        return geometry
+
+    def save(self) -> None:
+        """Write the cache atomically if anything changed"""
+        if not self.dirty or not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": CACHE_VERSION, "maps": self.entries}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+
+def default_cache_path(replay_path: str) -> str:
+    """The cache lives next to the replays it describes"""
+    return os.path.join(os.path.dirname(os.path.abspath(replay_path)), CACHE_FILENAME)
+
+
+class MapGeometryBuilder:
+    """
+    Keeps the few tracker events map geometry needs (second 0 births and
+    town hall inits) as they are fed; finish() looks the map up in the
+    cache. See extract_map_geometry.
+    """
+
+    def __init__(self, start: Optional[float] = None, end: Optional[float] = None,
+                 cache_path: Optional[str] = None):
+        self.cache_path = cache_path
+        self.done = False
+
+    def begin(self, replay) -> None:
+        self.replay = replay
+        self.events: List[Any] = []
+
+    def feed(self, event) -> None:
+        if event.second == 0 or (event.name == 'UnitInitEvent' and event.unit_type_name in START_TOWN_HALLS):
+            self.events.append(event)
+
+    def finish(self) -> Dict[str, Any]:
+        if np is None:
+            return {"error": "numpy not installed. Run: pip install numpy"}
+
+        replay, events = self.replay, self.events
+        cache = MapCache(self.cache_path)
+        geometry = cache.get(replay, events)
+        cache.save()
+
+        starts = {pid: geometry.nearest_base(x, y) for pid, (x, y) in start_positions(events).items()}
+        players = {}
+        for pid, start_base in starts.items():
+            if start_base is None:
+                continue
+            enemies = [base for other, base in starts.items() if other != pid and base is not None]
+            players[str(pid)] = {
+                "start_base": start_base,
+                "labels": geometry.region_labels(start_base, enemies[0] if len(enemies) == 1 else None),
+            }
+
+        return {
+            "map_key": map_key(replay),
+            "bases": geometry.bases,
+            "regions": geometry.entry["regions"],
+            "players": players,
+        }
+
+
+def extract_map_geometry(replay, start: Optional[float] = None, end: Optional[float] = None,
+                         cache_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Bases, region grid and per player region labels of a replay's map. With
+    cache_path the geometry is read from (or added to) that map cache. The
+    map doesn't change during a game, so start/end are ignored.
+    """
+    if not hasattr(replay, 'tracker_events'):
+        return {}
+    return run_builder(MapGeometryBuilder(start, end, cache_path), replay)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Build the per map geometry cache")
+    parser.add_argument("replays", nargs="+")
+    parser.add_argument("--cache", help=f"Map cache path (default: {CACHE_FILENAME} next to the first replay)")
+    args = parser.parse_args()
+
+    if np is None:
+        print(json.dumps({"error": "numpy not installed. Run: pip install numpy"}))
+        sys.exit(1)
+
+    import sc2reader
+
+    cache = MapCache(args.cache or default_cache_path(args.replays[0]))
+    errors = []
+    for replay_path in args.replays:
+        try:
+            replay = sc2reader.load_replay(replay_path, load_level=3)
+            cache.get(replay)
+        except Exception as e:
+            errors.append({"filename": replay_path, "error": str(e)})
+    cache.save()
+
+    maps = [
+        {"map_key": key, "bases": len(entry["bases"]), "start_bases": entry["start_bases"]}
+        for key, entry in sorted(cache.entries.items())
+    ]
+    print(json.dumps({"success": True, "cache_path": cache.cache_path, "maps": maps, "errors": errors}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
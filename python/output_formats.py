@@ -0,0 +1,137 @@
+"""
+Output encoders for analyzer results
+
+The default output stays pretty-printed JSON so existing consumers keep
+working. The other encoders trade readability for size and speed on the pipe:
+
+    json-compact   JSON without indentation or spaces after separators
+    msgpack        MessagePack (pip install msgpack)
+    cbor           CBOR (pip install cbor2)
+
+Any encoding can be wrapped in gzip or zstd (pip install zstandard)
+compression; python/requirements-optional.txt lists all three codecs.
+Binary encodings and compressed output start with a fixed 8-byte header so
+readers can tell what they got:
+
+    b"SC2A" | schema version (u8) | encoding (u8) | compression (u8) | reserved (u8)
+
+Uncompressed JSON is written without a header, exactly as before.
+decode_output reverses any of these.
+"""
+
+import gzip
+import json
+import struct
+from typing import Any, Dict, Optional
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SCHEMA_VERSION = 1
+MAGIC = b"SC2A"
+HEADER = struct.Struct("<4sBBBB")
+
+ENCODINGS = ["json", "json-compact", "msgpack", "cbor"]
+COMPRESSIONS = ["none", "gzip", "zstd"]
+
+# Keys whose float values are positions or velocities in map tiles
+COORDINATE_KEYS = frozenset(["x", "y", "vx", "vy"])
+
+
+def check_available(encoding: str, compression: str = "none") -> Optional[str]:
+    """Error message if the encoder or compressor's package is missing, else None"""
+    if encoding not in ENCODINGS:
+        return f"Unknown encoding: {encoding}"
+    if compression not in COMPRESSIONS:
+        return f"Unknown compression: {compression}"
+    if encoding == "msgpack" and msgpack is None:
+        return "msgpack not installed. Run: pip install msgpack"
+    if encoding == "cbor" and cbor2 is None:
+        return "cbor2 not installed. Run: pip install cbor2"
+    if compression == "zstd" and zstandard is None:
+        return "zstandard not installed. Run: pip install zstandard"
+    return None
+
+
+def quantize_coordinates(value: Any, digits: int) -> Any:
+    """Round the float coordinates in a result to the given number of decimals, in place"""
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key, item in node.items():
+                if key in COORDINATE_KEYS and type(item) is float:
+                    node[key] = round(item, digits)
+                elif isinstance(item, (dict, list)):
+                    stack.append(item)
+        elif isinstance(node, list):
+            stack.extend(item for item in node if isinstance(item, (dict, list)))
+    return value
+
+
+def encode_output(result: Dict[str, Any], encoding: str = "json", compression: str = "none",
+                  coord_digits: Optional[int] = None) -> bytes:
+    """Serialize an analyzer result; see the module docstring for the framing"""
+    if coord_digits is not None:
+        quantize_coordinates(result, coord_digits)
+
+    if encoding == "json":
+        payload = json.dumps(result, indent=2).encode("utf-8")
+    elif encoding == "json-compact":
+        payload = json.dumps(result, separators=(",", ":")).encode("utf-8")
+    elif encoding == "msgpack":
+        payload = msgpack.packb(result, use_bin_type=True)
+    elif encoding == "cbor":
+        payload = cbor2.dumps(result)
+    else:
+        raise ValueError(f"Unknown encoding: {encoding}")
+
+    if compression == "gzip":
+        payload = gzip.compress(payload, compresslevel=6)
+    elif compression == "zstd":
+        payload = zstandard.ZstdCompressor(level=3).compress(payload)
+    elif compression != "none":
+        raise ValueError(f"Unknown compression: {compression}")
+
+    if encoding.startswith("json") and compression == "none":
+        return payload
+    header = HEADER.pack(MAGIC, SCHEMA_VERSION, ENCODINGS.index(encoding), COMPRESSIONS.index(compression), 0)
+    return header + payload
+
+
+def decode_output(data: bytes) -> Dict[str, Any]:
+    """Inverse of encode_output for any encoding and compression"""
+    if not data.startswith(MAGIC):
+        return json.loads(data)
+
+    _, version, encoding_code, compression_code, _ = HEADER.unpack_from(data)
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"Output schema version {version} is newer than this reader ({SCHEMA_VERSION})")
+    encoding, compression = ENCODINGS[encoding_code], COMPRESSIONS[compression_code]
+    error = check_available(encoding, compression)
+    if error:
+        raise ImportError(error)
+
+    payload = data[HEADER.size:]
+    if compression == "gzip":
+        payload = gzip.decompress(payload)
+    elif compression == "zstd":
+        payload = zstandard.ZstdDecompressor().decompressobj().decompress(payload)
+
+    if encoding.startswith("json"):
+        return json.loads(payload)
+    if encoding == "msgpack":
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    return cbor2.loads(payload)
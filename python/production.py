@@ -0,0 +1,413 @@
+"""
+Production Capacity
+
+Turns unit completions into per-structure busy intervals in one pass over
+the tracker events. Tracker events do not say which structure trained a
+unit, so a unit born at t with build time B (see unit_catalog.BUILD_TIMES)
+is placed first-fit on a free slot of one of its owner's ready producers
+over [t - B, t]; a reactor adds a second slot. Warp-ins keep a warp gate busy
+for its cooldown, and building an addon or morphing into an orbital or
+planetary fortress blocks every slot of the structure. A completed upgrade
+with research time R (see unit_catalog.UPGRADE_RESEARCH) is placed the same
+way over [t - R, t] on its researching structure, so tech structures such as
+forges, engineering bays and tech labs get busy and idle time too; they add
+no producer slots to the capacity curves.
+
+Each structure's intervals are sorted and merged once at the end, so busy
+and idle seconds cost O(n log n) in its own intervals and the whole section
+stays linear in the number of events. Capacity (producer slots), slots in
+use and Zerg larva counts are sampled per time bucket with the same
+delta-and-cumsum scheme as army_composition.
+
+Chrono boost and other speedups make real intervals shorter than B, so busy
+time is an upper bound; queued but not yet started units are not visible in
+tracker events and are not counted.
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from compact_arrays import encode_array
+from engine_plugins import run_builder
+from unit_catalog import (ADDON_BUILD_TIMES, BUILD_TIMES, MORPH_TIMES, PRODUCER_FAMILIES, RESEARCH_FAMILIES,
+                          UNIT_PRODUCERS, UPGRADE_RESEARCH, WARP_COOLDOWNS, base_unit_type, stats_unit_type)
+from unit_lifetimes import MISSING
+
+DEFAULT_BUCKET_SECONDS = 10
+
+# Addons sit this far from their structure's center: (structure - addon)
+ADDON_PARENT_OFFSET = (-2.5, 0.5)
+
+
+def merge_intervals(intervals: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Union of [start, end) intervals as sorted, disjoint intervals"""
+    merged: List[Tuple[float, float]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        elif end > start:
+            merged.append((start, end))
+    return merged
+
+
+def covered_seconds(merged: List[Tuple[float, float]], low: float, high: float) -> float:
+    """Length of the part of merged intervals inside [low, high]"""
+    return sum(max(0.0, min(end, high) - max(start, low)) for start, end in merged)
+
+
+class _Structure:
+    __slots__ = ("unit_id", "family", "type_name", "owner", "x", "y", "ready", "died", "slot_ends", "reactor",
+                 "intervals", "produced", "researched", "counted")
+
+    def __init__(self, unit_id: int, family: str, type_name: str, owner: int, x: int, y: int,
+                 counted: bool = True):
+        self.unit_id = unit_id
+        self.family = family
+        self.type_name = type_name
+        self.owner = owner
+        self.x = x
+        self.y = y
+        self.ready: Optional[int] = None
+        self.died: Optional[int] = None
+        self.slot_ends = [0.0, 0.0]
+        self.reactor = False
+        self.intervals: List[Tuple[float, float]] = []
+        self.produced = 0
+        self.researched = 0
+        self.counted = counted  # False for research-only structures, which add no producer slots
+
+
+class ProductionBuilder:
+    """Places production on structures one tracker event at a time; see extract_production"""
+
+    def __init__(self, bucket_seconds: int = DEFAULT_BUCKET_SECONDS,
+                 start: Optional[float] = None, end: Optional[float] = None):
+        self.bucket_seconds = bucket_seconds
+        self.start = start
+        self.end = end
+        self.done = False
+
+    def begin(self, replay) -> None:
+        self.pids = [player.pid for player in replay.players
+                     if hasattr(player, 'result') and player.result != 'Unknown']
+        self.player_index = {pid: i for i, pid in enumerate(self.pids)}
+
+        self.structures: Dict[int, _Structure] = {}
+        # (owner, family) -> structures in creation order, for first-fit placement
+        self.producers: Dict[Tuple[int, str], List[_Structure]] = {}
+        self.addon_sites: Dict[int, Tuple[int, int, int]] = {}    # addon unit_id -> (owner, x, y)
+        self.reactor_parents: Dict[int, _Structure] = {}          # finished reactor unit_id -> structure it serves
+        self.larva: Dict[int, int] = {}                           # larva unit_id -> player index
+        self.eggs: Dict[int, int] = {}                            # egg unit_id -> player index, until it hatches
+        # (player, second, curve, delta) with curve 0 = capacity, 1 = slots in use, 2 = larva
+        self.deltas: List[Tuple[int, float, int, int]] = []
+        self.last_second = 0
+
+    def add_structure(self, event, family: str, owner: int, counted: bool = True) -> _Structure:
+        structure = _Structure(event.unit_id, family, event.unit_type_name, owner, event.x, event.y, counted)
+        self.structures[event.unit_id] = structure
+        self.producers.setdefault((owner, family), []).append(structure)
+        return structure
+
+    def change_capacity(self, structure: _Structure, second: float, slots: int) -> None:
+        if structure.counted and structure.ready is not None and structure.died is None:
+            self.deltas.append((self.player_index[structure.owner], second, 0, slots))
+
+    def occupy(self, structure: _Structure, begin: float, finish: float, slot: Optional[int] = None) -> None:
+        slots = range(len(structure.slot_ends)) if slot is None else (slot,)
+        for s in slots:
+            structure.slot_ends[s] = max(structure.slot_ends[s], finish)
+        structure.intervals.append((begin, finish))
+        if not structure.counted:
+            return
+        in_use = 1 if slot is not None else (2 if structure.reactor else 1)
+        p_index = self.player_index[structure.owner]
+        self.deltas.append((p_index, begin, 1, in_use))
+        self.deltas.append((p_index, finish, 1, -in_use))
+
+    def place(self, owner: int, family: str, begin: float, finish: float) -> Optional[_Structure]:
+        """First-fit the interval onto a free slot, or onto the slot that frees up first"""
+        best = None
+        for structure in self.producers.get((owner, family), ()):
+            if structure.ready is None or structure.ready > finish or structure.died is not None:
+                continue
+            for slot in range(2 if structure.reactor else 1):
+                free_at = structure.slot_ends[slot]
+                if best is None or max(free_at, begin) < best[2]:
+                    best = (structure, slot, max(free_at, begin))
+                if free_at <= begin:
+                    break
+            if best is not None and best[2] == begin:
+                break
+        if best is None:
+            return None
+        structure, slot, free_at = best
+        # Overlap means a speedup (chrono boost) or a missed producer; keep slots disjoint
+        self.occupy(structure, max(structure.ready, min(free_at, finish)), finish, slot)
+        return structure
+
+    def parent_of(self, addon_name: str, owner: int, x: int, y: int) -> Optional[_Structure]:
+        """The structure of the addon's family standing next to it"""
+        family = addon_name[:-len("Reactor")] if addon_name.endswith("Reactor") else addon_name[:-len("TechLab")]
+        px, py = x + ADDON_PARENT_OFFSET[0], y + ADDON_PARENT_OFFSET[1]
+        for structure in self.producers.get((owner, family), ()):
+            if structure.died is None and abs(structure.x - px) <= 1.5 and abs(structure.y - py) <= 1.5:
+                return structure
+        return None
+
+    def set_reactor(self, addon_id: int, parent: Optional[_Structure], second: float) -> None:
+        previous = self.reactor_parents.pop(addon_id, None)
+        if previous is not None and previous.reactor:
+            previous.reactor = False
+            self.change_capacity(previous, second, -1)
+        if parent is not None and not parent.reactor:
+            parent.reactor = True
+            parent.slot_ends[1] = max(parent.slot_ends[1], second)
+            self.reactor_parents[addon_id] = parent
+            self.change_capacity(parent, second, 1)
+
+    def feed(self, event) -> None:
+        """Process one tracker event; events must arrive in time order"""
+        name = event.name
+        second = event.second
+        if self.end is not None and second > self.end:
+            self.done = True
+            return
+        self.last_second = second
+        player_index, structures, addon_sites = self.player_index, self.structures, self.addon_sites
+        larva, eggs, deltas = self.larva, self.eggs, self.deltas
+
+        if name in ('UnitBornEvent', 'UnitInitEvent'):
+            owner = getattr(event, 'control_pid', None)
+            if owner not in player_index:
+                return
+            unit_name = event.unit_type_name
+            family = PRODUCER_FAMILIES.get(base_unit_type(unit_name))
+
+            if family is not None:
+                structure = self.add_structure(event, family, owner)
+                if name == 'UnitBornEvent':
+                    structure.ready = second
+                    self.change_capacity(structure, second, 1)
+
+            elif unit_name.endswith(("Reactor", "TechLab")):
+                addon_sites[event.unit_id] = (owner, event.x, event.y)
+                parent = self.parent_of(unit_name, owner, event.x, event.y)
+                if parent is not None and parent.ready is not None:
+                    addon = "Reactor" if unit_name.endswith("Reactor") else "TechLab"
+                    self.occupy(parent, second, second + ADDON_BUILD_TIMES[addon])
+                if unit_name in RESEARCH_FAMILIES:
+                    # Tech labs research for their structure, so they get intervals of their own
+                    self.add_structure(event, RESEARCH_FAMILIES[unit_name], owner, counted=False)
+
+            elif unit_name in RESEARCH_FAMILIES:
+                structure = self.add_structure(event, RESEARCH_FAMILIES[unit_name], owner, counted=False)
+                if name == 'UnitBornEvent':
+                    structure.ready = second
+
+            elif unit_name == 'Larva':
+                larva[event.unit_id] = player_index[owner]
+                deltas.append((player_index[owner], second, 2, 1))
+
+            else:
+                unit = stats_unit_type(unit_name)
+                producer = UNIT_PRODUCERS.get(unit)
+                if producer is None:
+                    return
+                structure = None
+                if name == 'UnitInitEvent':
+                    # Warped in: the warp gate is on cooldown from now
+                    cooldown = WARP_COOLDOWNS.get(unit)
+                    if cooldown:
+                        structure = self.place(owner, producer, second, second + cooldown)
+                else:
+                    structure = self.place(owner, producer, second - BUILD_TIMES[unit], second)
+                if structure is not None:
+                    structure.produced += 1
+
+        elif name == 'UpgradeCompleteEvent':
+            research = UPGRADE_RESEARCH.get(event.upgrade_type_name)
+            owner = getattr(event, 'pid', None)
+            if research is None or owner not in player_index:
+                return
+            seconds, family = research
+            structure = self.place(owner, family, second - seconds, second)
+            if structure is not None:
+                structure.researched += 1
+
+        elif name == 'UnitDoneEvent':
+            site = addon_sites.get(event.unit_id)
+            if site is not None:
+                unit_name = getattr(event.unit, 'name', "") or ""
+                if unit_name.endswith("Reactor"):
+                    self.set_reactor(event.unit_id, self.parent_of(unit_name, *site), second)
+            structure = structures.get(event.unit_id)
+            if structure is not None and structure.ready is None:
+                structure.ready = second
+                self.change_capacity(structure, second, 1)
+
+        elif name == 'UnitTypeChangeEvent':
+            unit_id = event.unit_id
+            unit_name = event.unit_type_name
+            if unit_id in larva:
+                if unit_name != 'Larva':
+                    eggs[unit_id] = larva.pop(unit_id)
+                    deltas.append((eggs[unit_id], second, 2, -1))
+            elif unit_id in eggs:
+                p_index = eggs.pop(unit_id)
+                if unit_name == 'Larva':
+                    # A cancelled egg turns back into larva
+                    larva[unit_id] = p_index
+                    deltas.append((p_index, second, 2, 1))
+            elif unit_id in addon_sites:
+                # Addons detach ("Reactor") and re-attach ("StarportReactor") as structures lift off and land
+                parent = self.parent_of(unit_name, *addon_sites[unit_id]) if unit_name.endswith("Reactor") \
+                    and unit_name != "Reactor" else None
+                self.set_reactor(unit_id, parent, second)
+            elif unit_id in structures:
+                structure = structures[unit_id]
+                morph = MORPH_TIMES.get(unit_name)
+                # Landing also changes the type; only a grounded command center morphs
+                if morph and structure.type_name == "CommandCenter" and structure.ready is not None:
+                    self.occupy(structure, max(structure.ready, second - morph), second)
+                structure.type_name = unit_name
+
+        elif name == 'UnitPositionsEvent':
+            # Flying structures land elsewhere; addons are matched by position
+            for unit_obj, (x, y) in event.units.items():
+                structure = structures.get(unit_obj.id)
+                if structure is not None:
+                    structure.x, structure.y = x, y
+
+        elif name == 'UnitDiedEvent':
+            unit_id = event.unit_id
+            if unit_id in larva:
+                deltas.append((larva.pop(unit_id), second, 2, -1))
+            elif unit_id in addon_sites:
+                self.set_reactor(unit_id, None, second)
+                del addon_sites[unit_id]
+            if unit_id in structures:
+                structure = structures.pop(unit_id)
+                self.change_capacity(structure, second, -(2 if structure.reactor else 1))
+                # Production cut short by the death stops counting as in use
+                for slot in range(2 if structure.reactor else 1):
+                    if structure.counted and structure.slot_ends[slot] > second:
+                        deltas.append((player_index[structure.owner], second, 1, -1))
+                        deltas.append((player_index[structure.owner], structure.slot_ends[slot], 1, 1))
+                structure.died = second
+            eggs.pop(unit_id, None)
+
+    def finish(self) -> Dict[str, Any]:
+        if np is None:
+            return {"error": "numpy not installed. Run: pip install numpy"}
+
+        game_end = self.last_second if self.end is None else self.end
+        return _summarize(self.pids, self.producers, self.deltas, self.bucket_seconds, self.start or 0,
+                          game_end, self.start)
+
+
+def extract_production(replay, bucket_seconds: int = DEFAULT_BUCKET_SECONDS,
+                       start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Per structure busy and idle seconds, per player totals by producer type,
+    and capacity, in-use and larva curves. With start/end (seconds) busy and
+    idle time are clipped to the window and only its buckets are returned.
+    """
+    if not hasattr(replay, 'tracker_events'):
+        return {}
+    return run_builder(ProductionBuilder(bucket_seconds, start, end), replay)
+
+
+def _summarize(pids: List[int], producers: Dict[Tuple[int, str], List[_Structure]],
+               deltas: List[Tuple[int, float, int, int]], bucket_seconds: int,
+               low: float, high: float, start: Optional[float]) -> Dict[str, Any]:
+    families: List[str] = []
+    family_codes: Dict[str, int] = {}
+    columns: Dict[str, List[Any]] = {
+        "unit_id": [], "type": [], "owner": [], "ready": [], "died": [],
+        "busy_seconds": [], "idle_seconds": [], "produced": [], "researched": [],
+    }
+    by_player: Dict[str, Dict[str, Dict[str, Any]]] = {str(pid): {} for pid in pids}
+
+    for (owner, family), group in producers.items():
+        totals = by_player[str(owner)].setdefault(family, {
+            "structures": 0, "busy_seconds": 0.0, "idle_seconds": 0.0, "produced": 0, "researched": 0})
+        for structure in group:
+            if structure.ready is None:
+                continue
+            alive_from = max(structure.ready, low)
+            alive_to = min(structure.died if structure.died is not None else high, high)
+            if alive_to <= alive_from:
+                continue
+            busy = covered_seconds(merge_intervals(structure.intervals), alive_from, alive_to)
+            idle = (alive_to - alive_from) - busy
+
+            code = family_codes.get(family)
+            if code is None:
+                code = family_codes[family] = len(families)
+                families.append(family)
+            columns["unit_id"].append(structure.unit_id)
+            columns["type"].append(code)
+            columns["owner"].append(owner)
+            columns["ready"].append(structure.ready)
+            columns["died"].append(structure.died if structure.died is not None else MISSING)
+            columns["busy_seconds"].append(round(busy, 1))
+            columns["idle_seconds"].append(round(idle, 1))
+            columns["produced"].append(structure.produced)
+            columns["researched"].append(structure.researched)
+
+            totals["structures"] += 1
+            totals["busy_seconds"] += busy
+            totals["idle_seconds"] += idle
+            totals["produced"] += structure.produced
+            totals["researched"] += structure.researched
+
+    for families_totals in by_player.values():
+        for totals in families_totals.values():
+            alive = totals["busy_seconds"] + totals["idle_seconds"]
+            totals["idle_fraction"] = round(totals["idle_seconds"] / alive, 3) if alive else 0.0
+            totals["busy_seconds"] = round(totals["busy_seconds"], 1)
+            totals["idle_seconds"] = round(totals["idle_seconds"], 1)
+
+    # Curves: deltas at t change every bucket boundary >= t
+    n_buckets = int(high // bucket_seconds) + 1
+    curves = np.zeros((3, len(pids), n_buckets + 1), dtype=np.int32)
+    if deltas:
+        d = np.asarray(deltas, dtype=np.float64)
+        buckets = np.clip(np.ceil(d[:, 1] / bucket_seconds), 0, n_buckets).astype(np.int64)
+        np.add.at(curves, (d[:, 2].astype(np.int64), d[:, 0].astype(np.int64), buckets), d[:, 3].astype(np.int32))
+    curves = np.clip(np.cumsum(curves, axis=2)[:, :, :n_buckets], 0, None)
+    # A morph placed after the fact can overlap units already placed on the same slots
+    curves[1] = np.minimum(curves[1], curves[0])
+
+    # Unspent larva: integral of the larva count, from the per-bucket samples
+    larva_seconds = curves[2].sum(axis=1) * bucket_seconds
+    first_bucket = 0
+    if start is not None:
+        first_bucket = min(n_buckets, -(-int(start) // bucket_seconds))
+        curves = curves[:, :, first_bucket:]
+        larva_seconds = curves[2].sum(axis=1) * bucket_seconds
+
+    for i, pid in enumerate(pids):
+        if larva_seconds[i]:
+            by_player[str(pid)]["Larva"] = {
+                "unspent_larva_seconds": int(larva_seconds[i]),
+                "mean_unspent_larva": round(float(curves[2][i].mean()), 2) if curves.shape[2] else 0.0,
+            }
+
+    return {
+        "bucket_seconds": bucket_seconds,
+        "first_bucket": first_bucket,
+        "players": [str(pid) for pid in pids],
+        "structure_types": families,
+        "structures": columns,
+        "by_player": by_player,
+        "capacity": encode_array(curves[0].astype(np.uint16)),
+        "in_use": encode_array(curves[1].astype(np.uint16)),
+        "larva": encode_array(curves[2].astype(np.uint16)),
+    }
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+SC2 Replay Directory Scanner
+
+This script builds a metadata manifest (map, players, races, duration, date)
+for every replay in a directory without running a full analysis. Only the MPQ
+header and the details/initData/attributes files are read, and results are
+cached by (path, size, mtime) so repeated scans only parse new or changed files.
+Files that failed to scan are not cached and are retried on every scan.
+
+Usage: python scan_replays.py [replays_dir] [--manifest PATH] [--workers N] [--rescan]
+"""
+
+import sys
+import json
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import sc2reader
+except ImportError:
+    print(json.dumps({"error": "sc2reader not installed. Run: pip install sc2reader"}))
+    sys.exit(1)
+
+from game_info import extract_game_info
+from fingerprint import fingerprint_replay
+
+MANIFEST_VERSION = 2
+MANIFEST_FILENAME = ".replay_manifest.json"
+REPLAY_EXTENSION = ".SC2Replay"
+
+# Below this many uncached files the process pool startup costs more than it saves
+MIN_FILES_FOR_POOL = 16
+
+
+def scan_replay(replay_path: str) -> Dict[str, Any]:
+    """Read header-level metadata for a single replay"""
+    try:
+        # load_level=1 reads the header, details, initData and attributes only;
+        # players can be built from those without decoding any event stream
+        replay = sc2reader.load_replay(replay_path, load_level=1, engine=None)
+        replay.load_players()
+
+        players = []
+        for player in replay.players:
+            players.append({
+                "pid": player.pid,
+                "name": player.name,
+                "race": player.pick_race if hasattr(player, 'pick_race') else player.play_race,
+                "team": player.team_id if hasattr(player, 'team_id') else 0,
+                "result": player.result,
+                "toon_handle": getattr(player, 'toon_handle', None),
+            })
+
+        metadata = extract_game_info(replay, replay_path)
+        metadata.update({
+            "region": getattr(replay, 'region', ""),
+            "game_type": getattr(replay, 'game_type', ""),
+            "fingerprint": fingerprint_replay(replay),
+            "players": players,
+        })
+        return metadata
+
+    except Exception as e:
+        return {
+            "filename": os.path.basename(replay_path),
+            "error": f"Error scanning replay: {str(e)}",
+        }
+
+
+def _file_key(replay_path: str) -> Tuple[int, float]:
+    """Cache key for a replay file: (size, mtime)"""
+    stat = os.stat(replay_path)
+    return stat.st_size, stat.st_mtime
+
+
+def load_manifest(manifest_path: str) -> Dict[str, Any]:
+    """Load an existing manifest, or return an empty one"""
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "replays": {}}
+
+
+def save_manifest(manifest: Dict[str, Any], manifest_path: str) -> None:
+    """Write the manifest atomically so a crash never leaves a truncated file"""
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp_path, manifest_path)
+
+
+def list_replay_files(replays_dir: str) -> List[str]:
+    """List replay file names in a directory, sorted by name"""
+    return sorted(
+        entry.name for entry in os.scandir(replays_dir)
+        if entry.is_file() and entry.name.endswith(REPLAY_EXTENSION)
+    )
+
+
+def scan_directory(replays_dir: str, manifest_path: Optional[str] = None,
+                   workers: Optional[int] = None, rescan: bool = False) -> Dict[str, Any]:
+    """
+    Scan every replay in a directory, reusing cached manifest entries whose
+    size and mtime are unchanged (except failed scans), and write the updated
+    manifest back to disk
+    """
+    if manifest_path is None:
+        manifest_path = os.path.join(replays_dir, MANIFEST_FILENAME)
+
+    manifest = {"version": MANIFEST_VERSION, "replays": {}} if rescan else load_manifest(manifest_path)
+    cached = manifest["replays"]
+
+    entries: Dict[str, Any] = {}
+    pending: List[Tuple[str, Tuple[int, float]]] = []
+
+    for filename in list_replay_files(replays_dir):
+        replay_path = os.path.join(replays_dir, filename)
+        size, mtime = _file_key(replay_path)
+        entry = cached.get(filename)
+        # Failures may be transient or fixed by an sc2reader upgrade, so they are always retried
+        if entry and "error" not in entry and entry.get("size") == size and entry.get("mtime") == mtime:
+            entries[filename] = entry
+        else:
+            pending.append((filename, (size, mtime)))
+
+    if pending:
+        paths = [os.path.join(replays_dir, filename) for filename, _ in pending]
+        workers = workers or os.cpu_count() or 1
+
+        if workers > 1 and len(paths) >= MIN_FILES_FOR_POOL:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(scan_replay, paths, chunksize=8))
+        else:
+            results = [scan_replay(path) for path in paths]
+
+        for (filename, (size, mtime)), metadata in zip(pending, results):
+            metadata["size"] = size
+            metadata["mtime"] = mtime
+            entries[filename] = metadata
+
+    # Entries for deleted files are dropped by rebuilding from the directory listing
+    changed = bool(pending) or len(entries) != len(cached)
+    manifest = {"version": MANIFEST_VERSION, "replays": entries}
+    if changed:
+        save_manifest(manifest, manifest_path)
+
+    return {
+        "success": True,
+        "manifest_path": manifest_path,
+        "scanned": len(pending),
+        "cached": len(entries) - len(pending),
+        "replays": [dict(entry, filename=filename) for filename, entry in entries.items()],
+    }
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Scan replay metadata into a cached manifest")
+    parser.add_argument("replays_dir", nargs="?", default="replays")
+    parser.add_argument("--manifest", help=f"Manifest path (default: <replays_dir>/{MANIFEST_FILENAME})")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--rescan", action="store_true", help="Ignore the cached manifest")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.replays_dir):
+        print(json.dumps({"error": f"Replay directory not found: {args.replays_dir}"}))
+        sys.exit(1)
+
+    result = scan_directory(args.replays_dir, args.manifest, args.workers, args.rescan)
+
+    # Output JSON to stdout for Node.js to capture
+    print(json.dumps(result))
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
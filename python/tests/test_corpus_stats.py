@@ -0,0 +1,37 @@
+import json
+
+from corpus_stats import COLUMNS, CorpusTable
+
+
+def _row(filename, player, win, apm):
+    row = {name: "" if dtype == "str" else 0 for name, dtype in COLUMNS.items()}
+    row.update(filename=filename, player=player, win=win, apm=apm)
+    return row
+
+
+def _table(tmp_path):
+    table = CorpusTable(str(tmp_path / "stats.npz"))
+    table.upsert([
+        _row("a.SC2Replay", "Serral", 1, 300),
+        _row("b.SC2Replay", "Serral", 0, 340),
+        _row("c.SC2Replay", "Clem", -1, 400),
+    ])
+    return table
+
+
+def test_same_column_aggregated_twice(tmp_path):
+    rows = _table(tmp_path).query(where={"player": "Serral"}, agg=[("apm", "mean"), ("apm", "max"), ("games", "count")])
+    assert rows == [{"apm_mean": 320.0, "apm_max": 340.0, "games": 2}]
+
+
+def test_empty_groups_are_valid_json(tmp_path):
+    rows = _table(tmp_path).query(group_by=["player"], agg=[("win", "mean"), ("win", "min"), ("win", "max")])
+    clem = next(row for row in rows if row["player"] == "Clem")
+    assert clem == {"player": "Clem", "win_mean": None, "win_min": None, "win_max": None}
+    json.loads(json.dumps(rows, allow_nan=False))
+
+
+def test_group_by_numeric_column(tmp_path):
+    rows = _table(tmp_path).query(group_by=["win"], agg=[("apm", "mean"), ("games", "count")])
+    assert rows == [{"win": -1, "apm_mean": 400.0, "games": 1}, {"win": 0, "apm_mean": 340.0, "games": 1},
+                    {"win": 1, "apm_mean": 300.0, "games": 1}]
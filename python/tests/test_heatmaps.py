@@ -0,0 +1,16 @@
+import numpy as np
+
+from compact_arrays import encode_array
+from heatmaps import LAYERS, PHASES, sum_heatmaps
+
+
+def _heatmap(height, width, value):
+    grids = np.full((2, len(LAYERS), len(PHASES), height, width), value, dtype=np.uint16)
+    return {"grids": encode_array(grids, compress=True)}
+
+
+def test_mismatched_shapes_are_reported():
+    total, skipped = sum_heatmaps([_heatmap(4, 4, 1), {}, _heatmap(8, 8, 5), _heatmap(4, 4, 2)], layer="army")
+    assert skipped == [2]
+    assert total.shape == (len(PHASES), 4, 4)
+    assert int(total[0, 0, 0]) == 6
@@ -0,0 +1,20 @@
+from unit_catalog import (PRODUCER_FAMILIES, RESEARCH_FAMILIES, UPGRADE_RESEARCH, is_building, unit_category,
+                          unit_supply, stats_unit_type)
+
+
+def test_protoss_structures_are_buildings():
+    for name in ("WarpGate", "RoboticsFacility", "TemplarArchive"):
+        assert is_building(name)
+    assert unit_category("WarpGate") == "building"
+
+
+def test_overseer_is_costed_army_without_supply():
+    assert unit_category("Overseer") == "army"
+    assert stats_unit_type("OverseerSiegeMode") == "Overseer"
+    assert unit_supply("Overseer") == 0
+
+
+def test_upgrades_are_researched_by_known_structures():
+    families = set(PRODUCER_FAMILIES.values()) | set(RESEARCH_FAMILIES.values())
+    assert {family for _, family in UPGRADE_RESEARCH.values()} <= families
+    assert UPGRADE_RESEARCH["ProtossShieldsLevel2"] == (154, "Forge")
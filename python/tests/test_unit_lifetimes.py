@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from unit_lifetimes import UnitLifetimeIndex, extract_unit_lifetimes
+
+
+def _event(name, second, **fields):
+    return SimpleNamespace(name=name, second=second, **fields)
+
+
+def _replay(events):
+    player = SimpleNamespace(pid=1, result="Win")
+    return SimpleNamespace(players=[player], tracker_events=events)
+
+
+def test_composition_follows_morphs():
+    replay = _replay([
+        _event("UnitBornEvent", 10, unit_id=1, unit_type_name="Roach", control_pid=1),
+        _event("UnitBornEvent", 12, unit_id=2, unit_type_name="Roach", control_pid=1),
+        _event("UnitTypeChangeEvent", 30, unit_id=1, unit_type_name="RavagerCocoon"),
+        _event("UnitTypeChangeEvent", 42, unit_id=1, unit_type_name="Ravager"),
+    ])
+    index = UnitLifetimeIndex(extract_unit_lifetimes(replay))
+
+    assert index.composition_at(20, owner=1) == {"Roach": 2}
+    assert index.composition_at(35, owner=1) == {"Roach": 1, "RavagerCocoon": 1}
+    assert index.composition_at(50, owner=1) == {"Roach": 1, "Ravager": 1}
+
+
+def test_window_keeps_morphs_of_kept_units_only():
+    replay = _replay([
+        _event("UnitBornEvent", 10, unit_id=1, unit_type_name="Overlord", control_pid=1),
+        _event("UnitBornEvent", 11, unit_id=2, unit_type_name="Overlord", control_pid=1),
+        _event("UnitTypeChangeEvent", 20, unit_id=1, unit_type_name="Overseer"),
+        _event("UnitDiedEvent", 25, unit_id=1, killer_pid=2, killing_unit_id=9),
+        _event("UnitTypeChangeEvent", 40, unit_id=2, unit_type_name="Overseer"),
+    ])
+    lifetimes = extract_unit_lifetimes(replay, start=30)
+
+    assert lifetimes["columns"]["unit_id"] == [2]
+    assert lifetimes["morphs"]["unit_id"] == [2]
+    assert UnitLifetimeIndex(lifetimes).composition_at(45) == {"Overseer": 1}
@@ -0,0 +1,231 @@
+"""
+Unit Trajectories
+
+Builds each mobile unit's path (birth or warp-in location, periodic
+UnitPositionsEvent samples, death location) in one pass over the tracker
+events and simplifies it with Douglas-Peucker at a tolerance in map tiles.
+Simplified paths of all units are concatenated into flat coordinate and
+timestamp arrays; per unit columns hold each path's offset and length, so
+the viewer draws a path from a slice instead of rebuilding it from the time
+series frames.
+
+TrajectoryIndex answers "the path of unit u" in O(1) and "the paths active
+during [t0, t1]" with the interval tree from unit_lifetimes.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from compact_arrays import encode_array, decode_array
+from engine_plugins import run_builder
+from unit_catalog import is_game_unit, is_building
+from unit_lifetimes import UnitLifetimeIndex
+
+# Maximum distance in map tiles a dropped point may lie from the simplified path
+DEFAULT_TOLERANCE = 1.0
+
+# Short-lived ability projectiles that are units to sc2reader but not worth a path
+TRANSIENT_TYPES = {"AdeptPhaseShift", "DisruptorPhased"}
+
+
+def simplify_path(xs, ys, tolerance: float) -> List[int]:
+    """Indices of the points Douglas-Peucker keeps; the first and last are always kept"""
+    n = len(xs)
+    if n <= 2:
+        return list(range(n))
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        px = xs[first + 1:last] - xs[first]
+        py = ys[first + 1:last] - ys[first]
+        dx = xs[last] - xs[first]
+        dy = ys[last] - ys[first]
+        length = np.hypot(dx, dy)
+        if length > 0:
+            # Perpendicular distance to the chord
+            distances = np.abs(px * dy - py * dx) / length
+        else:
+            # Closed loop: distance to the shared end point
+            distances = np.hypot(px, py)
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return np.flatnonzero(keep).tolist()
+
+
+def is_mobile(unit_name: str) -> bool:
+    """Player units that move and are worth a path"""
+    return is_game_unit(unit_name) and not is_building(unit_name) and unit_name not in TRANSIENT_TYPES
+
+
+class TrajectoryBuilder:
+    """Collects position samples per unit one tracker event at a time; see extract_trajectories"""
+
+    def __init__(self, tolerance: float = DEFAULT_TOLERANCE, start: Optional[float] = None,
+                 end: Optional[float] = None,
+                 keep_unit: Optional[Callable[[str, int], bool]] = None):
+        self.tolerance = tolerance
+        self.start = start
+        self.end = end
+        self.keep_unit = keep_unit
+        self.done = False
+
+    def begin(self, replay) -> None:
+        self.pids = {player.pid for player in replay.players
+                     if hasattr(player, 'result') and player.result != 'Unknown'}
+        self.unit_types: List[str] = []
+        self.type_codes: Dict[str, int] = {}
+        self.units: List[List[int]] = []                     # [unit_id, type code, owner]
+        self.rows: Dict[int, List[int]] = {}                 # unit_id -> its units entry
+        self.samples: Dict[int, List[Tuple[int, int, int]]] = {}  # unit_id -> [(second, x, y)]
+
+    def type_code(self, unit_name: str) -> int:
+        code = self.type_codes.get(unit_name)
+        if code is None:
+            code = self.type_codes[unit_name] = len(self.unit_types)
+            self.unit_types.append(unit_name)
+        return code
+
+    def add_sample(self, unit_id: int, second: int, x: int, y: int) -> None:
+        path = self.samples.get(unit_id)
+        if path is None or (self.start is not None and second < self.start):
+            return
+        if path and path[-1][1] == x and path[-1][2] == y:
+            return
+        path.append((second, x, y))
+
+    def feed(self, event) -> None:
+        """Process one tracker event; events must arrive in time order"""
+        name = event.name
+        second = event.second
+        if self.end is not None and second > self.end:
+            self.done = True
+            return
+
+        if name in ('UnitBornEvent', 'UnitInitEvent'):
+            # Warped-in units start with a UnitInitEvent
+            unit_name = event.unit_type_name
+            if event.control_pid not in self.pids or not is_mobile(unit_name) or event.unit_id in self.samples:
+                return
+            if self.keep_unit is not None and not self.keep_unit(unit_name, event.control_pid):
+                return
+            row = [event.unit_id, self.type_code(unit_name), event.control_pid]
+            self.units.append(row)
+            self.rows[event.unit_id] = row
+            self.samples[event.unit_id] = []
+            self.add_sample(event.unit_id, second, event.x, event.y)
+
+        elif name == 'UnitTypeChangeEvent':
+            # Paths are typed by the unit's latest type (Ravager, not Roach)
+            row = self.rows.get(event.unit_id)
+            if row is not None and is_mobile(event.unit_type_name):
+                row[1] = self.type_code(event.unit_type_name)
+
+        elif name == 'UnitPositionsEvent':
+            for unit_obj, (x, y) in event.units.items():
+                self.add_sample(unit_obj.id, second, x, y)
+
+        elif name == 'UnitDiedEvent':
+            if event.unit_id in self.samples and getattr(event, 'x', None) is not None:
+                self.add_sample(event.unit_id, second, event.x, event.y)
+
+    def finish(self) -> Dict[str, Any]:
+        if np is None:
+            return {"error": "numpy not installed. Run: pip install numpy"}
+
+        columns: Dict[str, List[int]] = {"unit_id": [], "type": [], "owner": [], "offset": [], "length": []}
+        kept_xs: List[Any] = []
+        kept_ys: List[Any] = []
+        kept_times: List[Any] = []
+        offset = 0
+        for unit_id, code, owner in self.units:
+            path = self.samples[unit_id]
+            if not path:
+                continue
+            times, xs, ys = (np.asarray(values, dtype=np.float64) for values in zip(*path))
+            keep = simplify_path(xs, ys, self.tolerance)
+            columns["unit_id"].append(unit_id)
+            columns["type"].append(code)
+            columns["owner"].append(owner)
+            columns["offset"].append(offset)
+            columns["length"].append(len(keep))
+            kept_xs.append(xs[keep])
+            kept_ys.append(ys[keep])
+            kept_times.append(times[keep])
+            offset += len(keep)
+
+        xs = np.concatenate(kept_xs) if kept_xs else np.zeros(0)
+        ys = np.concatenate(kept_ys) if kept_ys else np.zeros(0)
+        times = np.concatenate(kept_times) if kept_times else np.zeros(0)
+        return {
+            "tolerance": self.tolerance,
+            "unit_types": self.unit_types,
+            "columns": columns,
+            "points": encode_array(np.stack([xs, ys], axis=1).astype(np.uint16), compress=True),
+            "times": encode_array(times.astype(np.uint16), compress=True),
+        }
+
+
+def extract_trajectories(replay, tolerance: float = DEFAULT_TOLERANCE, start: Optional[float] = None,
+                         end: Optional[float] = None,
+                         keep_unit: Optional[Callable[[str, int], bool]] = None) -> Dict[str, Any]:
+    """
+    Simplified paths of every player-owned mobile unit. With start/end
+    (seconds) only samples inside the window are kept. keep_unit (see
+    unit_catalog.unit_filter) selects units by type and owner.
+    """
+    if not hasattr(replay, 'tracker_events'):
+        return {}
+    return run_builder(TrajectoryBuilder(tolerance, start, end, keep_unit), replay)
+
+
+class TrajectoryIndex:
+    """Lookup of simplified paths by unit ID and by time range"""
+
+    def __init__(self, trajectories: Dict[str, Any]):
+        self.unit_types: List[str] = trajectories.get("unit_types", [])
+        self.columns: Dict[str, List[int]] = trajectories.get("columns", {})
+        self.points = decode_array(trajectories["points"]).tolist() if "points" in trajectories else []
+        self.times = decode_array(trajectories["times"]).tolist() if "times" in trajectories else []
+        self.rows: Dict[int, int] = {unit_id: row for row, unit_id in enumerate(self.columns.get("unit_id", []))}
+
+        # A path spans its first to last sample; the interval tree wants [start, end) so end is exclusive
+        offsets, lengths = self.columns.get("offset", []), self.columns.get("length", [])
+        first = [self.times[offset] for offset in offsets]
+        last = [self.times[offset + length - 1] + 1 for offset, length in zip(offsets, lengths)]
+        self._spans = UnitLifetimeIndex({"columns": {"born": first, "died": last}})
+
+    def path(self, unit_id: int, t0: Optional[float] = None,
+             t1: Optional[float] = None) -> List[Tuple[int, int, int]]:
+        """(second, x, y) vertices of a unit's path, optionally only those inside [t0, t1]"""
+        row = self.rows.get(unit_id)
+        if row is None:
+            return []
+        offset = self.columns["offset"][row]
+        stop = offset + self.columns["length"][row]
+        times = self.times
+        if t0 is not None:
+            offset = bisect_left(times, t0, offset, stop)
+        if t1 is not None:
+            stop = bisect_right(times, t1, offset, stop)
+        return [(times[i], self.points[i][0], self.points[i][1]) for i in range(offset, stop)]
+
+    def active(self, t0: float, t1: float, owner: Optional[int] = None) -> List[int]:
+        """Unit IDs whose path has samples spanning any point of [t0, t1]"""
+        owners = self.columns["owner"]
+        unit_ids = self.columns["unit_id"]
+        return sorted(unit_ids[row] for row in self._spans.overlapping(t0, t1)
+                      if owner is None or owners[row] == owner)
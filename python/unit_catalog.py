@@ -0,0 +1,311 @@
+"""
+SC2 Unit Catalog
+
+Shared knowledge about unit type names as they appear in sc2reader tracker
+events: which names are real game units, which are buildings, which coarse
+category (worker, army, building, creep) a unit belongs to, the supply
+and resource cost of workers and army units, which structure trains a
+unit and for how long, and which neutral units are base resources.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+UNIT_CATEGORIES: List[str] = ["worker", "army", "building", "creep"]
+
+WORKER_TYPES = {"SCV", "Probe", "Drone", "MULE", "DroneBurrowed"}
+
+BUILDING_TYPES = frozenset({
+    # Terran buildings
+    "CommandCenter", "OrbitalCommand", "PlanetaryFortress", "SupplyDepot",
+    "Barracks", "Factory", "Starport", "EngineeringBay", "Armory", "Refinery",
+    "Bunker", "MissileTurret", "SensorTower", "TechLab", "Reactor", "Academy",
+    "FusionCore", "GhostAcademy", "RefineryRich",
+
+    # Protoss buildings
+    "Nexus", "Pylon", "Gateway", "WarpGate", "Assimilator", "Forge",
+    "PhotonCannon", "CyberneticsCore", "Stargate", "RoboticsFacility", "RoboticsBay",
+    "FleetBeacon", "TemplarArchive", "DarkShrine", "TwilightCouncil", "ShieldBattery", "AssimilatorRich",
+
+    # Zerg buildings
+    "Hatchery", "Lair", "Hive", "Extractor", "SpawningPool", "EvolutionChamber",
+    "RoachWarren", "BanelingNest", "CreepTumor", "SpineCrawler", "SporeCrawler",
+    "HydraliskDen", "LurkerDen", "LurkerDenMP", "Infestation", "InfestationPit",
+    "Spire", "GreaterSpire", "NydusNetwork", "NydusCanal", "UltraliskCavern", "ExtractorRich",
+})
+
+# Units that never fight and would otherwise be lumped in with the army
+NON_ARMY_TYPES = {
+    "Larva", "Egg", "BroodlingEscort", "Overlord", "OverlordTransport",
+    "OverlordCocoon", "TransportOverlordCocoon", "BanelingCocoon",
+    "RavagerCocoon", "BroodLordCocoon", "LurkerMPEgg", "KD8Charge",
+}
+
+# (minerals, gas, supply) of workers and army units. Morphed units include the
+# cost of what they morphed from, so a count times its cost is the value on the field.
+UNIT_STATS: Dict[str, Tuple[int, int, float]] = {
+    # Terran
+    "SCV": (50, 0, 1), "MULE": (0, 0, 0),
+    "Marine": (50, 0, 1), "Marauder": (100, 25, 2), "Reaper": (50, 50, 1), "Ghost": (150, 125, 2),
+    "Hellion": (100, 0, 2), "HellionTank": (100, 0, 2), "WidowMine": (75, 25, 2),
+    "SiegeTank": (150, 125, 3), "Cyclone": (125, 50, 3), "Thor": (300, 200, 6),
+    "Viking": (150, 75, 2), "Medivac": (100, 100, 2), "Liberator": (150, 125, 3),
+    "Raven": (100, 150, 2), "Banshee": (150, 100, 3), "Battlecruiser": (400, 300, 6),
+
+    # Protoss
+    "Probe": (50, 0, 1),
+    "Zealot": (100, 0, 2), "Stalker": (125, 50, 2), "Sentry": (50, 100, 2), "Adept": (100, 25, 2),
+    "HighTemplar": (50, 150, 2), "DarkTemplar": (125, 125, 2), "Archon": (100, 300, 4),
+    "Immortal": (275, 100, 4), "Colossus": (300, 200, 6), "Disruptor": (150, 150, 3),
+    "Observer": (25, 75, 1), "WarpPrism": (250, 0, 2), "Phoenix": (150, 100, 2),
+    "VoidRay": (250, 150, 4), "Oracle": (150, 150, 3), "Tempest": (250, 175, 5),
+    "Carrier": (350, 250, 6), "Mothership": (400, 400, 8),
+
+    # Zerg
+    "Drone": (50, 0, 1),
+    "Queen": (150, 0, 2), "Zergling": (25, 0, 0.5), "Baneling": (50, 25, 0.5),
+    "Roach": (75, 25, 2), "Ravager": (100, 100, 3), "Hydralisk": (100, 50, 2),
+    "Lurker": (150, 150, 3), "Infestor": (100, 150, 2), "SwarmHost": (100, 75, 3),
+    "Ultralisk": (275, 200, 6), "Mutalisk": (100, 100, 2), "Corruptor": (150, 100, 2),
+    "BroodLord": (300, 250, 4), "Viper": (100, 200, 3), "Overseer": (150, 50, 0),
+}
+
+# Seconds (Faster speed) a structure spends training a unit
+BUILD_TIMES: Dict[str, int] = {
+    # Terran
+    "SCV": 12, "Marine": 18, "Marauder": 21, "Reaper": 32, "Ghost": 29,
+    "Hellion": 21, "HellionTank": 21, "WidowMine": 21, "SiegeTank": 32, "Cyclone": 32, "Thor": 43,
+    "Viking": 30, "Medivac": 30, "Liberator": 43, "Raven": 34, "Banshee": 43, "Battlecruiser": 64,
+
+    # Protoss
+    "Probe": 12, "Zealot": 27, "Stalker": 30, "Sentry": 26, "Adept": 30, "HighTemplar": 39, "DarkTemplar": 39,
+    "Immortal": 39, "Colossus": 54, "Disruptor": 36, "Observer": 21, "WarpPrism": 36,
+    "Phoenix": 25, "VoidRay": 37, "Oracle": 37, "Tempest": 43, "Carrier": 64, "Mothership": 89,
+
+    # Zerg (larva units are not trained by a structure)
+    "Queen": 36,
+}
+
+# Seconds a warp gate is on cooldown after warping a unit in
+WARP_COOLDOWNS: Dict[str, int] = {
+    "Zealot": 20, "Stalker": 23, "Sentry": 23, "Adept": 20, "HighTemplar": 32, "DarkTemplar": 32,
+}
+
+# Production structure that trains each unit in BUILD_TIMES
+UNIT_PRODUCERS: Dict[str, str] = {
+    "SCV": "CommandCenter", "Probe": "Nexus", "Mothership": "Nexus", "Queen": "Hatchery",
+    **{name: "Barracks" for name in ("Marine", "Marauder", "Reaper", "Ghost")},
+    **{name: "Factory" for name in ("Hellion", "HellionTank", "WidowMine", "SiegeTank", "Cyclone", "Thor")},
+    **{name: "Starport" for name in ("Viking", "Medivac", "Liberator", "Raven", "Banshee", "Battlecruiser")},
+    **{name: "Gateway" for name in ("Zealot", "Stalker", "Sentry", "Adept", "HighTemplar", "DarkTemplar")},
+    **{name: "RoboticsFacility" for name in ("Immortal", "Colossus", "Disruptor", "Observer", "WarpPrism")},
+    **{name: "Stargate" for name in ("Phoenix", "VoidRay", "Oracle", "Tempest", "Carrier")},
+}
+
+# Structure types (any mode) that count as each producer in UNIT_PRODUCERS
+PRODUCER_FAMILIES: Dict[str, str] = {
+    "CommandCenter": "CommandCenter", "OrbitalCommand": "CommandCenter", "PlanetaryFortress": "CommandCenter",
+    "Barracks": "Barracks", "Factory": "Factory", "Starport": "Starport",
+    "Nexus": "Nexus", "Gateway": "Gateway", "WarpGate": "Gateway",
+    "RoboticsFacility": "RoboticsFacility", "Stargate": "Stargate",
+    "Hatchery": "Hatchery", "Lair": "Hatchery", "Hive": "Hatchery",
+}
+
+# Structure types (any mode) that research upgrades but train no units in UNIT_PRODUCERS
+RESEARCH_FAMILIES: Dict[str, str] = {
+    **{name: name for name in (
+        "EngineeringBay", "Armory", "GhostAcademy", "FusionCore", "BarracksTechLab", "FactoryTechLab",
+        "StarportTechLab", "Forge", "CyberneticsCore", "TwilightCouncil", "TemplarArchive", "DarkShrine",
+        "RoboticsBay", "FleetBeacon", "SpawningPool", "EvolutionChamber", "RoachWarren", "BanelingNest",
+        "HydraliskDen", "InfestationPit", "UltraliskCavern", "Spire")},
+    "GreaterSpire": "Spire", "LurkerDen": "LurkerDen", "LurkerDenMP": "LurkerDen",
+}
+
+_LEVELS = {"Terran": ((1, 114), (2, 136), (3, 157)), "Protoss": ((1, 129), (2, 154), (3, 179)),
+           "Zerg": ((1, 114), (2, 136), (3, 157))}
+
+# (seconds at Faster speed, structure family) of each upgrade sc2reader reports in
+# UpgradeCompleteEvent. Families are PRODUCER_FAMILIES or RESEARCH_FAMILIES values.
+UPGRADE_RESEARCH: Dict[str, Tuple[int, str]] = {
+    # Terran
+    **{f"TerranInfantry{kind}Level{level}": (seconds, "EngineeringBay")
+       for kind in ("Weapons", "Armors") for level, seconds in _LEVELS["Terran"]},
+    **{f"Terran{kind}Level{level}": (seconds, "Armory")
+       for kind in ("VehicleWeapons", "ShipWeapons", "VehicleAndShipArmors") for level, seconds in _LEVELS["Terran"]},
+    "HiSecAutoTracking": (57, "EngineeringBay"), "TerranBuildingArmor": (100, "EngineeringBay"),
+    "Stimpack": (100, "BarracksTechLab"), "ShieldWall": (79, "BarracksTechLab"),
+    "PunisherGrenades": (43, "BarracksTechLab"),
+    "HighCapacityBarrels": (79, "FactoryTechLab"), "DrillClaws": (79, "FactoryTechLab"),
+    "CycloneLockOnDamageUpgrade": (100, "FactoryTechLab"), "SmartServos": (79, "FactoryTechLab"),
+    "BansheeCloak": (79, "StarportTechLab"), "BansheeSpeed": (100, "StarportTechLab"),
+    "PersonalCloaking": (86, "GhostAcademy"), "BattlecruiserEnableSpecializations": (100, "FusionCore"),
+
+    # Protoss
+    **{f"ProtossGround{kind}Level{level}": (seconds, "Forge")
+       for kind in ("Weapons", "Armors") for level, seconds in _LEVELS["Protoss"]},
+    **{f"ProtossShieldsLevel{level}": (seconds, "Forge") for level, seconds in _LEVELS["Protoss"]},
+    **{f"ProtossAir{kind}Level{level}": (seconds, "CyberneticsCore")
+       for kind in ("Weapons", "Armors") for level, seconds in _LEVELS["Protoss"]},
+    "WarpGateResearch": (100, "CyberneticsCore"),
+    "Charge": (100, "TwilightCouncil"), "BlinkTech": (121, "TwilightCouncil"),
+    "AdeptPiercingAttack": (100, "TwilightCouncil"), "PsiStormTech": (79, "TemplarArchive"),
+    "DarkTemplarBlinkUpgrade": (100, "DarkShrine"),
+    "ExtendedThermalLance": (100, "RoboticsBay"), "ObserverGraviticBooster": (57, "RoboticsBay"),
+    "GraviticDrive": (57, "RoboticsBay"),
+    "PhoenixRangeUpgrade": (64, "FleetBeacon"), "TempestGroundAttackUpgrade": (100, "FleetBeacon"),
+    "VoidRaySpeedUpgrade": (57, "FleetBeacon"),
+
+    # Zerg
+    **{f"Zerg{kind}Level{level}": (seconds, "EvolutionChamber")
+       for kind in ("MeleeWeapons", "MissileWeapons", "GroundArmors") for level, seconds in _LEVELS["Zerg"]},
+    **{f"ZergFlyer{kind}Level{level}": (seconds, "Spire")
+       for kind in ("Weapons", "Armors") for level, seconds in _LEVELS["Zerg"]},
+    "zerglingmovementspeed": (79, "SpawningPool"), "zerglingattackspeed": (93, "SpawningPool"),
+    "Burrow": (71, "Hatchery"), "overlordspeed": (43, "Hatchery"),
+    "GlialReconstitution": (79, "RoachWarren"), "TunnelingClaws": (79, "RoachWarren"),
+    "CentrificalHooks": (71, "BanelingNest"),
+    "EvolveGroovedSpines": (71, "HydraliskDen"), "EvolveMuscularAugments": (71, "HydraliskDen"),
+    "Frenzy": (71, "HydraliskDen"), "LurkerRange": (57, "LurkerDen"), "DiggingClaws": (57, "LurkerDen"),
+    "NeuralParasite": (79, "InfestationPit"),
+    "ChitinousPlating": (79, "UltraliskCavern"), "AnabolicSynthesis": (43, "UltraliskCavern"),
+}
+
+# Town halls a player starts the game with
+START_TOWN_HALLS = {"CommandCenter", "Nexus", "Hatchery"}
+
+# Seconds a structure cannot train while building an addon or morphing
+ADDON_BUILD_TIMES: Dict[str, int] = {"Reactor": 36, "TechLab": 18}
+MORPH_TIMES: Dict[str, int] = {"OrbitalCommand": 25, "PlanetaryFortress": 36}
+
+# Mode names sc2reader reports that are not a plain base name plus a mode suffix
+UNIT_ALIASES = {
+    "VikingFighter": "Viking", "VikingAssault": "Viking", "LiberatorAG": "Liberator",
+    "ThorAP": "Thor", "ObserverSiegeMode": "Observer", "WarpPrismPhasing": "WarpPrism",
+    "LurkerMP": "Lurker", "SwarmHostMP": "SwarmHost", "DroneBurrowed": "Drone",
+    "OverseerSiegeMode": "Overseer",
+}
+
+# Suffixes sc2reader appends to a base type for alternate modes
+_MODE_SUFFIXES = ("Flying", "Lowered", "Burrowed", "Sieged", "Uprooted")
+
+# Alternate-mode names sc2reader reports as base type plus a mode suffix
+UNIT_MODES: Dict[str, Tuple[str, ...]] = {
+    "SupplyDepot": ("Lowered",), "SiegeTank": ("Sieged",), "WidowMine": ("Burrowed",),
+    **{name: ("Flying",) for name in ("CommandCenter", "OrbitalCommand", "Barracks", "Factory", "Starport")},
+    **{name: ("Uprooted",) for name in ("SpineCrawler", "SporeCrawler")},
+    **{name: ("Burrowed",) for name in ("Queen", "Zergling", "Baneling", "Roach", "Ravager", "Hydralisk",
+                                         "Lurker", "Infestor", "SwarmHost", "Ultralisk")},
+}
+
+
+def known_unit_types() -> List[str]:
+    """Every unit type name in the catalog, including alternate modes and aliases"""
+    names = set(BUILDING_TYPES) | set(UNIT_STATS) | WORKER_TYPES | set(UNIT_ALIASES)
+    names.update(base + suffix for base, suffixes in UNIT_MODES.items() for suffix in suffixes)
+    return sorted(names)
+
+
+def is_game_unit(unit_type: str) -> bool:
+    """Determine if a unit type is a real game unit (not UI elements or map features)"""
+    excluded_prefixes = [
+        'Beacon', 'Mineral', 'Vespene', 'XelNaga', 'Destructible',
+        'Acceleration', 'Collapsible', 'Purifier', 'Rock'
+    ]
+
+    return not any(unit_type.startswith(prefix) for prefix in excluded_prefixes)
+
+
+def is_mineral_field(unit_type: str) -> bool:
+    """Mineral fields of every size and tileset, e.g. RichMineralField750, LabMineralField"""
+    return "MineralField" in unit_type
+
+
+def is_geyser(unit_type: str) -> bool:
+    """Vespene geysers of every tileset, e.g. ProtossVespeneGeyser, SpacePlatformGeyser"""
+    return unit_type.endswith("Geyser")
+
+
+def is_building(unit_type: str) -> bool:
+    """Determine if a unit type is a building"""
+    return unit_type in BUILDING_TYPES
+
+
+def base_unit_type(unit_type: str) -> str:
+    """Strip mode and addon suffixes, e.g. SupplyDepotLowered -> SupplyDepot"""
+    for suffix in _MODE_SUFFIXES:
+        if unit_type.endswith(suffix) and len(unit_type) > len(suffix):
+            return unit_type[:-len(suffix)]
+    for addon in ("TechLab", "Reactor"):
+        if unit_type.endswith(addon):
+            return addon
+    return unit_type
+
+
+def unit_category(unit_type: str) -> str:
+    """Coarse category of a unit type: worker, army, building, creep or other"""
+    if unit_type.startswith("CreepTumor"):
+        return "creep"
+    if unit_type in WORKER_TYPES:
+        return "worker"
+    if is_building(unit_type) or is_building(base_unit_type(unit_type)):
+        return "building"
+    if unit_type in NON_ARMY_TYPES:
+        return "other"
+    return "army"
+
+
+def stats_unit_type(unit_type: str) -> Optional[str]:
+    """The UNIT_STATS name of a worker or army unit in any mode, e.g. SiegeTankSieged -> SiegeTank"""
+    if unit_type in UNIT_STATS:
+        return unit_type
+    base = UNIT_ALIASES.get(unit_type) or base_unit_type(unit_type)
+    base = UNIT_ALIASES.get(base, base)
+    return base if base in UNIT_STATS else None
+
+
+def unit_supply(unit_type: str) -> float:
+    """Supply used by a unit type, 0 for anything outside UNIT_STATS"""
+    name = stats_unit_type(unit_type)
+    return UNIT_STATS[name][2] if name else 0
+
+
+def unit_cost(unit_type: str) -> Tuple[int, int]:
+    """(minerals, gas) value of a unit type, (0, 0) for anything outside UNIT_STATS"""
+    name = stats_unit_type(unit_type)
+    return UNIT_STATS[name][:2] if name else (0, 0)
+
+
+def unit_filter(categories: Optional[Iterable[str]] = None, player_ids: Optional[Iterable[int]] = None,
+                include_types: Optional[Iterable[str]] = None,
+                exclude_types: Optional[Iterable[str]] = None) -> Optional[Callable[[str, int], bool]]:
+    """
+    Predicate (unit type, player ID) -> keep, or None when nothing is filtered.
+    A unit is kept if its player is allowed, its type is not excluded, and its
+    type is explicitly included or its unit_category is one of categories.
+    Without categories every category passes unless include_types is given.
+    """
+    if categories is None and player_ids is None and include_types is None and exclude_types is None:
+        return None
+
+    allowed_players = set(player_ids) if player_ids is not None else None
+    allowed_categories = set(categories) if categories is not None else None
+    included = set(include_types or ())
+    excluded = set(exclude_types or ())
+    if allowed_categories is None and include_types is not None:
+        allowed_categories = set()
+    decisions: Dict[str, bool] = {}
+
+    def keep(unit_type: str, player_id: int) -> bool:
+        if allowed_players is not None and player_id not in allowed_players:
+            return False
+        decision = decisions.get(unit_type)
+        if decision is None:
+            if unit_type in excluded:
+                decision = False
+            elif unit_type in included or allowed_categories is None:
+                decision = True
+            else:
+                decision = unit_category(unit_type) in allowed_categories
+            decisions[unit_type] = decision
+        return decision
+
+    return keep
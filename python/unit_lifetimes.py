@@ -0,0 +1,231 @@
+"""
+Unit Lifetimes
+
+Builds a columnar table of every player-owned unit's lifetime (birth, build
+completion for structures, death and killer) in one pass over the tracker
+events, plus a side table of morphs (unit, second, new type) so a unit's
+type can be resolved at any time, and an interval index over [born, died)
+that answers "what existed at time t" and "what existed during [t0, t1]" in
+O(log n + k) without materializing time series frames.
+"""
+
+from bisect import bisect_right
+from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple
+
+from engine_plugins import run_builder
+from unit_catalog import is_game_unit
+
+# Sentinel for "never happened" in integer columns (still alive, never finished, no killer)
+MISSING = -1
+
+
+class UnitLifetimeBuilder:
+    """Builds the lifetime columns one tracker event at a time; see extract_unit_lifetimes"""
+
+    def __init__(self, start: Optional[float] = None, end: Optional[float] = None):
+        self.start = start
+        self.end = end
+        self.done = False
+
+    def begin(self, replay) -> None:
+        self.pids = {player.pid for player in replay.players
+                     if hasattr(player, 'result') and player.result != 'Unknown'}
+        self.unit_types: List[str] = []
+        self.type_codes: Dict[str, int] = {}
+        self.columns: Dict[str, List[int]] = {
+            "unit_id": [], "type": [], "owner": [], "born": [], "done": [],
+            "died": [], "killer_pid": [], "killer_unit_id": [],
+        }
+        self.morphs: Dict[str, List[int]] = {"unit_id": [], "second": [], "type": []}
+        self.rows: Dict[int, int] = {}  # unit_id -> row
+
+    def type_code(self, unit_name: str) -> int:
+        code = self.type_codes.get(unit_name)
+        if code is None:
+            code = self.type_codes[unit_name] = len(self.unit_types)
+            self.unit_types.append(unit_name)
+        return code
+
+    def feed(self, event) -> None:
+        """Process one tracker event; events must arrive in time order"""
+        name = event.name
+        if self.end is not None and event.second > self.end:
+            self.done = True
+            return
+        columns = self.columns
+
+        if name in ('UnitBornEvent', 'UnitInitEvent'):
+            if event.control_pid not in self.pids or not is_game_unit(event.unit_type_name):
+                return
+            self.rows[event.unit_id] = len(columns["unit_id"])
+            columns["unit_id"].append(event.unit_id)
+            columns["type"].append(self.type_code(event.unit_type_name))
+            columns["owner"].append(event.control_pid)
+            columns["born"].append(event.second)
+            # Units that spawn finished are "done" immediately; structures wait for UnitDoneEvent
+            columns["done"].append(event.second if name == 'UnitBornEvent' else MISSING)
+            columns["died"].append(MISSING)
+            columns["killer_pid"].append(MISSING)
+            columns["killer_unit_id"].append(MISSING)
+
+        elif name == 'UnitTypeChangeEvent':
+            if event.unit_id in self.rows:
+                self.morphs["unit_id"].append(event.unit_id)
+                self.morphs["second"].append(event.second)
+                self.morphs["type"].append(self.type_code(event.unit_type_name))
+
+        elif name == 'UnitDoneEvent':
+            row = self.rows.get(event.unit_id)
+            if row is not None:
+                columns["done"][row] = event.second
+
+        elif name == 'UnitDiedEvent':
+            row = self.rows.pop(event.unit_id, None)
+            if row is not None:
+                columns["died"][row] = event.second
+                killer_pid = getattr(event, 'killer_pid', None)
+                killer_unit_id = getattr(event, 'killing_unit_id', None)
+                columns["killer_pid"][row] = killer_pid if killer_pid is not None else MISSING
+                columns["killer_unit_id"][row] = killer_unit_id if killer_unit_id is not None else MISSING
+
+    def finish(self) -> Dict[str, Any]:
+        columns, morphs = self.columns, self.morphs
+        if self.start is not None:
+            keep = [row for row, died in enumerate(columns["died"]) if died == MISSING or died >= self.start]
+            columns = {name: [values[row] for row in keep] for name, values in columns.items()}
+            kept = set(columns["unit_id"])
+            keep = [i for i, unit_id in enumerate(morphs["unit_id"]) if unit_id in kept]
+            morphs = {name: [values[i] for i in keep] for name, values in morphs.items()}
+
+        return {"unit_types": self.unit_types, "columns": columns, "morphs": morphs}
+
+
+def extract_unit_lifetimes(replay, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Extract per-unit lifetime columns from tracker events. With start/end
+    (seconds) only units alive at some point of the window are kept, and
+    events after end are not read, so later deaths are MISSING. The type
+    column is the type a unit was born as; morphs lists every later change.
+    """
+    if not hasattr(replay, 'tracker_events'):
+        return {}
+    return run_builder(UnitLifetimeBuilder(start, end), replay)
+
+
+class _Node:
+    __slots__ = ("center", "left", "right", "by_start", "by_end")
+
+
+class UnitLifetimeIndex:
+    """
+    Static centered interval tree over unit lifetimes [born, died). Units still
+    alive at the end of the game are treated as living forever.
+    """
+
+    def __init__(self, lifetimes: Dict[str, Any]):
+        self.unit_types: List[str] = lifetimes.get("unit_types", [])
+        self.columns: Dict[str, List[int]] = lifetimes.get("columns", {})
+        born = self.columns.get("born", [])
+        died = self.columns.get("died", [])
+        self._starts = born
+        self._ends = [end if end != MISSING else float("inf") for end in died]
+        self._root = self._build(list(range(len(born))))
+
+        # row -> ([morph seconds], [type codes]) in time order, for the units that morphed
+        self._morphs: Dict[int, Tuple[List[int], List[int]]] = {}
+        morphs = lifetimes.get("morphs", {})
+        row_of = {unit_id: row for row, unit_id in enumerate(self.columns.get("unit_id", []))}
+        for unit_id, second, code in zip(morphs.get("unit_id", []), morphs.get("second", []), morphs.get("type", [])):
+            seconds, codes = self._morphs.setdefault(row_of[unit_id], ([], []))
+            seconds.append(second)
+            codes.append(code)
+
+    def _build(self, rows: List[int]) -> Optional[_Node]:
+        if not rows:
+            return None
+        starts, ends = self._starts, self._ends
+        endpoints = sorted(starts[row] for row in rows)
+        center = endpoints[len(endpoints) // 2]
+
+        left, right, here = [], [], []
+        for row in rows:
+            # The row(s) starting at the center always stay here, so recursion terminates
+            if ends[row] <= center and starts[row] < center:
+                left.append(row)
+            elif starts[row] > center:
+                right.append(row)
+            else:
+                here.append(row)
+
+        node = _Node()
+        node.center = center
+        node.by_start = sorted(here, key=lambda row: starts[row])
+        node.by_end = sorted(here, key=lambda row: ends[row], reverse=True)
+        node.left = self._build(left)
+        node.right = self._build(right)
+        return node
+
+    def alive_at(self, t: float) -> List[int]:
+        """Rows of units alive at time t (born <= t < died)"""
+        return self.overlapping(t, t)
+
+    def overlapping(self, t0: float, t1: float) -> List[int]:
+        """Rows of units alive at any point of [t0, t1]; t0 == t1 is a point query"""
+        starts, ends = self._starts, self._ends
+        result: List[int] = []
+        node = self._root
+        stack = [node] if node else []
+
+        while stack:
+            node = stack.pop()
+            if t1 < node.center:
+                for row in node.by_start:
+                    if starts[row] > t1:
+                        break
+                    result.append(row)
+                if node.left:
+                    stack.append(node.left)
+            elif t0 >= node.center:
+                for row in node.by_end:
+                    if ends[row] <= t0:
+                        break
+                    result.append(row)
+                if node.right:
+                    stack.append(node.right)
+            else:
+                # Every interval stored here spans the center, which lies inside the range
+                result.extend(node.by_start)
+                if node.left:
+                    stack.append(node.left)
+                if node.right:
+                    stack.append(node.right)
+
+        return result
+
+    def type_at(self, row: int, t: float) -> str:
+        """A unit's type at time t: its birth type or the latest morph at or before t"""
+        morphs = self._morphs.get(row)
+        if morphs is not None:
+            i = bisect_right(morphs[0], t)
+            if i:
+                return self.unit_types[morphs[1][i - 1]]
+        return self.unit_types[self.columns["type"][row]]
+
+    def composition_at(self, t: float, owner: Optional[int] = None,
+                       finished_only: bool = True) -> Dict[str, int]:
+        """Unit type counts alive at time t, optionally for one player"""
+        owners = self.columns["owner"]
+        done = self.columns["done"]
+        counts: Counter = Counter()
+        for row in self.alive_at(t):
+            if owner is not None and owners[row] != owner:
+                continue
+            if finished_only and (done[row] == MISSING or done[row] > t):
+                continue
+            counts[self.type_at(row, t)] += 1
+        return dict(counts)
+
+    def kills_by(self, pid: int) -> List[int]:
+        """Rows of units killed by a player"""
+        return [row for row, killer in enumerate(self.columns["killer_pid"]) if killer == pid]
@@ -3,12 +3,40 @@
 Environment validation script for SC2 Replay Analyzer
 
 This script checks if the Python environment has all required dependencies
-for replay analysis.
+for replay analysis, and reports what the host offers: usable cores,
+memory, optional accelerators and the sc2reader import time.
+
+With --benchmark it also analyzes a replay (by default the median-sized one
+in replays/) in a child process, measures wall time (start-up apart from the
+analysis itself) and peak memory, and recommends a worker count, per-worker
+memory budget and result format. --write stores that recommendation as a
+tuning file which job_queue.py serve applies: its worker count, result file
+format and compression, and the memory budget past which a worker is
+replaced.
+
+Usage: python validate_environment.py [--benchmark [REPLAY]] [--write [PATH]]
 """
 
 import sys
 import json
-from typing import Dict, Any
+import os
+import time
+import argparse
+import subprocess
+from typing import Dict, Any, Optional
+
+TUNING_FILENAME = ".analyzer_tuning.json"
+
+# Optional packages that make analysis or its output faster or smaller
+OPTIONAL_PACKAGES = {
+    "numpy": "numpy",
+    "msgpack": "msgpack",
+    "zstandard": "zstandard",
+    "cbor2": "cbor2",
+}
+
+# Share of available memory the analyzer workers may use together
+MEMORY_BUDGET_FRACTION = 0.75
 
 def validate_environment() -> Dict[str, Any]:
     """Validate that all required packages are available"""
@@ -18,17 +46,17 @@ def validate_environment() -> Dict[str, Any]:
         "issues": [],
         "packages": {}
     }
-    
+
     # Check Python version
     if sys.version_info < (3, 7):
         validation_result["valid"] = False
         validation_result["issues"].append("Python 3.7+ required, found " + sys.version)
-    
+
     # Check required packages
     required_packages = [
         ("sc2reader", "1.8.0"),
     ]
-    
+
     for package_name, min_version in required_packages:
         try:
             module = __import__(package_name)
@@ -36,13 +64,13 @@ def validate_environment() -> Dict[str, Any]:
                 version = module.__version__
             else:
                 version = "unknown"
-            
+
             validation_result["packages"][package_name] = {
                 "available": True,
                 "version": version,
                 "required": min_version
             }
-            
+
         except ImportError as e:
             validation_result["valid"] = False
             validation_result["packages"][package_name] = {
@@ -52,18 +80,211 @@ def validate_environment() -> Dict[str, Any]:
                 "error": str(e)
             }
             validation_result["issues"].append(f"Missing package: {package_name}")
-    
+
+    validation_result["optional_packages"] = probe_optional_packages()
+    validation_result["host"] = probe_host()
+    if validation_result["packages"]["sc2reader"]["available"]:
+        validation_result["sc2reader_import_seconds"] = time_cold_import("sc2reader")
+
     return validation_result
 
+def probe_optional_packages() -> Dict[str, Any]:
+    """Which optional accelerators are importable, with their versions"""
+    packages = {}
+    for name, module_name in OPTIONAL_PACKAGES.items():
+        try:
+            module = __import__(module_name)
+            packages[name] = {"available": True, "version": getattr(module, '__version__', "unknown")}
+        except ImportError:
+            packages[name] = {"available": False, "version": None}
+    return packages
+
+def usable_cores() -> int:
+    """CPU cores this process may use, honoring affinity masks and cgroup CPU quotas"""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    try:
+        with open("/sys/fs/cgroup/cpu.max", 'r') as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+def memory_info() -> Dict[str, Optional[int]]:
+    """Total and available memory in MB, None where the platform doesn't say"""
+    info = {"total_mb": None, "available_mb": None}
+    try:
+        with open("/proc/meminfo", 'r') as f:
+            fields = dict(line.split(":", 1) for line in f)
+        info["total_mb"] = int(fields["MemTotal"].split()[0]) // 1024
+        info["available_mb"] = int(fields["MemAvailable"].split()[0]) // 1024
+    except (OSError, KeyError, ValueError):
+        try:
+            info["total_mb"] = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+        except (AttributeError, ValueError, OSError):
+            pass
+    return info
+
+def probe_host() -> Dict[str, Any]:
+    """Cores and memory of this host"""
+    return {
+        "cpu_count": os.cpu_count(),
+        "usable_cores": usable_cores(),
+        "memory": memory_info(),
+        "platform": sys.platform,
+    }
+
+def time_cold_import(module_name: str) -> Optional[float]:
+    """Seconds a fresh interpreter needs to import a module (every analyzer process pays this)"""
+    code = f"import time; t = time.perf_counter(); import {module_name}; print(time.perf_counter() - t)"
+    try:
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                timeout=120, check=True).stdout
+        return round(float(output.strip().splitlines()[-1]), 3)
+    except (subprocess.SubprocessError, ValueError, IndexError):
+        return None
+
+def default_benchmark_replay(replays_dir: str = "replays") -> Optional[str]:
+    """The median-sized replay in a directory, a typical ingestion load"""
+    try:
+        replays = sorted((entry.stat().st_size, entry.path) for entry in os.scandir(replays_dir)
+                         if entry.is_file() and entry.name.endswith(".SC2Replay"))
+    except OSError:
+        return None
+    return replays[len(replays) // 2][1] if replays else None
+
+def benchmark_replay(replay_path: str) -> Dict[str, Any]:
+    """
+    Analyze one replay in a fresh child process; analysis wall time, peak RSS
+    and, separately, the interpreter and import start-up a long-lived worker
+    pays only once
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    code = (
+        "import json, resource, sys, time\n"
+        "t = time.perf_counter()\n"
+        "sys.path.insert(0, sys.argv[1])\n"
+        "from analyze_replay import analyze_replay\n"
+        "from output_formats import encode_output\n"
+        "imports = time.perf_counter() - t\n"
+        "t, cpu = time.perf_counter(), time.process_time()\n"
+        "result = analyze_replay(sys.argv[2])\n"
+        "encode_output(result, 'json-compact')\n"
+        "wall, cpu = time.perf_counter() - t, time.process_time() - cpu\n"
+        "usage = resource.getrusage(resource.RUSAGE_SELF)\n"
+        "print(json.dumps({'error': result.get('error'), 'imports': imports, 'wall': wall, 'cpu': cpu,"
+        " 'maxrss_kb': usage.ru_maxrss}))\n"
+    )
+    try:
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", code, script_dir, replay_path], capture_output=True,
+                                text=True, timeout=600, check=True).stdout
+        process_seconds = time.perf_counter() - started
+        run = json.loads(output)
+    except (subprocess.SubprocessError, ValueError) as e:
+        return {"error": f"Benchmark failed: {str(e)}"}
+    if run["error"]:
+        return {"error": f"Benchmark analysis failed: {run['error']}"}
+
+    import sc2reader
+    replay = sc2reader.load_replay(replay_path, load_level=1, engine=None)
+    game_seconds = replay.game_length.total_seconds() if hasattr(replay, 'game_length') else 0
+    return {
+        "replay": os.path.basename(replay_path),
+        "size_kb": os.path.getsize(replay_path) // 1024,
+        "game_seconds": game_seconds,
+        # Analysis only, as in a long-lived job_queue worker
+        "wall_seconds": round(run["wall"], 3),
+        "cpu_seconds": round(run["cpu"], 3),
+        # Interpreter start, imports and exit on top of it, paid per request by the web app
+        "startup_seconds": round(process_seconds - run["wall"], 3),
+        "process_seconds": round(process_seconds, 3),
+        "peak_rss_mb": round(run["maxrss_kb"] / 1024, 1),
+        "game_seconds_per_second": round(game_seconds / run["wall"], 1) if run["wall"] else None,
+    }
+
+def recommend(host: Dict[str, Any], optional_packages: Dict[str, Any],
+              benchmark: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker count, memory budget and output format for this host"""
+    cores = host["usable_cores"]
+    available_mb = host["memory"]["available_mb"] or host["memory"]["total_mb"]
+    peak_mb = benchmark.get("peak_rss_mb")
+
+    # Analysis is CPU bound, so one worker per core unless memory runs out first
+    workers = cores
+    memory_budget_mb = None
+    if available_mb and peak_mb:
+        # Headroom for replays larger than the benchmark one
+        memory_budget_mb = int(peak_mb * 1.5)
+        workers = max(1, min(cores, int(available_mb * MEMORY_BUDGET_FRACTION // memory_budget_mb)))
+
+    if optional_packages["msgpack"]["available"]:
+        output_format = {"format": "msgpack", "compress": "zstd" if optional_packages["zstandard"]["available"] else "gzip"}
+    else:
+        output_format = {"format": "json-compact", "compress": "none"}
+
+    recommendation = {
+        "workers": workers,
+        "memory_budget_mb": memory_budget_mb,
+        **output_format,
+    }
+    if benchmark.get("wall_seconds"):
+        # Workers start once, so their throughput excludes the per-process start-up
+        recommendation["replays_per_hour"] = int(3600 / benchmark["wall_seconds"] * workers)
+    return recommendation
+
+def load_tuning(tuning_path: Optional[str] = None) -> Dict[str, Any]:
+    """The recommendation written by --write, or {} if there is none"""
+    try:
+        with open(tuning_path or default_tuning_path(), 'r') as f:
+            return json.load(f).get("recommendation", {})
+    except (OSError, ValueError):
+        return {}
+
+def default_tuning_path() -> str:
+    """The tuning file lives next to the replays it was measured on"""
+    return os.path.join("replays", TUNING_FILENAME)
+
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="Validate and benchmark the analyzer environment")
+    parser.add_argument("--benchmark", nargs="?", const="", default=None, metavar="REPLAY",
+                        help="Time an analysis (default: the median-sized replay in replays/)")
+    parser.add_argument("--write", nargs="?", const=default_tuning_path(), default=None, metavar="PATH",
+                        help=f"Write the recommendation as a tuning file (default: replays/{TUNING_FILENAME})")
+    args = parser.parse_args()
+
     result = validate_environment()
+
+    if result["valid"] and (args.benchmark is not None or args.write):
+        replay_path = args.benchmark or default_benchmark_replay()
+        if not replay_path or not os.path.exists(replay_path):
+            result["valid"] = False
+            result["issues"].append("No replay to benchmark, pass one with --benchmark REPLAY")
+        else:
+            result["benchmark"] = benchmark_replay(replay_path)
+            if "error" in result["benchmark"]:
+                result["valid"] = False
+                result["issues"].append(result["benchmark"]["error"])
+            else:
+                result["recommendation"] = recommend(result["host"], result["optional_packages"],
+                                                     result["benchmark"])
+                if args.write:
+                    tmp_path = args.write + ".tmp"
+                    with open(tmp_path, 'w') as f:
+                        json.dump({"measured_at": int(time.time()), "host": result["host"],
+                                   "benchmark": result["benchmark"],
+                                   "recommendation": result["recommendation"]}, f, indent=2)
+                    os.replace(tmp_path, args.write)
+                    result["tuning_path"] = args.write
+
     print(json.dumps(result, indent=2))
-    
+
     if not result["valid"]:
         sys.exit(1)
     else:
         sys.exit(0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Script to pack the StarCraft 2 unit icons into texture atlases
+
+Rasterizes every SVG referenced by src/lib/unit-icons.ts at a few sizes and
+packs each size into a single PNG atlas with a shelf bin-packing algorithm.
+Every atlas gets a PixiJS-compatible spritesheet JSON whose frames are keyed
+by the unit names the analyzer emits, so the replay viewer can load one or
+two textures instead of one SVG per unit type. Names from python/unit_catalog.py
+that unit-icons.ts spells differently or lacks (WarpGate, SiegeTankSieged,
+VikingFighter, ...) get alias frames pointing at the same icon.
+
+Rasterized icons are cached by content hash, so a rebuild only rasterizes the
+icons whose SVG changed, and nothing is rewritten when no source changed.
+
+Usage: python scripts/build-icon-atlas.py [--sizes 32,64] [--force]
+"""
+
+import io
+import re
+import math
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import cairosvg
+    from PIL import Image
+except (ImportError, OSError) as e:
+    # cairosvg raises OSError when the system Cairo library is missing
+    print(f"❌ Error: {e}")
+    print("cairosvg and Pillow are required. Run: pip install -r scripts/requirements.txt")
+    print("cairosvg also needs the Cairo library (apt install libcairo2, brew install cairo)")
+    sys.exit(1)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+from unit_catalog import UNIT_ALIASES, base_unit_type, known_unit_types
+
+PUBLIC_PATH = Path("public")
+ICON_MAPPING_PATH = Path("src/lib/unit-icons.ts")
+ATLAS_PATH = Path("public/icons/sc2/atlas")
+CACHE_PATH = Path(".cache/icon-atlas")
+MANIFEST_NAME = "atlas-manifest.json"
+
+DEFAULT_SIZES = [32, 64]
+MAX_ATLAS_WIDTH = 2048
+PADDING = 2  # Transparent gutter between frames to avoid texture bleeding
+FALLBACK_FRAME = "unknown"
+FALLBACK_ICON = "/icons/sc2/neutral/unknown.svg"
+
+# sc2reader names whose icon entry in unit-icons.ts uses another spelling
+ICON_NAME_ALIASES = {
+    "WarpGate": "Warpgate", "RoboticsFacility": "Robotics", "TemplarArchive": "TemplarArchives",
+    "HellionTank": "Hellbat",
+}
+
+MAPPING_ENTRY = re.compile(r'^\s*"?(\w+)"?\s*:\s*"(/icons/sc2/[^"]+\.svg)"', re.MULTILINE)
+
+def load_icon_mapping() -> Dict[str, str]:
+    """Unit name -> public SVG path, parsed from the viewer's icon mapping"""
+    mapping = dict(MAPPING_ENTRY.findall(ICON_MAPPING_PATH.read_text()))
+    mapping.setdefault(FALLBACK_FRAME, FALLBACK_ICON)
+    for unit_name in known_unit_types():
+        icon_name = icon_name_for(unit_name, mapping)
+        if icon_name and unit_name not in mapping:
+            mapping[unit_name] = mapping[icon_name]
+    return mapping
+
+def icon_name_for(unit_name: str, mapping: Dict[str, str]) -> Optional[str]:
+    """The unit-icons.ts entry for an analyzer unit name, trying aliases and the base mode"""
+    for candidate in (unit_name, UNIT_ALIASES.get(unit_name), base_unit_type(unit_name)):
+        candidate = ICON_NAME_ALIASES.get(candidate, candidate)
+        if candidate in mapping:
+            return candidate
+    return None
+
+def source_hashes(mapping: Dict[str, str]) -> Dict[str, str]:
+    """Content hash of every distinct SVG referenced by the mapping"""
+    hashes = {}
+    for icon in sorted(set(mapping.values())):
+        svg_path = PUBLIC_PATH / icon.lstrip("/")
+        hashes[icon] = hashlib.sha256(svg_path.read_bytes()).hexdigest() if svg_path.exists() else ""
+    return hashes
+
+def rasterize(icon: str, digest: str, size: int) -> Image.Image:
+    """Rasterize one SVG at size x size, reusing the cached PNG for unchanged sources"""
+    cache_file = CACHE_PATH / f"{digest}-{size}.png"
+    if cache_file.exists():
+        return Image.open(cache_file).convert("RGBA")
+
+    svg_path = PUBLIC_PATH / icon.lstrip("/")
+    png = cairosvg.svg2png(url=str(svg_path), output_width=size, output_height=size)
+    image = Image.open(io.BytesIO(png)).convert("RGBA")
+
+    CACHE_PATH.mkdir(parents=True, exist_ok=True)
+    image.save(cache_file)
+    return image
+
+def pack_shelves(sizes: Dict[str, Tuple[int, int]], padding: int = PADDING) -> Tuple[Dict[str, Tuple[int, int]], int, int]:
+    """
+    Shelf packing (first fit, decreasing height): place rectangles left to right
+    on the first shelf with room, opening a new shelf when none fits. Shelves
+    are capped at the power-of-two width of a square holding the total area,
+    which keeps atlases close to square. Returns positions plus the
+    power-of-two atlas width and height.
+    """
+    area = sum((w + padding) * (h + padding) for w, h in sizes.values())
+    widest = max((w + padding for w, _ in sizes.values()), default=1)
+    max_width = min(MAX_ATLAS_WIDTH, max(widest, _next_power_of_two(math.isqrt(area))))
+
+    shelves: List[List[int]] = []  # [y, height, next_x]
+    positions: Dict[str, Tuple[int, int]] = {}
+    used_width = 0
+
+    for key, (w, h) in sorted(sizes.items(), key=lambda item: (-item[1][1], -item[1][0], item[0])):
+        w_padded, h_padded = w + padding, h + padding
+        for shelf in shelves:
+            if shelf[1] >= h_padded and shelf[2] + w_padded <= max_width:
+                break
+        else:
+            y = shelves[-1][0] + shelves[-1][1] if shelves else 0
+            shelf = [y, h_padded, 0]
+            shelves.append(shelf)
+
+        positions[key] = (shelf[2], shelf[0])
+        shelf[2] += w_padded
+        used_width = max(used_width, shelf[2])
+
+    used_height = shelves[-1][0] + shelves[-1][1] if shelves else 0
+    return positions, _next_power_of_two(used_width), _next_power_of_two(used_height)
+
+def _next_power_of_two(value: int) -> int:
+    power = 1
+    while power < value:
+        power *= 2
+    return power
+
+def build_atlas(mapping: Dict[str, str], hashes: Dict[str, str], size: int) -> Dict[str, object]:
+    """Rasterize and pack one atlas size, writing its PNG and spritesheet JSON"""
+    icons = [icon for icon in sorted(hashes) if hashes[icon]]
+    images = {icon: rasterize(icon, hashes[icon], size) for icon in icons}
+    positions, width, height = pack_shelves({icon: image.size for icon, image in images.items()})
+
+    atlas = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    for icon, image in images.items():
+        atlas.paste(image, positions[icon])
+
+    image_name = f"atlas-{size}.png"
+    atlas.save(ATLAS_PATH / image_name, optimize=True)
+
+    frames = {}
+    for unit_name, icon in sorted(mapping.items()):
+        if icon not in positions:
+            continue
+        x, y = positions[icon]
+        w, h = images[icon].size
+        frames[unit_name] = {
+            "frame": {"x": x, "y": y, "w": w, "h": h},
+            "rotated": False,
+            "trimmed": False,
+            "spriteSourceSize": {"x": 0, "y": 0, "w": w, "h": h},
+            "sourceSize": {"w": w, "h": h},
+        }
+
+    spritesheet = {
+        "frames": frames,
+        "meta": {
+            "image": image_name,
+            "format": "RGBA8888",
+            "size": {"w": width, "h": height},
+            "scale": "1",
+        },
+    }
+    (ATLAS_PATH / f"atlas-{size}.json").write_text(json.dumps(spritesheet, indent=1, sort_keys=True))
+    return {"image": image_name, "spritesheet": f"atlas-{size}.json", "width": width, "height": height,
+            "frames": len(frames)}
+
+def build_atlases(sizes: List[int], force: bool = False) -> bool:
+    """Rebuild the atlases if any source SVG, the mapping or the sizes changed"""
+    mapping = load_icon_mapping()
+    hashes = source_hashes(mapping)
+    fingerprint = hashlib.sha256(json.dumps([mapping, hashes, sizes], sort_keys=True).encode()).hexdigest()
+
+    manifest_path = ATLAS_PATH / MANIFEST_NAME
+    if not force and manifest_path.exists():
+        previous = json.loads(manifest_path.read_text())
+        outputs_exist = all((ATLAS_PATH / atlas["image"]).exists() for atlas in previous.get("atlases", {}).values())
+        if previous.get("fingerprint") == fingerprint and outputs_exist:
+            print("Icon atlases are up to date")
+            return False
+
+    missing = sorted(icon for icon, digest in hashes.items() if not digest)
+    for icon in missing:
+        print(f"⚠️  Missing icon source: {icon}")
+
+    ATLAS_PATH.mkdir(parents=True, exist_ok=True)
+    atlases = {}
+    for size in sizes:
+        atlases[str(size)] = build_atlas(mapping, hashes, size)
+        print(f"Built {size}px atlas: {atlases[str(size)]['width']}x{atlases[str(size)]['height']}, "
+              f"{atlases[str(size)]['frames']} frames")
+
+    manifest_path.write_text(json.dumps({
+        "fingerprint": fingerprint,
+        "sources": hashes,
+        "atlases": atlases,
+    }, indent=2, sort_keys=True))
+    return True
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Pack SC2 unit icons into texture atlases")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated icon sizes in pixels")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if no source changed")
+    args = parser.parse_args()
+
+    sizes = sorted({int(size) for size in args.sizes.split(",") if size})
+
+    print("SC2 Icon Atlas Builder")
+    print("======================")
+
+    try:
+        if build_atlases(sizes, args.force):
+            print(f"\n✅ Atlases written to: {ATLAS_PATH}/")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,38 @@
 #!/usr/bin/env python3
 """
 Script to download StarCraft 2 unit icons from various sources
+
+Icons are fetched concurrently over a pooled HTTP session. A local manifest
+records each icon's ETag, Last-Modified and content hash, so reruns only send
+conditional requests and an interrupted run resumes where it stopped
+(including partially downloaded files, via Range requests).
+
+Usage:
+    python scripts/download-icons.py --base-url https://example.com/sc2-icons
+    python scripts/download-icons.py --placeholders
 """
 
 import os
 import sys
 import json
-import requests
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from urllib.parse import urljoin, urlparse
-import time
+from typing import Dict, Any, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+ICON_BASE_PATH = Path("public/icons/sc2")
+MANIFEST_NAME = ".icons-manifest.json"
+DEFAULT_URL_TEMPLATE = "{base_url}/{race}/{filename}.svg"
+DEFAULT_CONCURRENCY = 8
+
+# Save the manifest after this many completed icons so an interrupted run loses little
+MANIFEST_SAVE_EVERY = 10
 
 # SC2 unit data organized by race
 SC2_UNITS = {
@@ -138,7 +161,7 @@ SC2_UNITS = {
 
 def create_icon_directories():
     """Create the necessary directories for icons"""
-    base_path = Path("public/icons/sc2")
+    base_path = ICON_BASE_PATH
     
     for race in ["terran", "protoss", "zerg", "neutral"]:
         race_path = base_path / race
@@ -146,8 +169,149 @@ def create_icon_directories():
     
     return base_path
 
+class IconManifest:
+    """Thread-safe record of downloaded icons: url -> etag, last_modified, sha256, path"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.unsaved = 0
+        if path.exists():
+            try:
+                self.entries = json.loads(path.read_text()).get("icons", {})
+            except ValueError:
+                self.entries = {}
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self.entries.get(url)
+            return dict(entry) if entry else None
+
+    def update(self, url: str, entry: Dict[str, Any]) -> None:
+        with self.lock:
+            self.entries[url] = entry
+            self.unsaved += 1
+            if self.unsaved >= MANIFEST_SAVE_EVERY:
+                self._save_locked()
+
+    def save(self) -> None:
+        with self.lock:
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"icons": self.entries}, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.path)
+        self.unsaved = 0
+
+def file_sha256(path: Path) -> Optional[str]:
+    """Content hash of a local file, or None if it doesn't exist"""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+def create_session(concurrency: int) -> requests.Session:
+    """HTTP session whose connection pool matches the download concurrency"""
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "sc2-replay-analyzer-icon-downloader"
+    return session
+
+def download_icon(session: requests.Session, manifest: IconManifest, url: str,
+                  icon_path: Path, force: bool = False) -> str:
+    """
+    Fetch one icon, returning "downloaded", "unchanged" or "resumed".
+    Conditional headers are only sent when the local file still matches the
+    hash recorded in the manifest.
+    """
+    entry = manifest.get(url) or {}
+    part_path = icon_path.with_name(icon_path.name + ".part")
+    headers = {}
+
+    if not force and entry.get("sha256") and entry["sha256"] == file_sha256(icon_path):
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    # Resume an interrupted download if the server still serves the same version
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    if offset and entry.get("partial_etag"):
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = entry["partial_etag"]
+    else:
+        offset = 0
+
+    with session.get(url, headers=headers, stream=True, timeout=30) as response:
+        if response.status_code == 304:
+            return "unchanged"
+        response.raise_for_status()
+
+        resumed = response.status_code == 206
+        etag = response.headers.get("ETag")
+        if etag and not resumed:
+            manifest.update(url, dict(entry, partial_etag=etag))
+
+        with open(part_path, "ab" if resumed else "wb") as f:
+            for chunk in response.iter_content(chunk_size=16384):
+                f.write(chunk)
+
+        os.replace(part_path, icon_path)
+        manifest.update(url, {
+            "path": str(icon_path),
+            "etag": etag or entry.get("partial_etag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "sha256": file_sha256(icon_path),
+        })
+        return "resumed" if resumed else "downloaded"
+
+def download_icons(base_url: str, url_template: str = DEFAULT_URL_TEMPLATE,
+                   concurrency: int = DEFAULT_CONCURRENCY, force: bool = False,
+                   base_path: Optional[Path] = None) -> Dict[str, int]:
+    """Download every icon in SC2_UNITS concurrently, returning counts per outcome"""
+    base_path = base_path or create_icon_directories()
+    for race in SC2_UNITS:
+        (base_path / race).mkdir(parents=True, exist_ok=True)
+
+    manifest = IconManifest(base_path / MANIFEST_NAME)
+    session = create_session(concurrency)
+    base_url = base_url.rstrip("/")
+
+    jobs: Dict[str, Tuple[str, Path]] = {}
+    for race, units in SC2_UNITS.items():
+        for unit_name, filename in units.items():
+            url = url_template.format(base_url=base_url, race=race, filename=filename, unit=unit_name)
+            jobs[url] = (unit_name, base_path / race / f"{filename}.svg")
+
+    counts = {"downloaded": 0, "unchanged": 0, "resumed": 0, "failed": 0}
+    print(f"Fetching {len(jobs)} icons with {concurrency} connections...")
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = {
+                pool.submit(download_icon, session, manifest, url, icon_path, force): unit_name
+                for url, (unit_name, icon_path) in jobs.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    counts[future.result()] += 1
+                except Exception as e:
+                    counts["failed"] += 1
+                    print(f"Failed to fetch {futures[future]}: {e}")
+    finally:
+        manifest.save()
+        session.close()
+
+    print(", ".join(f"{count} {outcome}" for outcome, count in counts.items()))
+    return counts
+
 def download_placeholder_icons():
-    """Download placeholder icons from a free icon service"""
+    """Create placeholder SVG icons for units that have no icon yet"""
     base_path = create_icon_directories()
     
     # Use a simple colored square generator for placeholders
@@ -187,8 +351,6 @@ def download_placeholder_icons():
                 downloaded += 1
                 if downloaded % 10 == 0:
                     print(f"Created {downloaded}/{total_units} placeholder icons...")
-                
-                time.sleep(0.01)  # Small delay to be respectful
     
     print(f"Successfully created {downloaded} placeholder icons!")
     print(f"Icons saved to: {base_path}")
@@ -239,12 +401,26 @@ export const getUnitIcon = (unitName: string): string => {
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Download StarCraft 2 unit icons")
+    parser.add_argument("--base-url", help="Icon server base URL; without it placeholder icons are created")
+    parser.add_argument("--url-template", default=DEFAULT_URL_TEMPLATE,
+                        help="URL pattern with {base_url}, {race}, {filename} and {unit} fields")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and refetch everything")
+    parser.add_argument("--placeholders", action="store_true", help="Only create placeholder icons")
+    args = parser.parse_args()
+
     print("SC2 Icon Downloader")
     print("===================")
     
     try:
-        # Create placeholder icons
-        download_placeholder_icons()
+        if args.base_url and not args.placeholders:
+            counts = download_icons(args.base_url, args.url_template, args.concurrency, args.force)
+            if counts["failed"]:
+                print("\nSome icons failed; rerun to resume the remaining downloads.")
+        else:
+            # Create placeholder icons
+            download_placeholder_icons()
         
         # Create the TypeScript mapping
         create_icon_mapping()
@@ -252,12 +428,13 @@ def main():
         print("\n✅ Icon setup complete!")
         print("📁 Icons saved to: public/icons/sc2/")
         print("🔗 Mapping created: src/lib/unit-icons.ts")
-        print("\nNote: These are placeholder SVG icons. You can replace them with")
-        print("actual game icons by downloading from Liquipedia or other sources.")
+        if not args.base_url:
+            print("\nNote: These are placeholder SVG icons. Pass --base-url to download")
+            print("actual game icons from an icon server.")
         
     except Exception as e:
         print(f"❌ Error: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
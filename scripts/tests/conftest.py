@@ -0,0 +1,20 @@
+import importlib.util
+import os
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_script(filename: str):
+    """Import a script whose file name is not a valid module name"""
+    name = filename[:-len(".py")].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPTS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def download_icons_module():
+    return load_script("download-icons.py")
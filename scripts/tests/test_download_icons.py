@@ -0,0 +1,109 @@
+import hashlib
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class IconServer(BaseHTTPRequestHandler):
+    """Static files with ETag/Last-Modified validators and If-Range resumes"""
+
+    root = None
+    log = None          # (path, status) of every request
+    truncate = set()    # paths whose next full response is cut off halfway
+
+    def do_GET(self):
+        path = self.root / self.path.lstrip("/")
+        if not path.is_file():
+            return self._reply(404)
+        body = path.read_bytes()
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        validators = {"ETag": etag, "Last-Modified": formatdate(path.stat().st_mtime, usegmt=True)}
+
+        if self.headers.get("If-None-Match") == etag:
+            return self._reply(304, validators)
+
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") == etag:
+            offset = int(range_header[len("bytes="):].rstrip("-"))
+            return self._reply(206, dict(validators, **{
+                "Content-Range": f"bytes {offset}-{len(body) - 1}/{len(body)}"}), body[offset:])
+
+        if self.path in self.truncate:
+            self.truncate.discard(self.path)
+            return self._reply(200, validators, body, cut=len(body) // 2)
+        self._reply(200, validators, body)
+
+    def _reply(self, status, headers=None, body=b"", cut=None):
+        self.log.append((self.path, status))
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body if cut is None else body[:cut])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    root = tmp_path / "server"
+    (root / "terran").mkdir(parents=True)
+    # Larger than one 16 KB download chunk, so an interrupted fetch leaves a partial file
+    (root / "terran" / "marine.svg").write_bytes(b"<svg>marine</svg>" * 4000)
+    (root / "terran" / "scv.svg").write_bytes(b"<svg>scv</svg>" * 50)
+
+    handler = type("Handler", (IconServer,), {"root": root, "log": [], "truncate": set()})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield root, handler, f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def icons(download_icons_module, monkeypatch):
+    monkeypatch.setattr(download_icons_module, "SC2_UNITS", {"terran": {"Marine": "marine", "SCV": "scv"}})
+    return download_icons_module
+
+
+def test_conditional_reruns_and_changed_files(icons, server, tmp_path):
+    root, handler, base_url = server
+    local = tmp_path / "icons"
+
+    counts = icons.download_icons(base_url=base_url, base_path=local, concurrency=2)
+    assert counts == {"downloaded": 2, "unchanged": 0, "resumed": 0, "failed": 0}
+    assert (local / "terran" / "marine.svg").read_bytes() == (root / "terran" / "marine.svg").read_bytes()
+
+    handler.log.clear()
+    counts = icons.download_icons(base_url=base_url, base_path=local, concurrency=2)
+    assert counts["unchanged"] == 2
+    assert sorted(handler.log) == [("/terran/marine.svg", 304), ("/terran/scv.svg", 304)]
+
+    (root / "terran" / "scv.svg").write_bytes(b"<svg>new scv</svg>")
+    handler.log.clear()
+    counts = icons.download_icons(base_url=base_url, base_path=local, concurrency=2)
+    assert counts == {"downloaded": 1, "unchanged": 1, "resumed": 0, "failed": 0}
+    assert (local / "terran" / "scv.svg").read_bytes() == b"<svg>new scv</svg>"
+
+
+def test_interrupted_download_resumes_with_range(icons, server, tmp_path):
+    root, handler, base_url = server
+    local = tmp_path / "icons"
+    handler.truncate.add("/terran/marine.svg")
+
+    counts = icons.download_icons(base_url=base_url, base_path=local, concurrency=2)
+    assert counts["failed"] == 1
+    part = local / "terran" / "marine.svg.part"
+    assert part.exists() and not (local / "terran" / "marine.svg").exists()
+
+    handler.log.clear()
+    counts = icons.download_icons(base_url=base_url, base_path=local, concurrency=2)
+    assert counts["resumed"] == 1
+    assert ("/terran/marine.svg", 206) in handler.log
+    assert (local / "terran" / "marine.svg").read_bytes() == (root / "terran" / "marine.svg").read_bytes()
+    assert not part.exists()
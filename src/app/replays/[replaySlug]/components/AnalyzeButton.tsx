@@ -23,9 +23,10 @@ export default function AnalyzeButton({
 
   const analyzeReplayMutation = useMutation({
     mutationFn: () => analyzeReplay(filename, slug),
-    onSuccess: () => {
-      // Remove the query params and refresh the page to show results
-      router.replace(`/replays/${slug}`);
+    onSuccess: (storedSlug) => {
+      // Remove the query params and refresh the page to show results; a
+      // duplicate of an analyzed game goes to the existing replay instead
+      router.replace(`/replays/${storedSlug}`);
       router.refresh();
     },
   });
@@ -13,6 +13,9 @@ import { spawn } from "child_process";
 import path from "path";
 import fs from "fs/promises";
 
+// Kept in sync with INDEX_FILENAME in python/fingerprint.py
+const FINGERPRINT_INDEX_FILENAME = ".fingerprint_index.json";
+
 export interface ReplayFile {
   name: string;
   path: string;
@@ -73,12 +76,16 @@ export interface ReplayAnalysisResult {
     game_version: string;
     duration: number;
     played_at: number;
+    fingerprint?: string;
   };
   players: Array<{
     player: PlayerStats;
     build_order: BuildOrderAction[];
   }>;
   time_series?: TimeSeriesSnapshot[];
+  // Set instead of game_info/players when the game was already analyzed
+  // under another filename
+  duplicate_of?: string;
   error?: string;
 }
 
@@ -108,6 +115,7 @@ export async function getReplayFiles(): Promise<ReplayFile[]> {
  */
 function analyzeReplayWithPython(
   replayPath: string,
+  indexPath?: string,
 ): Promise<ReplayAnalysisResult> {
   return new Promise((resolve) => {
     const pythonScript = path.join(
@@ -115,7 +123,11 @@ function analyzeReplayWithPython(
       "python",
       "analyze_replay.py",
     );
-    const child = spawn("python3", [pythonScript, replayPath]);
+    const args = [pythonScript, replayPath];
+    if (indexPath) {
+      args.push("--index", indexPath);
+    }
+    const child = spawn("python3", args);
 
     let stdout = "";
     let stderr = "";
@@ -510,17 +522,31 @@ async function deleteExistingReplay(slug: string): Promise<void> {
 }
 
 /**
- * Analyze a replay file and store it with a specific slug
+ * Find the slug of a stored replay by its filename
+ */
+async function findReplaySlugByFilename(
+  filename: string,
+): Promise<string | null> {
+  const existingReplay = await db
+    .select({ slug: replays.slug })
+    .from(replays)
+    .where(eq(replays.filename, filename))
+    .limit(1);
+
+  return existingReplay[0]?.slug ?? null;
+}
+
+/**
+ * Analyze a replay file and store it with a specific slug.
+ * Returns the slug the replay can be viewed under, which is the existing
+ * replay's slug when the file is another copy of an analyzed game.
  */
 export async function analyzeReplay(
   filename: string,
   slug: string,
-): Promise<void> {
-  // Delete existing replay data if it exists (for re-analysis)
-  await deleteExistingReplay(slug);
-
-  // Analyze fresh replay
-  const replayPath = path.join(process.cwd(), "replays", filename);
+): Promise<string> {
+  const replaysDir = path.join(process.cwd(), "replays");
+  const replayPath = path.join(replaysDir, filename);
 
   // Check if file exists
   try {
@@ -529,13 +555,34 @@ export async function analyzeReplay(
     throw new Error(`Replay file not found: ${filename}`);
   }
 
-  // Run Python analysis
-  const analysis = await analyzeReplayWithPython(replayPath);
+  // Run Python analysis against the corpus fingerprint index
+  let analysis = await analyzeReplayWithPython(
+    replayPath,
+    path.join(replaysDir, FINGERPRINT_INDEX_FILENAME),
+  );
 
   if (!analysis.success) {
     throw new Error(analysis.error || "Analysis failed");
   }
 
+  if (analysis.duplicate_of) {
+    const existingSlug = await findReplaySlugByFilename(analysis.duplicate_of);
+    if (existingSlug && existingSlug !== slug) {
+      return existingSlug;
+    }
+
+    // The earlier copy was never stored here, so analyze this one in full
+    analysis = await analyzeReplayWithPython(replayPath);
+    if (!analysis.success) {
+      throw new Error(analysis.error || "Analysis failed");
+    }
+  }
+
+  // Delete existing replay data if it exists (for re-analysis)
+  await deleteExistingReplay(slug);
+
   // Store in database with slug
   await storeReplayInDatabase(analysis, slug);
+
+  return slug;
 }